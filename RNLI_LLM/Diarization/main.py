@@ -1,7 +1,6 @@
 import os
 import sys
 import json
-from pyannote.audio import Pipeline
 
 # Usage: python main.py <audio_path> <output_json> [<hf_token>]
 if len(sys.argv) < 3:
@@ -17,6 +16,14 @@ if not hf_token or not isinstance(hf_token, str) or not hf_token.strip():
     print("You can get a token at https://huggingface.co/settings/tokens")
     sys.exit(1)
 
+try:
+    # Imported only once the arguments are valid (pyannote pulls in torch)
+    from pyannote.audio import Pipeline
+except ImportError as e:
+    print("ERROR: pyannote.audio is not installed. Install it with: pip install pyannote.audio")
+    print(f"Details: {e}")
+    sys.exit(1)
+
 try:
     # Load pretrained diarization pipeline with token
     pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization", use_auth_token=hf_token)
@@ -1,8 +1,17 @@
 #!/usr/bin/env python
 
 import json  # For handling JSON data
-import requests  # For making HTTP requests to the LLM API
+import os  # For locating sibling modules
+import re  # For locating JSON in the model output
 import sys  # For system exit and error handling
+import threading  # For guarding the shared client
+from concurrent.futures import ThreadPoolExecutor  # For concurrent extraction
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import llm_cache
+import fast_extract
+import tracing
+from json_stream import IncrementalFieldParser
 
 # URL for the local Mistral (or compatible) LLM API endpoint
 MISTRAL_API_URL = "http://127.0.0.1:1234/v1/chat/completions"  # Change to your endpoint if needed
@@ -29,74 +38,677 @@ For each field, return:
 # Output only valid, indented JSON with all  categories and subfields.
 """
 
-def call_mistral(transcript):
+# One line per field for the reduced prompt sent when the rules already filled some fields
+FIELD_LINES = {
+    'ship_name': "- ship_name",
+    'position': "- position  # Can be GPS coordinates or bearing/distance from a known landmark",
+    'number_of_people': "- number_of_people",
+    'injuries': "- injuries  # Number and type, if any",
+    'distress_type': "- distress_type  # e.g., fire, sinking, MOB, engine failure",
+    'boat_name': "- boat_name  # Same as ship_name, if not explicitly different",
+}
+
+PARTIAL_PROMPT_TEMPLATE = """
+You are an expert maritime SAR operator. Extract the following details from the transcript below.
+
+Return only valid, indented JSON with only these fields:
+{fields}
+
+For each field, return:
+- value: the extracted information or "unknown"
+- confidence: a float between 0.0 and 1.0
+
+# Transcript:
+# '{transcript}'
+
+# Output only valid, indented JSON with the fields listed above.
+"""
+
+
+# Tiny classification prompt used by triage for calls the keyword scorer cannot decide
+TRIAGE_PROMPT_TEMPLATE = """
+You are a maritime SAR radio operator. Is the following radio transcript a distress or urgency call
+(Mayday, Pan-Pan, or a vessel or person needing help)? Answer with exactly one word: YES or NO.
+
+# Transcript:
+# '{transcript}'
+"""
+
+
+# Batched extraction: the instructions are a fixed prefix shared by every batch, the
+# numbered transcripts follow it. The answer is one JSON array keyed by id.
+BATCH_PROMPT_PREFIX = """
+You are an expert maritime SAR operator. Extract the following details from EACH of the numbered transcripts below.
+
+For every transcript return one JSON object with an "id" (the transcript number) and these fields
+(only the ones named on its "fields:" line, when the transcript has one):
+- ship_name
+- position  # Can be GPS coordinates or bearing/distance from a known landmark
+- number_of_people
+- injuries  # Number and type, if any
+- distress_type  # e.g., fire, sinking, MOB, engine failure
+- boat_name  # Same as ship_name, if not explicitly different
+
+For each field, return:
+- value: the extracted information or "unknown"
+- confidence: a float between 0.0 and 1.0
+
+Output only a valid JSON array of these objects, one per transcript, in any order.
+
+# Transcripts:
+"""
+
+# Batch sizing (rough token estimates, see plan_batches)
+CONTEXT_TOKENS = 8192  # Context window of the served model
+CHARS_PER_TOKEN = 4
+TOKENS_PER_RESULT = 200  # Output tokens reserved for one six-field object
+MAX_BATCH = 8
+
+
+def build_prompt(transcript, fields=None):
+    """Render the extraction prompt, asking only for `fields` if given (default: all of them)."""
+    if fields is None or set(fields) >= set(FIELD_LINES):
+        return PROMPT_TEMPLATE.format(transcript=transcript)
+    lines = '\n'.join(FIELD_LINES[name] for name in fields)
+    return PARTIAL_PROMPT_TEMPLATE.format(fields=lines, transcript=transcript)
+
+
+def build_batch_prompt(transcripts, fields=None):
     """
-    Sends the transcript to the local LLM API and returns the extracted structured information as a Python dict.
-    Handles API errors and malformed responses robustly.
-    """
-    # Format the prompt with the transcript
-    prompt = PROMPT_TEMPLATE.format(transcript=transcript)
-    headers = {"Content-Type": "application/json"}
-    data = {
-        "model": "google/gemma-3n-e4b",  # Model name; change as needed
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.2,  # Lower temperature for more deterministic output
-        "max_tokens": 2048
-    }
-    
-    # Send the request to the LLM API
+    Render the batch prompt for a list of transcripts, numbered from 1. fields
+    optionally gives each transcript's list of fields to ask for (None = all six).
+    """
+    fields = fields or [None] * len(transcripts)
+    lines = []
+    for i, (transcript, names) in enumerate(zip(transcripts, fields), 1):
+        lines.append(f"# [{i}] '{transcript}'")
+        if names is not None and not set(names) >= set(FIELD_LINES):
+            lines.append(f"#     fields: {', '.join(names)}")
+    return BATCH_PROMPT_PREFIX + '\n'.join(lines) + '\n'
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def plan_batches(transcripts, context_tokens=CONTEXT_TOKENS, max_batch=MAX_BATCH):
+    """
+    Group transcript indices into batches that fit the context budget: the
+    shared prefix plus, per transcript, its own tokens and room for its answer.
+    Short transcripts are packed up to max_batch per request; a long one may
+    get a batch to itself.
+    """
+    budget = context_tokens - estimate_tokens(BATCH_PROMPT_PREFIX)
+    batches, current, used = [], [], 0
+    for i, transcript in enumerate(transcripts):
+        cost = estimate_tokens(transcript) + 10 + TOKENS_PER_RESULT
+        if current and (used + cost > budget or len(current) >= max_batch):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_json(content, count, fields=None):
+    """
+    Parse a batch answer into {id: fields} for ids 1..count.
+    Entries with an unknown id, that are not objects, or that lack any of the
+    {value, confidence} fields asked of them (fields[id - 1], default all six)
+    are dropped (so extract_batch re-extracts that transcript on its own);
+    raises LLMOutputError if there is no JSON array at all.
+    """
+    match = re.search(r'\[[\s\S]*\]', content)
+    if not match:
+        raise LLMOutputError("No JSON array found in model output.", content)
     try:
-        response = requests.post(MISTRAL_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError:
-        print(f"Could not connect to the Mistral API at {MISTRAL_API_URL}. Is the server running?")
-        sys.exit(1)
-    except requests.exceptions.RequestException as e:
-        print(f"API request failed: {e}")
-        sys.exit(1)
-    
-    # Parse the JSON response
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        raise LLMOutputError("Model output was not a valid JSON array.", content)
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            item_id = int(item.get('id'))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= item_id <= count or item_id in results:
+            continue
+        if _has_all_fields(item, fields[item_id - 1] if fields else None):
+            results[item_id] = {k: v for k, v in item.items() if k != 'id'}
+    return results
+
+
+def _has_all_fields(item, names=None):
+    return all(isinstance(item.get(name), dict) and {'value', 'confidence'} <= set(item[name])
+               for name in names or FIELD_LINES)
+
+
+# Structured output: a JSON Schema is sent via response_format (LM Studio, llama.cpp and
+# other OpenAI-compatible servers constrain decoding to it) and each field is answered
+# in a compact {"v": ..., "c": ...} layout without indentation.
+VALUE_MAX_CHARS = 120  # Longest value the schema allows
+
+COMPACT_PROMPT_TEMPLATE = """
+You are an expert maritime SAR operator. Extract the following details from the transcript below.
+
+Fields:
+{fields}
+
+Answer with compact JSON (no indentation or extra spaces) mapping each field to
+{{"v": the extracted information or "unknown", "c": confidence between 0.0 and 1.0}}.
+
+# Transcript:
+# '{transcript}'
+"""
+
+
+def build_schema(fields=None):
+    """JSON Schema for the compact answer covering `fields` (default: all six)."""
+    fields = list(fields or FIELD_LINES)
+    field_schema = {
+        "type": "object",
+        "properties": {
+            "v": {"type": "string", "maxLength": VALUE_MAX_CHARS},
+            "c": {"type": "number", "minimum": 0, "maximum": 1},
+        },
+        "required": ["v", "c"],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "object",
+        "properties": {name: field_schema for name in fields},
+        "required": fields,
+        "additionalProperties": False,
+    }
+
+
+def schema_max_tokens(fields=None):
+    """
+    Upper bound on the output tokens of a compact answer for `fields`, counting one
+    token per character: Gemma and Llama tokenize digits one at a time, so a
+    coordinate-heavy value can take as many tokens as it has characters.
+    """
+    fields = list(fields or FIELD_LINES)
+    per_field = [len(f'"{name}":{{"v":"","c":0.95}},') + VALUE_MAX_CHARS for name in fields]
+    return sum(per_field) + 2
+
+
+def parse_compact_json(content, fields):
+    """
+    Strictly parse a compact answer in one pass: the whole output must be the
+    JSON object, with a {"v", "c"} object for every requested field.
+    Returns the fields in the usual {"value", "confidence"} schema.
+    Raises LLMOutputError otherwise.
+    """
     try:
-        result = response.json()
+        data = json.loads(content)
     except json.JSONDecodeError:
-        print(f"Invalid JSON response from API. Response: {response.text}")
-        sys.exit(1)
-    
-    # Validate the response structure
-    if "choices" not in result:
-        print(f"Unexpected API response structure. Response: {result}")
-        sys.exit(1)
-    
-    if not result["choices"]:
-        print("API returned no choices. Response:", result)
-        sys.exit(1)
-    
-    if "message" not in result["choices"][0]:
-        print(f"Unexpected choice structure. Choice: {result['choices'][0]}")
-        sys.exit(1)
-    
-    # Extract the content (model output) from the response
-    content = result["choices"][0]["message"]["content"]
-    
-    # Find and parse the first JSON object in the output using regex for robustness
-    import re
+        raise LLMOutputError("Model output was not valid JSON.", content)
+    if not isinstance(data, dict):
+        raise LLMOutputError("Model output was not a JSON object.", content)
+    result = {}
+    for name in fields:
+        field = data.get(name)
+        if not isinstance(field, dict) or 'v' not in field or 'c' not in field:
+            raise LLMOutputError(f"Model output is missing field '{name}'.", content)
+        result[name] = _expand_field(field)
+    return result
+
+
+def _expand_field(field):
+    if isinstance(field, dict) and 'v' in field:
+        return {'value': field['v'], 'confidence': field.get('c')}
+    return field
+
+
+def _expanding(on_field):
+    """Wrap an on_field callback so streamed compact fields arrive as {value, confidence}."""
+    def callback(name, field):
+        on_field(name, _expand_field(field))
+    return callback
+
+
+# Request settings (see README "LLM Settings")
+MODEL_NAME = "google/gemma-3n-e4b"  # Model name; change as needed
+TEMPERATURE = 0.2  # Lower temperature for more deterministic output
+MAX_TOKENS = 2048
+REQUEST_TIMEOUT = 120  # Seconds to wait for the server before giving up
+# Use response_format + compact JSON. Off by default: servers without JSON Schema support reject the
+# request. Opt in with RNLI_LLM_STRUCTURED_OUTPUT=1 (or --structured-output in evaluate_llm.py).
+STRUCTURED_OUTPUT = os.environ.get('RNLI_LLM_STRUCTURED_OUTPUT', '0') == '1'
+
+
+class LLMError(Exception):
+    """Base class for errors raised while querying the LLM."""
+
+
+class LLMConnectionError(LLMError):
+    """The LLM server could not be reached or did not answer in time."""
+
+
+class LLMResponseError(LLMError):
+    """The server answered, but with an HTTP error or an unexpected response structure."""
+
+
+class LLMOutputError(LLMError):
+    """The model's output did not contain valid JSON. The raw output is kept in .content."""
+
+    def __init__(self, message, content):
+        super().__init__(message)
+        self.content = content
+
+
+def parse_llm_json(content):
+    """
+    Find and parse the first JSON object in the model output.
+    Raises LLMOutputError if there is none or it is not valid JSON.
+    """
+    # Use regex for robustness against text around the JSON
     json_match = re.search(r'\{[\s\S]*\}', content)
     if not json_match:
-        print("No JSON found in model output. Here is the full output from the LLM:\n")
-        print("----- LLM OUTPUT START -----")
-        print(content)
-        print("----- LLM OUTPUT END -----")
-        sys.exit(1)
+        raise LLMOutputError("No JSON found in model output.", content)
     try:
-        json_data = json.loads(json_match.group(0))
+        return json.loads(json_match.group(0))
     except json.JSONDecodeError:
-        print("Model output was not valid JSON. Output was:\n", content)
-        sys.exit(1)
-    return json_data
+        raise LLMOutputError("Model output was not valid JSON.", content)
+
+
+class MistralClient:
+    """
+    Client for the OpenAI-compatible chat completions endpoint.
+    Keeps a keep-alive connection pool (one requests.Session) so repeated calls
+    skip TCP setup, and can fan many transcripts out concurrently. Successful
+    extractions are stored in `cache` (an llm_cache.LLMCache, or None to disable).
+    With structured_output=True extraction requests carry a JSON Schema in
+    response_format, ask for compact output and cap max_tokens from the schema.
+    """
+
+    def __init__(self, api_url=MISTRAL_API_URL, model=MODEL_NAME, temperature=TEMPERATURE,
+                 max_tokens=MAX_TOKENS, timeout=REQUEST_TIMEOUT, pool_size=8, cache=None, structured_output=False):
+        self.api_url = api_url
+        self.structured_output = structured_output
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        import requests  # Imported with the first client, so importing LLM stays cheap
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def build_request(self, prompt):
+        """Build the chat completions request body for a rendered prompt."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+
+    def build_extraction(self, transcript, fields=None):
+        """
+        Build the extraction request for `fields` (default: all six) and return
+        (request body, parser for the model output).
+        """
+        if not self.structured_output:
+            return self.build_request(build_prompt(transcript, fields)), parse_llm_json
+        fields = list(fields or FIELD_LINES)
+        lines = '\n'.join(FIELD_LINES[name] for name in fields)
+        data = self.build_request(COMPACT_PROMPT_TEMPLATE.format(fields=lines, transcript=transcript))
+        data['max_tokens'] = min(self.max_tokens, schema_max_tokens(fields))
+        data['response_format'] = {
+            "type": "json_schema",
+            "json_schema": {"name": "sar_extraction", "strict": True, "schema": build_schema(fields)},
+        }
+        return data, lambda content: parse_compact_json(content, fields)
+
+    def complete(self, prompt):
+        """Send a prompt and return the model's text output."""
+        return self.send(self.build_request(prompt))
+
+    def send(self, data):
+        """Send a chat completions request body and return the model's text output."""
+        with tracing.span('llm_http', model=data.get('model'), max_tokens=data.get('max_tokens')):
+            return self._send(data)
+
+    def _send(self, data):
+        import requests
+        try:
+            response = self.session.post(self.api_url, json=data, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.ConnectionError:
+            raise LLMConnectionError(f"Could not connect to the Mistral API at {self.api_url}. Is the server running?")
+        except requests.exceptions.Timeout:
+            raise LLMConnectionError(f"The Mistral API at {self.api_url} did not answer within {self.timeout} seconds.")
+        except requests.exceptions.RequestException as e:
+            raise LLMResponseError(f"API request failed: {e}")
+
+        # Parse the JSON response
+        try:
+            result = response.json()
+        except ValueError:
+            raise LLMResponseError(f"Invalid JSON response from API. Response: {response.text}")
+
+        # Validate the response structure
+        if "choices" not in result:
+            raise LLMResponseError(f"Unexpected API response structure. Response: {result}")
+        if not result["choices"]:
+            raise LLMResponseError(f"API returned no choices. Response: {result}")
+        if "message" not in result["choices"][0]:
+            raise LLMResponseError(f"Unexpected choice structure. Choice: {result['choices'][0]}")
+        tracing.record_usage(result.get('usage'))
+
+        # Extract the content (model output) from the response
+        return result["choices"][0]["message"]["content"]
+
+    def extract(self, transcript, use_cache=True, fast_path=False):
+        """
+        Extract the structured SAR fields from one transcript as a dict.
+        With fast_path=True the deterministic rules in fast_extract run first and
+        only the fields they could not fill confidently are requested from the
+        LLM; a fully formulaic call never reaches the server.
+        """
+        if not fast_path:
+            data, parse = self.build_extraction(transcript)
+            return self.send_json(data, use_cache=use_cache, parse=parse)
+        confident, missing = fast_extract.split_confident(fast_extract.extract_fields(transcript))
+        if not missing:
+            return confident
+        data, parse = self.build_extraction(transcript, missing)
+        return _merge_fields(confident, self.send_json(data, use_cache=use_cache, parse=parse))
 
+    def send_json(self, data, use_cache=True, parse=parse_llm_json):
+        """
+        Send a request body and parse the JSON in the model output. The raw output
+        is cached under a hash of the request body, but only once it parsed cleanly.
+        """
+        cache = self.cache if use_cache else None
+        key = self._cache_key(data) if cache is not None else None
+        if cache is not None:
+            content = cache.get(key)
+            if content is not None:
+                tracing.count('llm_cache_hits')
+                with tracing.span('json_parse', cached=True):
+                    return parse(content)
+        content = self.send(data)
+        with tracing.span('json_parse', chars=len(content)):
+            parsed = parse(content)
+        if cache is not None:
+            cache.put(key, content)
+        return parsed
 
+    def _cache_key(self, data):
+        # Streamed and non-streamed requests produce the same output, so share entries
+        return llm_cache.make_key({k: v for k, v in data.items() if k != 'stream'})
+
+    def stream(self, data):
+        """
+        Send a request body with stream=True and yield the model's text as it is
+        generated, parsed from the server-sent event (SSE) chunks.
+        """
+        import requests
+        data = dict(data, stream=True)
+        try:
+            response = self.session.post(self.api_url, json=data, timeout=self.timeout, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.ConnectionError:
+            raise LLMConnectionError(f"Could not connect to the Mistral API at {self.api_url}. Is the server running?")
+        except requests.exceptions.Timeout:
+            raise LLMConnectionError(f"The Mistral API at {self.api_url} did not answer within {self.timeout} seconds.")
+        except requests.exceptions.RequestException as e:
+            raise LLMResponseError(f"API request failed: {e}")
+
+        with response:
+            try:
+                # Raw bytes, decoded per line: SSE is always UTF-8, but requests falls back to
+                # ISO-8859-1 for text/* without a charset (and yields bytes with no Content-Type)
+                for raw in response.iter_lines():
+                    try:
+                        line = raw.decode('utf-8')
+                    except UnicodeDecodeError:
+                        raise LLMResponseError(f"Stream chunk is not valid UTF-8: {raw!r}")
+                    # SSE: 'data: {json}' lines separated by blank lines; 'data: [DONE]' ends the stream
+                    if not line or not line.startswith('data:'):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == '[DONE]':
+                        break
+                    try:
+                        chunk = json.loads(payload)
+                    except json.JSONDecodeError:
+                        raise LLMResponseError(f"Invalid JSON in stream chunk: {payload}")
+                    tracing.record_usage(chunk.get('usage'))  # Sent by servers that report usage when streaming
+                    choices = chunk.get('choices') or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get('delta') or {}
+                    if delta.get('content'):
+                        yield delta['content']
+            except requests.exceptions.RequestException as e:
+                raise LLMConnectionError(f"Stream from {self.api_url} was interrupted: {e}")
+
+    def extract_stream(self, transcript, on_field=None, use_cache=True, fast_path=False):
+        """
+        Stream the extraction and call on_field(name, field) as soon as each
+        top-level field (e.g. ship_name -> {value, confidence}) is complete.
+        With fast_path=True, fields the rules fill are emitted immediately and
+        only the rest are streamed from the LLM.
+        Returns the full dict once the response has finished.
+        """
+        if fast_path:
+            confident, missing = fast_extract.split_confident(fast_extract.extract_fields(transcript))
+            if on_field is not None:
+                for name, field in confident.items():
+                    on_field(name, field)
+            if not missing:
+                return confident
+
+            def on_llm_field(name, field):
+                if name not in confident and on_field is not None:
+                    on_field(name, field)
+            data, parse = self.build_extraction(transcript, missing)
+            return _merge_fields(confident, self._stream_json(data, on_llm_field, use_cache, parse))
+        data, parse = self.build_extraction(transcript)
+        return self._stream_json(data, on_field, use_cache, parse)
+
+    def _stream_json(self, data, on_field, use_cache, parse=parse_llm_json):
+        if on_field is not None and self.structured_output:
+            on_field = _expanding(on_field)
+        cache = self.cache if use_cache else None
+        key = self._cache_key(data) if cache is not None else None
+        if cache is not None:
+            content = cache.get(key)
+            if content is not None:
+                tracing.count('llm_cache_hits')
+                with tracing.span('json_parse', cached=True):
+                    parsed = parse(content)
+                if on_field is not None:
+                    for name, field in parsed.items():
+                        on_field(name, field)
+                return parsed
+
+        parser = IncrementalFieldParser(on_field)
+        pieces = []
+        with tracing.span('llm_http', model=data.get('model'), max_tokens=data.get('max_tokens'), stream=True):
+            for piece in self.stream(data):
+                pieces.append(piece)
+                parser.feed(piece)
+        content = ''.join(pieces)
+        with tracing.span('json_parse', chars=len(content)):
+            parsed = parse(content)
+        if cache is not None:
+            cache.put(key, content)
+        return parsed
+
+    def classify_distress(self, transcript, use_cache=True):
+        """
+        Ask the model a yes/no question (one output token) about whether the
+        transcript is a distress call. Returns True for distress.
+        """
+        data = self.build_request(TRIAGE_PROMPT_TEMPLATE.format(transcript=transcript))
+        data.update(temperature=0.0, max_tokens=1)
+        cache = self.cache if use_cache else None
+        key = self._cache_key(data) if cache is not None else None
+        content = cache.get(key) if cache is not None else None
+        if content is None:
+            content = self.send(data)
+        answer = content.strip().strip('.!"\'').upper()
+        if not answer or answer[0] not in 'YN':
+            raise LLMOutputError("Triage answer was not YES or NO.", content)
+        if cache is not None:
+            cache.put(key, content)
+        return answer[0] == 'Y'
+
+    def extract_many(self, transcripts, concurrency=4, return_exceptions=False, fast_path=False):
+        """
+        Extract fields from many transcripts with up to `concurrency` requests in flight.
+        Results are returned in input order. With return_exceptions=True a failed
+        transcript yields its LLMError in place of a dict instead of raising.
+        """
+        transcripts = list(transcripts)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = [pool.submit(self.extract, t, fast_path=fast_path) for t in transcripts]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except LLMError as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+        return results
+
+    def extract_batch(self, transcripts, use_cache=True, fast_path=False, context_tokens=CONTEXT_TOKENS,
+                      max_batch=MAX_BATCH):
+        """
+        Extract fields from many short transcripts with few requests: each request
+        carries the shared instruction prefix once, followed by up to max_batch
+        numbered transcripts (fewer when they are long, see plan_batches).
+        With fast_path=True each transcript is asked only for the fields the
+        rules could not fill, as in extract().
+        Transcripts missing from a batch answer, or the whole batch when the
+        answer is not a JSON array, fall back to one extract() request each.
+        Returns one dict per transcript, in input order.
+        """
+        transcripts = list(transcripts)
+        results = [None] * len(transcripts)
+        rule_fields = {}
+        missing_fields = {}
+        pending = []
+        for i, transcript in enumerate(transcripts):
+            if fast_path:
+                confident, missing = fast_extract.split_confident(fast_extract.extract_fields(transcript))
+                if not missing:
+                    results[i] = confident
+                    continue
+                rule_fields[i] = confident
+                missing_fields[i] = missing
+            pending.append(i)
+
+        batches = plan_batches([transcripts[i] for i in pending], context_tokens, max_batch)
+        for batch in batches:
+            indices = [pending[b] for b in batch]
+            answers = {}
+            if len(indices) > 1:
+                answers = self._send_batch([transcripts[i] for i in indices], use_cache,
+                                           [missing_fields.get(i) for i in indices])
+            for n, i in enumerate(indices, 1):
+                fields = answers.get(n)
+                if fields is None:
+                    results[i] = self.extract(transcripts[i], use_cache=use_cache, fast_path=fast_path)
+                else:
+                    results[i] = _merge_fields(rule_fields[i], fields) if i in rule_fields else fields
+        return results
+
+    def _send_batch(self, transcripts, use_cache, fields=None):
+        """
+        Send one batch request (asking each transcript for its fields, default all six)
+        and return {id: fields}; an empty dict if the answer is unusable.
+        """
+        data = self.build_request(build_batch_prompt(transcripts, fields))
+        data['max_tokens'] = TOKENS_PER_RESULT * len(transcripts)  # The room plan_batches reserved
+        cache = self.cache if use_cache else None
+        key = self._cache_key(data) if cache is not None else None
+        content = cache.get(key) if cache is not None else None
+        if content is None:
+            content = self.send(data)
+        try:
+            answers = parse_batch_json(content, len(transcripts), fields)
+        except LLMOutputError:
+            return {}
+        # Only a complete answer is cached, so a retry does not replay a partial one
+        if cache is not None and len(answers) == len(transcripts):
+            cache.put(key, content)
+        return answers
+
+    def close(self):
+        self.session.close()
+
+
+def _merge_fields(confident, llm_fields):
+    """Combine rule-filled fields with the LLM's answer for the rest, in PROMPT_TEMPLATE order."""
+    merged = dict(llm_fields)
+    merged.update(confident)
+    ordered = {name: merged[name] for name in fast_extract.FIELDS if name in merged}
+    ordered.update((name, value) for name, value in merged.items() if name not in ordered)
+    return ordered
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client():
+    """Return the shared, lazily created MistralClient."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = MistralClient(cache=llm_cache.get_cache(), structured_output=STRUCTURED_OUTPUT)
+        return _CLIENT
+
+
+def call_mistral(transcript, use_cache=True, fast_path=True):
+    """
+    Sends the transcript to the local LLM API and returns the extracted structured information as a Python dict.
+    Reuses a pooled HTTP session and the persistent response cache (pass use_cache=False to force a new request).
+    Fields the rule-based fast path fills confidently are not asked of the LLM (pass fast_path=False to disable).
+    Raises an LLMError subclass on API errors or malformed responses.
+    """
+    return get_client().extract(transcript, use_cache=use_cache, fast_path=fast_path)
+
+
+def call_mistral_stream(transcript, on_field=None, use_cache=True, fast_path=True):
+    """
+    Streaming variant of call_mistral: on_field(name, field) is called as each
+    field arrives, and the full dict is returned at the end.
+    """
+    return get_client().extract_stream(transcript, on_field=on_field, use_cache=use_cache, fast_path=fast_path)
+
+
+def extract_many(transcripts, concurrency=4, return_exceptions=False, fast_path=True):
+    """Extract fields from many transcripts concurrently using the shared client."""
+    return get_client().extract_many(transcripts, concurrency=concurrency, return_exceptions=return_exceptions,
+                                     fast_path=fast_path)
+
+
+def call_mistral_batch(transcripts, use_cache=True, fast_path=True, max_batch=MAX_BATCH):
+    """
+    Batched variant of call_mistral for many short transcripts: several
+    transcripts share one request. Returns one dict per transcript, in order.
+    """
+    return get_client().extract_batch(transcripts, use_cache=use_cache, fast_path=fast_path, max_batch=max_batch)
+
+
+@tracing.traced('LLM.main')
 def main():
     """
     Main entry point: reads the transcript from 'output.txt',
@@ -117,15 +729,27 @@ def main():
         sys.exit(1)
 
     # Call the LLM and print the result as JSON
-    data = call_mistral(transcript)
+    try:
+        data = call_mistral(transcript)
+    except LLMOutputError as e:
+        print(f"{e} Here is the full output from the LLM:\n")
+        print("----- LLM OUTPUT START -----")
+        print(e.content)
+        print("----- LLM OUTPUT END -----")
+        sys.exit(1)
+    except LLMError as e:
+        print(e)
+        sys.exit(1)
     # Write JSON output to file
     output_json_path = 'RNLI_LLM/output/output.json'
-    with open(output_json_path, 'w', encoding='utf-8') as jf:
+    with tracing.span('write', path=output_json_path), open(output_json_path, 'w', encoding='utf-8') as jf:
         json.dump(data, jf, indent=2, ensure_ascii=False)
     print(f"Structured JSON written to {output_json_path}")
     print(json.dumps(data, indent=2, ensure_ascii=False))
     elapsed = time.time() - start_time
     print(f"\n[Timer] LLM processing took {elapsed:.2f} seconds.")
+    stats = llm_cache.get_cache().stats()
+    print(f"[Cache] LLM response cache: {stats['memory_hits'] + stats['disk_hits']} hit(s), {stats['misses']} miss(es)")
 
 
 if __name__ == '__main__':
@@ -2,9 +2,16 @@
 
 import warnings
 import numpy as np
-import whisper
-import librosa
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from model_registry import DEFAULT_BACKEND, backend_cache_options, use_model
+from audio_io import load_pcm16_wav
+from transcript_cache import cached_transcribe
+from feature_store import get_store
+from chunked_transcribe import transcribe_chunked
 
 warnings.filterwarnings("ignore")
 
@@ -14,26 +21,52 @@ def call_mistral(transcript: str) -> str:
 
 def load_audio_with_librosa(file_path: str, sr: int = 16000) -> np.ndarray:
     """Load audio file using librosa (no ffmpeg dependency)"""
+    # Already 16-bit mono PCM WAV at the target rate: memory-map it, no resampling needed
+    audio = load_pcm16_wav(file_path, sr)
+    if audio is not None:
+        return audio
+    import librosa  # Slow to import; only needed for files that are not 16 kHz mono WAV
     audio, _ = librosa.load(file_path, sr=sr, mono=True)
     return audio
 
-def transcribe_audio(input_audio_path: str, model_size: str = 'base', language: str = None) -> str:
-    """Transcribe audio using Whisper + librosa. Returns plain transcript string."""
-    model = whisper.load_model(model_size)
-    print(f"Loaded Whisper model: {model_size}")
+def transcribe_audio(input_audio_path: str, model_size: str = 'base', language: str = None,
+                     use_cache: bool = True, overlap_seconds: float = 2.0, batch_size: int = 8,
+                     backend: str = DEFAULT_BACKEND, compute_type: str = None, use_features: bool = False) -> str:
+    """
+    Transcribe audio using Whisper + librosa. Returns plain transcript string.
+    Audio longer than 30 s is decoded as overlapping 30 s windows in batches
+    (see chunked_transcribe), so nothing past the first window is dropped.
+    The faster-whisper backend handles long audio itself and skips the windowing.
+    With use_features, the decoded samples and log-mel windows come from (and go
+    to) the feature store, so later runs and other model sizes skip librosa and the STFT.
+    """
+    store = get_store() if use_features else None
 
-    audio = load_audio_with_librosa(input_audio_path)
-    audio = whisper.pad_or_trim(audio)
-    mel = whisper.log_mel_spectrogram(audio).to(model.device)
+    def load():
+        if store is not None:
+            return store.load_audio(input_audio_path, decoder=load_audio_with_librosa, source='librosa')
+        return load_audio_with_librosa(input_audio_path)
 
-    if language is None:
-        _, probs = model.detect_language(mel)
-        language = max(probs, key=probs.get)
-        print(f"Detected language: {language}")
+    def run_whisper():
+        with use_model(model_size, dtype=compute_type, backend=backend) as model:
+            if backend != DEFAULT_BACKEND:
+                return model.transcribe(load(), language=language, task='transcribe')
+            if store is not None:
+                # 80 or 128 mel bins, whichever this model size expects
+                mel = store.log_mel_windows(input_audio_path, model.dims.n_mels, overlap_seconds,
+                                            decoder=load_audio_with_librosa, source='librosa')
+                text, lang = transcribe_chunked(model, None, language=language, overlap_seconds=overlap_seconds,
+                                                batch_size=batch_size, mel=mel)
+            else:
+                text, lang = transcribe_chunked(model, load(), language=language, overlap_seconds=overlap_seconds,
+                                                batch_size=batch_size)
+        return {'text': text, 'segments': [], 'language': lang}
 
-    options = whisper.DecodingOptions(language=language, fp16=False)
-    result = whisper.decode(model, mel, options)
-    return result.text.strip()
+    # Windowed decoding gives different text than model.transcribe, so key it separately
+    options = {'pipeline': 'librosa_chunked', 'overlap_seconds': overlap_seconds}
+    options.update(backend_cache_options(backend, compute_type))
+    result = cached_transcribe(input_audio_path, model_size, language, options, run_whisper, use_cache=use_cache)
+    return result['text'].strip()
 
 def transcribe_and_analyze(input_audio_path: str, output_json_path: str, model_size: str = 'base', language: str = None):
     """Transcribes the audio, analyzes with LLM, and writes to JSON"""
@@ -1,25 +1,31 @@
 #!/usr/bin/env python
 
 import argparse
+import os
 import sys
 
-# Try to import Whisper for speech-to-text
-try:
-    import whisper
-except ImportError:
-    print("The 'whisper' package is not installed. Please see the instructions below.")
-    sys.exit(1)
+# Make sibling modules importable when loaded as RNLI_LLM.Main.Transcript
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Whisper (and torch) are imported on first use, so --help returns immediately
+from model_registry import (DEFAULT_BACKEND, add_backend_arguments, backend_available, backend_cache_options,
+                            backend_missing, use_model)
+from transcript_cache import cached_transcribe
+import tracing
+from profiling import add_profile_arguments, profile_run
 
-# Optional: For SRT/VTT subtitle output
-try:
-    from whisper.utils import write_srt, write_vtt
-except ImportError:
-    write_srt = None
-    write_vtt = None
 
-def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None, model_size='large', language=None):
+def subtitle_writers():
+    """Return whisper's (write_srt, write_vtt), or (None, None) if this whisper version lacks them."""
+    try:
+        from whisper.utils import write_srt, write_vtt
+    except ImportError:
+        return None, None
+    return write_srt, write_vtt
+
+def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None, model_size='large', language=None,
+                     use_cache=True, backend=DEFAULT_BACKEND, compute_type=None):
     """
-    Transcribe audio using OpenAI Whisper and save results in text, SRT, and VTT formats.
+    Transcribe audio using Whisper and save results in text, SRT, and VTT formats.
     Args:
         input_audio (str): Path to the input audio file (any format supported by Whisper)
         output_txt (str): Path to save the plain text transcript
@@ -27,27 +33,38 @@ def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None,
         output_vtt (str, optional): Path to save VTT subtitles
         model_size (str): Whisper model size (tiny, base, small, medium, large)
         language (str, optional): Language code (e.g., 'en') or None for auto-detect
+        use_cache (bool): Look the audio up in the transcript cache first (default: True)
+        backend (str): ASR engine, 'whisper' (openai-whisper) or 'faster-whisper' (CTranslate2)
+        compute_type (str, optional): Engine precision, e.g. 'int8' or 'int8_float32' for
+            faster-whisper (default: the backend's default)
     """
-    model = whisper.load_model(model_size)
-    print(f"Loaded Whisper model: {model_size}")
-    # Transcribe the audio file directly (no ffmpeg conversion)
-    result = model.transcribe(input_audio, language=language, verbose=True, task='transcribe')
+    def run_whisper():
+        # Reuse the process-wide model instead of reloading it for every file
+        with use_model(model_size, dtype=compute_type, backend=backend) as model:
+            # Transcribe the audio file directly (no ffmpeg conversion)
+            return model.transcribe(input_audio, language=language, verbose=True, task='transcribe')
+
+    options = dict({'task': 'transcribe'}, **backend_cache_options(backend, compute_type))
+    # Identical audio + model + language is only ever transcribed once
+    result = cached_transcribe(input_audio, model_size, language, options, run_whisper, use_cache=use_cache)
 
-    # Write plain text output
-    with open(output_txt, 'w', encoding='utf-8') as f:
-        f.write(result['text'].strip() + '\n')
-    print(f"Transcription saved to {output_txt}")
+    write_srt, write_vtt = subtitle_writers() if output_srt or output_vtt else (None, None)
+    with tracing.span('write', path=output_txt):
+        # Write plain text output
+        with open(output_txt, 'w', encoding='utf-8') as f:
+            f.write(result['text'].strip() + '\n')
+        print(f"Transcription saved to {output_txt}")
 
-    # Write SRT subtitles if requested and supported
-    if output_srt and write_srt:
-        with open(output_srt, 'w', encoding='utf-8') as f:
-            write_srt(result['segments'], file=f)
-        print(f"SRT subtitles saved to {output_srt}")
-    # Write VTT subtitles if requested and supported
-    if output_vtt and write_vtt:
-        with open(output_vtt, 'w', encoding='utf-8') as f:
-            write_vtt(result['segments'], file=f)
-        print(f"VTT subtitles saved to {output_vtt}")
+        # Write SRT subtitles if requested and supported
+        if output_srt and write_srt:
+            with open(output_srt, 'w', encoding='utf-8') as f:
+                write_srt(result['segments'], file=f)
+            print(f"SRT subtitles saved to {output_srt}")
+        # Write VTT subtitles if requested and supported
+        if output_vtt and write_vtt:
+            with open(output_vtt, 'w', encoding='utf-8') as f:
+                write_vtt(result['segments'], file=f)
+            print(f"VTT subtitles saved to {output_vtt}")
 
     # Print detected language
     print(f"Detected language: {result['language']}")
@@ -55,6 +72,7 @@ def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None,
     # Speaker diarization placeholder (not implemented)
     print("[Placeholder] Speaker diarization is not implemented. See README for extension options.")
 
+@tracing.traced('Transcript.main')
 def main():
     parser = argparse.ArgumentParser(description="Transcribe audio using OpenAI Whisper (no ffmpeg conversion)")
     parser.add_argument('input_audio', help="Path to input audio file")
@@ -63,18 +81,28 @@ def main():
     parser.add_argument('--vtt', help="Optional: Output VTT subtitle file")
     parser.add_argument('--model', default='large', help="Whisper model size: tiny, base, small, medium, large (default: large)")
     parser.add_argument('--language', default=None, help="Force language (e.g., 'en'). Default: auto-detect.")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached transcripts and re-run Whisper")
+    add_backend_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    if not backend_available(args.backend):
+        print(backend_missing(args.backend))
+        sys.exit(1)
 
     import time
     start_time = time.time()
-    transcribe_audio(
-        args.input_audio,
-        args.output_txt,
-        output_srt=args.srt,
-        output_vtt=args.vtt,
-        model_size=args.model,
-        language=args.language
-    )
+    with profile_run(args.output_txt, enabled=args.profile, memory=args.profile_memory):
+        transcribe_audio(
+            args.input_audio,
+            args.output_txt,
+            output_srt=args.srt,
+            output_vtt=args.vtt,
+            model_size=args.model,
+            language=args.language,
+            use_cache=not args.no_cache,
+            backend=args.backend,
+            compute_type=args.compute_type
+        )
     elapsed = time.time() - start_time
     print(f"\n[Timer] Transcription process took {elapsed:.2f} seconds.")
 
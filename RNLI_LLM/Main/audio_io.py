@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+import struct  # For parsing WAV headers
+import subprocess  # For running ffmpeg
+
+import numpy as np
+
+import tracing
+
+# Whisper works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(RuntimeError):
+    """Raised when an audio file cannot be decoded."""
+
+
+# WAVE_FORMAT_PCM and WAVE_FORMAT_EXTENSIBLE format tags
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def load_audio(input_path, sr=SAMPLE_RATE):
+    """
+    Load audio as a mono float32 array at the given sample rate.
+    Files that are already 16-bit mono PCM WAV at that rate are memory-mapped
+    directly (no ffmpeg process); everything else goes through decode_audio().
+    """
+    with tracing.span('decode', path=str(input_path)) as span:
+        samples = load_pcm16_wav(input_path, sr)
+        span.set(method='memmap' if samples is not None else 'ffmpeg')
+        if samples is None:
+            samples = decode_audio(input_path, sr)
+        span.set(audio_s=round(len(samples) / sr, 3))
+        return samples
+
+
+def sniff_pcm16_wav(input_path, sr=SAMPLE_RATE):
+    """
+    Check whether a file is a 16-bit mono PCM WAV at the given sample rate.
+    Returns (data_offset, num_samples) when it is, otherwise None.
+    """
+    try:
+        f = open(input_path, 'rb')
+    except OSError:
+        return None
+    with f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        file_size = f.seek(0, 2)
+        pos = 12
+        fmt_ok = False
+        # Walk the RIFF chunks until we find 'data' (after a matching 'fmt ')
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+            body = pos + 8
+            if chunk_id == b'fmt ':
+                fmt = f.read(min(chunk_size, 40))
+                if len(fmt) < 16:
+                    return None
+                tag, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+                if tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                    # The real format tag is the first two bytes of the SubFormat GUID
+                    tag = struct.unpack('<H', fmt[24:26])[0]
+                fmt_ok = (tag == _WAVE_FORMAT_PCM and channels == 1 and rate == sr
+                          and bits == 16 and block_align == 2)
+                if not fmt_ok:
+                    return None
+            elif chunk_id == b'data':
+                if not fmt_ok:
+                    return None
+                # Streamed WAVs may carry a placeholder size; trust the file length instead
+                data_size = min(chunk_size, file_size - body)
+                return body, data_size // 2
+            # Chunks are padded to an even number of bytes
+            pos = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def load_pcm16_wav(input_path, sr=SAMPLE_RATE):
+    """
+    Memory-map the samples of a 16-bit mono PCM WAV at the given sample rate
+    and return them as float32. Returns None if the file is in any other format.
+    """
+    layout = sniff_pcm16_wav(input_path, sr)
+    if layout is None:
+        return None
+    offset, num_samples = layout
+    if num_samples == 0:
+        return np.zeros(0, dtype=np.float32)
+    pcm = np.memmap(input_path, dtype='<i2', mode='r', offset=offset, shape=(num_samples,))
+    samples = pcm.astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
+
+
+def decode_audio(input_path, sr=SAMPLE_RATE):
+    """
+    Decode any audio file to a mono float32 NumPy array in [-1, 1] using ffmpeg.
+    The PCM samples are streamed over ffmpeg's stdout, so nothing is written to
+    disk and many decodes can safely run at the same time.
+    Args:
+        input_path (str): Path to the input audio file (any format ffmpeg can read)
+        sr (int): Target sample rate (default: 16000, as expected by Whisper)
+    Returns:
+        np.ndarray: 1-D float32 array of samples
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-threads', '0', '-i', input_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sr), '-'
+    ]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg was not found. Please install it and add it to PATH.")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(
+            f"FFmpeg failed with error code {e.returncode}:\n{e.stderr.decode(errors='replace')}"
+        )
+    return pcm16_to_float32(result.stdout)
+
+
+def pcm16_to_float32(buffer):
+    """
+    Convert little-endian signed 16-bit PCM bytes to float32 samples in [-1, 1].
+    The int16 view over the buffer is zero-copy; the only allocation is the
+    float32 output, which is scaled in place.
+    """
+    samples = np.frombuffer(buffer, dtype='<i2').astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
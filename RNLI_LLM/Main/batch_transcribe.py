@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import glob  # For expanding glob patterns
+import json  # For JSONL output
+import multiprocessing  # For the worker process pool
+import os  # For file path operations
+import sys  # For exiting on error
+import time  # For progress/ETA reporting
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audio_io import load_audio
+import tracing
+import transcript_cache
+from transcript_cache import cached_transcribe
+
+# File extensions picked up when a directory is given
+AUDIO_EXTENSIONS = {'.wav', '.m4a', '.mp3', '.flac', '.ogg', '.opus', '.aac', '.wma', '.webm', '.mp4'}
+
+# Per-worker settings, filled in by _init_worker in each child process
+_WORKER = {}
+
+# Batched decoding gives different text than model.transcribe (no temperature fallback or
+# timestamps), so its transcripts are cached under their own key
+CLIP_BATCH_OPTIONS = {'task': 'transcribe', 'pipeline': 'clip_batch'}
+
+
+def expand_inputs(inputs):
+    """
+    Expand directories, glob patterns and plain file paths into a sorted,
+    de-duplicated list of audio files.
+    Args:
+        inputs (str or list): Directory, glob pattern or file path (or a list of them)
+    """
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, n) for n in names
+                             if os.path.splitext(n)[1].lower() in AUDIO_EXTENSIONS)
+        elif glob.has_magic(item):
+            files.extend(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+        else:
+            files.append(item)
+    return sorted(set(os.path.normpath(f) for f in files))
+
+
+def load_completed(output_jsonl):
+    """
+    Return the set of audio paths that already have a successful record in the
+    output JSONL file, so an interrupted batch can resume where it stopped.
+    A partially written last line (from a crash) is ignored.
+    """
+    done = set()
+    if not os.path.exists(output_jsonl):
+        return done
+    with open(output_jsonl, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('status') == 'ok':
+                done.add(os.path.normpath(record['audio_path']))
+    return done
+
+
+def _truncate_partial_line(output_jsonl):
+    """
+    Cut a partially written last line (from a crash) off the output JSONL file, so
+    the next record appended starts on a line of its own.
+    """
+    if not os.path.exists(output_jsonl):
+        return
+    with open(output_jsonl, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        size = end
+        while end:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+
+
+def _init_worker(model_size, language, threads_per_worker, use_cache=True, clip_batch=0, trace=(None, None)):
+    """
+    Load the model once per worker process and split CPU threads between workers.
+    A failed load is kept and reported by every task this worker runs: an exception
+    here would make the pool respawn the worker forever.
+    trace is (trace file, parent context): worker spans join the parent's trace and
+    are flushed after each task. Metrics stay with the parent process, whose metrics
+    file is rewritten on every flush.
+    """
+    _WORKER.update(model_size=model_size, language=language, use_cache=use_cache, clip_batch=clip_batch,
+                   trace_context=trace[1], init_error=None)
+    tracing.configure(trace[0], None)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    try:
+        from model_registry import warm_up
+        with tracing.span('worker_init', parent=trace[1], pid=os.getpid()):
+            warm_up(model_size)
+    except Exception as e:
+        _WORKER['init_error'] = f"{type(e).__name__}: {e}"
+    finally:
+        tracing.flush()
+
+
+def _transcribe_one(audio_path):
+    """Transcribe a single file inside a worker and return its JSONL record."""
+    from model_registry import use_model
+    start = time.time()
+    record = {'audio_path': audio_path, 'model': _WORKER['model_size']}
+    if _WORKER['init_error']:
+        record.update(status='error', error=_WORKER['init_error'], elapsed=0.0, worker_pid=os.getpid())
+        return record
+
+    def run_whisper():
+        audio = load_audio(audio_path)
+        with use_model(_WORKER['model_size']) as model:
+            return model.transcribe(audio, language=_WORKER['language'], verbose=None, task='transcribe')
+
+    try:
+        with tracing.span('batch_file', parent=_WORKER['trace_context'], path=audio_path):
+            result = cached_transcribe(audio_path, _WORKER['model_size'], _WORKER['language'],
+                                       {'task': 'transcribe'}, run_whisper, use_cache=_WORKER['use_cache'])
+        _record_result(record, result)
+    except Exception as e:
+        record.update(status='error', error=f"{type(e).__name__}: {e}")
+    finally:
+        tracing.flush()  # Pool workers are terminated, not exited, so nothing would flush them later
+    record['elapsed'] = round(time.time() - start, 2)
+    record['worker_pid'] = os.getpid()
+    return record
+
+
+def _record_result(record, result):
+    record.update(
+        status='ok',
+        transcript=result['text'].strip(),
+        language=result['language'],
+        segments=[{'start': s['start'], 'end': s['end'], 'text': s['text'].strip()} for s in result['segments']],
+    )
+
+
+def transcribe_files(audio_paths, model_size='base', language=None, batch_size=8, use_cache=True, model=None):
+    """
+    Transcribe a group of (mostly short) files in this process with batched
+    Whisper passes: their windows share padded mel batches of batch_size, so the
+    encoder and decoder run once per batch rather than once per file.
+    See chunked_transcribe.transcribe_clips.
+    Args:
+        audio_paths (list): Audio file paths
+        model_size (str): Whisper model size (tiny, base, small, medium, large)
+        language (str, optional): Language code (e.g., 'en') or None to detect it per clip
+        batch_size (int): Windows decoded together
+        use_cache (bool): Reuse cached transcripts of identical audio (default: True)
+        model (optional): Already loaded Whisper model (default: from the model registry)
+    Returns:
+        list: One {'text', 'segments', 'language'} result or an Exception per path, in order
+    """
+    from chunked_transcribe import transcribe_clips
+    from model_registry import use_model
+
+    results = [None] * len(audio_paths)
+    pending = []  # (index, cache key, decoded audio)
+    for i, path in enumerate(audio_paths):
+        try:
+            key, cached = transcript_cache.lookup(path, model_size, language, CLIP_BATCH_OPTIONS)
+            if use_cache and cached is not None:
+                tracing.count('transcript_cache', result='hit')
+                results[i] = cached
+            else:
+                pending.append((i, key, load_audio(path)))
+        except Exception as e:
+            results[i] = e
+    if pending:
+        tracing.count('transcript_cache', len(pending), result='miss')
+        clips = [audio for _, _, audio in pending]
+        try:
+            with tracing.span('transcribe', model=model_size, language=language, clips=len(clips)):
+                if model is not None:
+                    fresh = transcribe_clips(model, clips, language=language, batch_size=batch_size)
+                else:
+                    with use_model(model_size) as loaded:
+                        fresh = transcribe_clips(loaded, clips, language=language, batch_size=batch_size)
+        except Exception as e:
+            fresh = [e] * len(pending)
+        for (i, key, _), result in zip(pending, fresh):
+            if not isinstance(result, Exception):
+                transcript_cache.store(key, result)
+            results[i] = result
+    return results
+
+
+def _transcribe_group(audio_paths):
+    """Transcribe a group of files inside a worker with batched decoding and return their JSONL records."""
+    start = time.time()
+    if _WORKER['init_error']:
+        return [{'audio_path': path, 'model': _WORKER['model_size'], 'status': 'error',
+                 'error': _WORKER['init_error'], 'elapsed': 0.0, 'worker_pid': os.getpid()}
+                for path in audio_paths]
+    try:
+        with tracing.span('batch_group', parent=_WORKER['trace_context'], files=len(audio_paths)):
+            results = transcribe_files(audio_paths, _WORKER['model_size'], _WORKER['language'],
+                                       batch_size=_WORKER['clip_batch'], use_cache=_WORKER['use_cache'])
+    finally:
+        tracing.flush()
+    records = []
+    for path, result in zip(audio_paths, results):
+        record = {'audio_path': path, 'model': _WORKER['model_size']}
+        if isinstance(result, Exception):
+            record.update(status='error', error=f"{type(result).__name__}: {result}")
+        else:
+            _record_result(record, result)
+        record['elapsed'] = round(time.time() - start, 2)  # Shared by the whole group
+        record['worker_pid'] = os.getpid()
+        records.append(record)
+    return records
+
+
+def transcribe_batch(inputs, output_jsonl, model_size='large', language=None, workers=None, resume=True,
+                     use_cache=True, clip_batch=0):
+    """
+    Transcribe many audio files across a pool of worker processes, each of which
+    loads the Whisper model once. Writes one JSON record per file to output_jsonl.
+    Args:
+        inputs (str or list): Directory, glob pattern or file path (or a list of them)
+        output_jsonl (str): Path to the JSONL results file (appended to)
+        model_size (str): Whisper model size (tiny, base, small, medium, large)
+        language (str, optional): Language code (e.g., 'en') or None for auto-detect
+        workers (int, optional): Number of worker processes (default: one per CPU core)
+        resume (bool): Skip files that already have a successful record in output_jsonl
+        use_cache (bool): Reuse cached transcripts of identical audio (default: True)
+        clip_batch (int): When > 0, each worker takes clip_batch files at a time and decodes
+            them together in padded mel batches (see transcribe_files); best for short calls
+    Returns:
+        dict: Counts of 'ok', 'error' and 'skipped' files
+    """
+    files = expand_inputs(inputs)
+    done = load_completed(output_jsonl) if resume else set()
+    todo = [f for f in files if f not in done]
+    summary = {'ok': 0, 'error': 0, 'skipped': len(files) - len(todo)}
+    if summary['skipped']:
+        print(f"Resuming: skipping {summary['skipped']} already transcribed file(s)")
+    if not todo:
+        print("Nothing to transcribe.")
+        return summary
+
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, len(todo)))
+    threads_per_worker = max(1, cpu_count // workers)
+    print(f"Transcribing {len(todo)} file(s) with {workers} worker(s), model '{model_size}'")
+
+    out_dir = os.path.dirname(output_jsonl)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    _truncate_partial_line(output_jsonl)
+
+    start = time.time()
+    # 'spawn' keeps torch/OpenMP state out of the children and behaves the same on every OS
+    ctx = multiprocessing.get_context('spawn')
+    if clip_batch > 0:
+        # Whole groups go to one worker; fewer, wider workers keep every batch full
+        groups = [todo[g:g + clip_batch] for g in range(0, len(todo), clip_batch)]
+        workers = min(workers, len(groups))
+        threads_per_worker = max(1, cpu_count // workers)
+    trace = (tracing.get_tracer().trace_path, tracing.context())
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(model_size, language, threads_per_worker, use_cache, clip_batch, trace)) as pool, \
+            open(output_jsonl, 'a', encoding='utf-8') as out:
+        if clip_batch > 0:
+            records = (record for group in pool.imap_unordered(_transcribe_group, groups) for record in group)
+        else:
+            records = pool.imap_unordered(_transcribe_one, todo)
+        for i, record in enumerate(records, 1):
+            # Flush and fsync every record so a crash loses at most the file in flight
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            os.fsync(out.fileno())
+            summary[record['status']] += 1
+            elapsed = time.time() - start
+            eta = elapsed / i * (len(todo) - i)
+            print(f"[{i}/{len(todo)}] {record['status'].upper()} {record['audio_path']} "
+                  f"({record['elapsed']:.2f}s, ETA {eta:.0f}s)")
+    print(f"\n[Timer] Batch transcription took {time.time() - start:.2f} seconds "
+          f"({summary['ok']} ok, {summary['error']} failed, {summary['skipped']} skipped).")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-transcribe a directory or glob of audio files to JSONL")
+    parser.add_argument('inputs', nargs='+', help="Audio directory, glob pattern (quote it) or file paths")
+    parser.add_argument('output_jsonl', help="Path to output .jsonl file (one record per audio file)")
+    parser.add_argument('--model', default='large', help="Whisper model size: tiny, base, small, medium, large (default: large)")
+    parser.add_argument('--language', default=None, help="Force language (e.g., 'en'). Default: auto-detect.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: one per CPU core)")
+    parser.add_argument('--no-resume', action='store_true', help="Re-transcribe files already present in the output")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached transcripts and re-run Whisper")
+    parser.add_argument('--clip-batch', type=int, default=0,
+                        help="Decode this many files together in padded mel batches (for corpora of short "
+                             "calls; default: 0, one model.transcribe per file)")
+    args = parser.parse_args(argv)
+
+    summary = transcribe_batch(args.inputs, args.output_jsonl, model_size=args.model, language=args.language,
+                               workers=args.workers, resume=not args.no_resume, use_cache=not args.no_cache,
+                               clip_batch=args.clip_batch)
+    if summary['error']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
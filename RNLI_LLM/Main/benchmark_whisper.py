@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import csv  # For the per-model summary table
+import json  # For the test cases, results and baseline
+import math  # For nearest-rank percentiles
+import multiprocessing  # For measuring each model in a fresh process
+import os  # For file path operations
+import re  # For transcript normalization
+import sys  # For exiting on regressions
+import time  # For load/transcription timings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audio_io import AudioDecodeError, SAMPLE_RATE, load_audio
+from model_registry import BACKENDS, DEFAULT_BACKEND, ModelRegistry, backend_available
+from profiling import peak_rss_mb
+
+MODEL_SIZES = ['tiny', 'base', 'small', 'medium', 'large']
+# backend:compute_type pairs compared by default (openai-whisper vs. CTranslate2 int8 on CPU)
+DEFAULT_ENGINES = ['whisper', 'faster-whisper:int8', 'faster-whisper:int8_float32']
+DEFAULT_CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Unit-Tests', 'inputs.json')
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+# A model regresses against the baseline when it gets this much slower or less accurate
+RTF_TOLERANCE = 0.15  # Relative increase in real-time factor
+WER_TOLERANCE = 0.02  # Absolute increase in word error rate
+SUMMARY_COLUMNS = ['model', 'backend', 'compute_type', 'device', 'threads', 'clips', 'audio_s', 'load_s',
+                   'transcribe_s', 'rtf', 'p50_rtf', 'p95_rtf', 'max_rtf', 'wer', 'clips_per_s', 'batch_clips_per_s',
+                   'batch_wer', 'peak_rss_mb', 'model_rss_mb', 'errors', 'meets_slo']
+
+
+def normalize_text(text):
+    """Lowercase, unify apostrophes and drop punctuation so WER only counts word differences."""
+    text = text.lower().replace('’', "'").replace('‘', "'")
+    text = re.sub(r"[-–—/]", ' ', text)
+    text = re.sub(r"[^\w\s']", '', text)
+    text = re.sub(r"(?<!\w)'|'(?!\w)", '', text)  # Quotes, but not apostrophes inside words
+    return text.split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Return (substitutions + deletions + insertions, reference word count) between
+    two transcripts after normalization (word-level Levenshtein distance).
+    """
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ref_word != hyp_word))
+    return row[-1], len(ref)
+
+
+def word_error_rate(reference, hypothesis):
+    errors, words = word_errors(reference, hypothesis)
+    return errors / words if words else float(errors > 0)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def resolve_audio_path(path, root=REPO_ROOT):
+    """
+    Find a test-case audio file: as given, relative to the repo root, or (for
+    paths recorded on another machine) from its RNLI_LLM/ part onwards.
+    """
+    candidates = [path, os.path.join(root, path)]
+    marker = path.replace('\\', '/').find('RNLI_LLM/')
+    if marker >= 0:
+        candidates.append(os.path.join(root, path.replace('\\', '/')[marker:]))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+def load_clips(cases_path=DEFAULT_CASES, root=REPO_ROOT):
+    """
+    Decode every test clip once, up front, so each model is timed on identical
+    in-memory audio and no model pays for ffmpeg.
+    Returns:
+        list: {'audio_path', 'expected', 'audio', 'duration_s'} per usable case
+    """
+    with open(cases_path, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    decoded = {}
+    clips = []
+    for case in cases:
+        path = resolve_audio_path(case['audio_path'], root)
+        if path is None:
+            print(f"Skipping missing clip: {case['audio_path']}")
+            continue
+        if path not in decoded:
+            try:
+                decoded[path] = load_audio(path)
+            except AudioDecodeError as e:
+                print(f"Skipping undecodable clip {path}: {e}")
+                decoded[path] = None
+        if decoded[path] is None:
+            continue
+        clips.append({'audio_path': case['audio_path'], 'expected': case['expected_transcript'],
+                      'audio': decoded[path], 'duration_s': len(decoded[path]) / SAMPLE_RATE})
+    return clips
+
+
+def parse_engine(spec):
+    """Split 'backend[:compute_type]' into (backend, compute_type), filling in the backend's default."""
+    backend, _, compute_type = spec.partition(':')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    return backend, compute_type or BACKENDS[backend]['dtype']
+
+
+def benchmark_model(model_size, clips, language='en', device='cpu', threads=None, loader=None,
+                    backend=DEFAULT_BACKEND, compute_type=None, clip_batch=0):
+    """
+    Load one model into a private registry and transcribe every clip with it.
+    loader defaults to the backend's own; compute_type to the backend's default.
+    With clip_batch (openai-whisper only), all clips are then transcribed again in
+    padded mel batches of that size to compare throughput and WER.
+    Load time is measured separately from transcription; the first clip is
+    transcribed once untimed so lazy initialization does not skew its RTF.
+    Returns:
+        dict: {'summary': one row of SUMMARY_COLUMNS (without meets_slo), 'clips': per-clip results}
+    """
+    try:
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+        threads = torch.get_num_threads()
+    except ImportError:
+        pass
+    if threads and backend != DEFAULT_BACKEND:
+        os.environ['OMP_NUM_THREADS'] = str(threads)  # CTranslate2 sizes its thread pool from this at load
+    compute_type = compute_type or BACKENDS[backend]['dtype']
+    rss_before = peak_rss_mb()
+    registry = ModelRegistry(loader=loader or BACKENDS[backend]['loader'])
+    start = time.perf_counter()
+    model = registry.get(model_size, device, compute_type)
+    load_s = time.perf_counter() - start
+
+    options = {'language': language, 'task': 'transcribe', 'verbose': None, 'fp16': device == 'cuda'}
+    if clips:
+        model.transcribe(clips[0]['audio'], **options)
+    results = []
+    for clip in clips:
+        result = {'model': model_size, 'backend': backend, 'compute_type': compute_type,
+                  'audio_path': clip['audio_path'], 'duration_s': round(clip['duration_s'], 3)}
+        start = time.perf_counter()
+        try:
+            text = model.transcribe(clip['audio'], **options)['text'].strip()
+        except Exception as e:
+            result.update(error=f"{type(e).__name__}: {e}", seconds=round(time.perf_counter() - start, 3))
+            results.append(result)
+            continue
+        seconds = time.perf_counter() - start
+        errors, words = word_errors(clip['expected'], text)
+        result.update(seconds=round(seconds, 3), rtf=round(seconds / clip['duration_s'], 4),
+                      wer=round(errors / words if words else 0.0, 4), errors=errors, words=words, transcript=text)
+        results.append(result)
+    batch = {}
+    if clip_batch and backend == DEFAULT_BACKEND and clips:
+        from chunked_transcribe import transcribe_clips
+        start = time.perf_counter()
+        texts = [r['text'] for r in transcribe_clips(model, [clip['audio'] for clip in clips], language=language,
+                                                      batch_size=clip_batch, fp16=device == 'cuda')]
+        seconds = time.perf_counter() - start
+        errors = [word_errors(clip['expected'], text) for clip, text in zip(clips, texts)]
+        words = sum(w for _, w in errors)
+        batch = {'batch_clips_per_s': round(len(clips) / seconds, 3),
+                 'batch_wer': round(sum(e for e, _ in errors) / words, 4) if words else None}
+    rss_after = peak_rss_mb()
+    registry.unload()
+    summary = summarize(model_size, results, load_s, device, threads, rss_before, rss_after)
+    summary.update(backend=backend, compute_type=compute_type, **batch)
+    return {'summary': summary, 'clips': results}
+
+
+def summarize(model_size, results, load_s, device, threads, rss_before, rss_after):
+    ok = [r for r in results if 'error' not in r]
+    rtfs = [r['rtf'] for r in ok]
+    audio_s = sum(r['duration_s'] for r in ok)
+    transcribe_s = sum(r['seconds'] for r in ok)
+    words = sum(r['words'] for r in ok)
+    return {
+        'model': model_size,
+        'device': device,
+        'threads': threads,
+        'clips': len(ok),
+        'audio_s': round(audio_s, 2),
+        'load_s': round(load_s, 3),
+        'transcribe_s': round(transcribe_s, 3),
+        'rtf': round(transcribe_s / audio_s, 4) if audio_s else None,
+        'p50_rtf': percentile(rtfs, 50) if rtfs else None,
+        'p95_rtf': percentile(rtfs, 95) if rtfs else None,
+        'max_rtf': max(rtfs) if rtfs else None,
+        'wer': round(sum(r['errors'] for r in ok) / words, 4) if words else None,
+        'clips_per_s': round(len(ok) / transcribe_s, 3) if transcribe_s else None,
+        'peak_rss_mb': round(rss_after, 1) if rss_after is not None else None,
+        'model_rss_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+        'errors': len(results) - len(ok),
+    }
+
+
+def _benchmark_isolated(model_size, clips, language, device, threads, backend, compute_type, clip_batch):
+    # Runs in a fresh process so peak RSS and load time are not inflated by earlier models
+    return benchmark_model(model_size, clips, language, device, threads, backend=backend, compute_type=compute_type,
+                           clip_batch=clip_batch)
+
+
+def run_benchmark(model_sizes, clips, language='en', device='cpu', threads=None, isolate=True, slo_rtf=1.0,
+                  loader=None, engines=None, clip_batch=0):
+    """
+    Benchmark each model size with each engine on the same decoded clips.
+    Args:
+        model_sizes (list): Whisper model sizes to compare
+        clips (list): Output of load_clips()
+        language (str, optional): Language code or None for auto-detect
+        device (str): Torch device to run on
+        threads (int, optional): torch intra-op / CTranslate2 threads (default: the engine's own choice)
+        isolate (bool): Run each model in its own spawned process (accurate peak RSS)
+        slo_rtf (float): A model meets the latency SLO when its p95 RTF is at or below this
+        loader (callable, optional): Model loader overriding the backend's (only used when isolate is False)
+        engines (list, optional): (backend, compute_type) pairs (default: openai-whisper only)
+        clip_batch (int): Also time batched multi-clip decoding with this batch size (0 = off)
+    Returns:
+        dict: {'config', 'models': summaries, 'clips': per-clip results}
+    """
+    report = {'config': {'language': language, 'device': device, 'threads': threads, 'slo_rtf': slo_rtf,
+                         'clips': len(clips), 'audio_s': round(sum(c['duration_s'] for c in clips), 2)},
+              'models': [], 'clips': []}
+    ctx = multiprocessing.get_context('spawn')
+    for backend, compute_type in engines or [(DEFAULT_BACKEND, None)]:
+        for model_size in model_sizes:
+            print(f"Benchmarking '{model_size}' ({backend}, {compute_type or 'default'}) on {len(clips)} clip(s)...")
+            if isolate:
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(_benchmark_isolated,
+                                        (model_size, clips, language, device, threads, backend, compute_type,
+                                         clip_batch))
+            else:
+                result = benchmark_model(model_size, clips, language, device, threads, loader=loader,
+                                         backend=backend, compute_type=compute_type, clip_batch=clip_batch)
+            summary = result['summary']
+            summary['meets_slo'] = summary['p95_rtf'] is not None and summary['p95_rtf'] <= slo_rtf
+            report['models'].append(summary)
+            report['clips'].extend(result['clips'])
+    return report
+
+
+def recommend(report, max_wer):
+    """Return the fastest (lowest RTF) summary that meets the SLO with WER at or below max_wer, or None."""
+    usable = [m for m in report['models'] if m['meets_slo'] and m['wer'] is not None and m['wer'] <= max_wer]
+    return min(usable, key=lambda m: m['rtf'], default=None)
+
+
+def _engine_key(summary):
+    # Reports written before backends existed only benchmarked openai-whisper in float32
+    return (summary['model'], summary.get('backend', DEFAULT_BACKEND), summary.get('compute_type', 'float32'))
+
+
+def compare_to_baseline(report, baseline, rtf_tolerance=RTF_TOLERANCE, wer_tolerance=WER_TOLERANCE):
+    """
+    Compare each model/engine against the same model/engine in a baseline report.
+    Returns:
+        list: {'model', 'backend', 'compute_type', 'field', 'baseline', 'current', 'change', 'regression'} for every shared metric
+    """
+    previous = {_engine_key(m): m for m in baseline.get('models', [])}
+    rows = []
+    for summary in report['models']:
+        model, backend, compute_type = _engine_key(summary)
+        old = previous.get((model, backend, compute_type))
+        if old is None:
+            continue
+        for field in ('load_s', 'rtf', 'p95_rtf', 'wer', 'peak_rss_mb'):
+            if summary.get(field) is None or old.get(field) is None:
+                continue
+            change = summary[field] - old[field]
+            if field in ('rtf', 'p95_rtf'):
+                regression = summary[field] > old[field] * (1 + rtf_tolerance)
+            elif field == 'wer':
+                regression = change > wer_tolerance
+            else:
+                regression = False  # Load time and memory are reported, not gated
+            rows.append({'model': model, 'backend': backend, 'compute_type': compute_type, 'field': field, 'baseline': old[field],
+                         'current': summary[field], 'change': round(change, 4), 'regression': regression})
+    return rows
+
+
+def write_results(report, output_prefix):
+    """Write <prefix>.json (everything) and <prefix>.csv (one row per model)."""
+    out_dir = os.path.dirname(output_prefix)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output_prefix + '.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(output_prefix + '.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(report['models'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Whisper model sizes and ASR engines: load time, RTF, WER "
+                                                 "and peak memory.")
+    parser.add_argument('--cases', default=DEFAULT_CASES, help="JSON list of {audio_path, expected_transcript}")
+    parser.add_argument('--models', nargs='+', default=MODEL_SIZES, help="Model sizes to compare (default: all)")
+    parser.add_argument('--engines', nargs='+', default=DEFAULT_ENGINES,
+                        help="backend[:compute_type] to compare (default: whisper faster-whisper:int8 "
+                             "faster-whisper:int8_float32); engines that are not installed are skipped")
+    parser.add_argument('--language', default='en', help="Force language (default: en)")
+    parser.add_argument('--device', default='cpu', help="Torch device (default: cpu)")
+    parser.add_argument('--threads', type=int, default=None, help="torch / CTranslate2 threads (default: the engine's choice)")
+    parser.add_argument('--slo-rtf', type=float, default=1.0,
+                        help="Latency SLO as a p95 real-time factor (default: 1.0, i.e. real time)")
+    parser.add_argument('--max-wer', type=float, default=0.15,
+                        help="Accuracy bar for the recommended engine (default: 0.15)")
+    parser.add_argument('--output', default='RNLI_LLM/output/whisper_benchmark',
+                        help="Results prefix; writes <prefix>.json and <prefix>.csv")
+    parser.add_argument('--clip-batch', type=int, default=0,
+                        help="Also decode all clips together in padded mel batches of this size and report "
+                             "clips/s and WER against one-at-a-time transcription (openai-whisper only)")
+    parser.add_argument('--baseline', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--no-isolate', action='store_true', help="Run every model in this process (faster, "
+                        "but peak RSS then includes earlier models)")
+    args = parser.parse_args(argv)
+
+    try:
+        engines = [parse_engine(spec) for spec in args.engines]
+    except ValueError as e:
+        parser.error(str(e))
+    for backend in sorted({backend for backend, _ in engines}):
+        if not backend_available(backend):
+            print(f"Skipping '{backend}': {BACKENDS[backend]['missing']}")
+    engines = [engine for engine in engines if backend_available(engine[0])]
+    if not engines:
+        print("No ASR engine installed.")
+        sys.exit(1)
+    clips = load_clips(args.cases)
+    if not clips:
+        print("No usable clips found.")
+        sys.exit(1)
+    report = run_benchmark(args.models, clips, language=args.language, device=args.device, threads=args.threads,
+                           isolate=not args.no_isolate, slo_rtf=args.slo_rtf, engines=engines,
+                           clip_batch=args.clip_batch)
+    best = recommend(report, args.max_wer)
+    report['recommended'] = {k: best[k] for k in ('model', 'backend', 'compute_type')} if best else None
+    write_results(report, args.output)
+
+    print(f"\n{'model':<8} {'engine':<27} {'load s':>7} {'RTF':>6} {'p95 RTF':>8} {'WER':>6} {'peak MB':>8}  SLO")
+    for m in report['models']:
+        def fmt(value, spec):
+            return format(value, spec) if value is not None else '-'
+        engine = f"{m['backend']}:{m['compute_type']}"
+        print(f"{m['model']:<8} {engine:<27} {fmt(m['load_s'], '7.2f')} {fmt(m['rtf'], '6.3f')} "
+              f"{fmt(m['p95_rtf'], '8.3f')} {fmt(m['wer'], '6.3f')} {fmt(m['peak_rss_mb'], '8.0f')}  "
+              f"{'yes' if m['meets_slo'] else 'no'}")
+        if m.get('batch_clips_per_s'):
+            print(f"{'':<8} batched x{args.clip_batch}: {m['batch_clips_per_s']} clips/s "
+                  f"(one at a time: {m['clips_per_s']}), WER {fmt(m['batch_wer'], '.3f')}")
+    if best:
+        print(f"Fastest within the SLO and WER <= {args.max_wer}: {best['model']} on {best['backend']} "
+              f"({best['compute_type']}), RTF {best['rtf']}")
+    else:
+        print(f"No model/engine meets the SLO with WER <= {args.max_wer}.")
+    print(f"Results written to {args.output}.json and {args.output}.csv")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            rows = compare_to_baseline(report, json.load(f))
+        print(f"\nChanges against {args.baseline}:")
+        for row in rows:
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f"  {row['model']:<8} {row['backend'] + ':' + row['compute_type']:<27} {row['field']:<12} {row['baseline']} -> {row['current']} "
+                  f"({row['change']:+}){flag}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
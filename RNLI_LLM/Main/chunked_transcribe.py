@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+import re  # For normalising words at window seams
+
+import numpy as np
+
+import tracing
+from audio_io import SAMPLE_RATE
+
+# Whisper's fixed front-end geometry: 30 s windows, 10 ms hop, 25 ms FFT
+N_FFT = 400
+HOP_LENGTH = 160
+CHUNK_SECONDS = 30
+N_SAMPLES = CHUNK_SECONDS * SAMPLE_RATE
+N_FRAMES = N_SAMPLES // HOP_LENGTH
+
+
+def split_windows(audio, overlap_seconds=2.0):
+    """
+    Split audio into 30 s windows that overlap by overlap_seconds, so words cut
+    at a window edge are heard whole in the next window. Audio of 30 s or less
+    is returned as a single, unpadded window.
+    """
+    if len(audio) <= N_SAMPLES:
+        return [audio]
+    step = N_SAMPLES - int(overlap_seconds * SAMPLE_RATE)
+    if step <= 0:
+        raise ValueError("overlap_seconds must be shorter than the 30 s window")
+    windows = []
+    start = 0
+    while True:
+        windows.append(audio[start:start + N_SAMPLES])
+        if start + N_SAMPLES >= len(audio):
+            break
+        start += step
+    return windows
+
+
+def batch_log_mel(windows, n_mels, device='cpu'):
+    """
+    Compute Whisper log-mel spectrograms for a batch of windows in one STFT.
+    Matches whisper.log_mel_spectrogram per window (each window is clamped to
+    8 dB below its own peak), but the STFT only runs over the real samples:
+    missing frames up to Whisper's fixed 3000 are filled with the value that
+    zero padding would have produced, so short clips skip the padding cost.
+    Windows shorter than one FFT frame are zero-padded to it, since the centred
+    STFT cannot reflect-pad them.
+    Returns a (batch, n_mels, 3000) tensor.
+    """
+    import torch
+    from whisper.audio import mel_filters
+
+    longest = max(N_FFT, max(len(w) for w in windows))
+    batch = np.zeros((len(windows), longest), dtype=np.float32)
+    for i, w in enumerate(windows):
+        batch[i, :len(w)] = w
+    audio = torch.from_numpy(batch).to(device)
+
+    window = torch.hann_window(N_FFT, device=audio.device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel_spec = mel_filters(audio.device, n_mels) @ magnitudes
+
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    floor = log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0
+    log_spec = torch.maximum(log_spec, floor)
+    log_spec = (log_spec + 4.0) / 4.0
+
+    frames = log_spec.shape[-1]
+    if frames < N_FRAMES:
+        # Zero audio is clamped to -10 before the floor applies, so padding is the larger of
+        # the two (quiet windows have a floor below -10)
+        pad = ((torch.clamp(floor, min=-10.0) + 4.0) / 4.0).expand(-1, n_mels, N_FRAMES - frames)
+        log_spec = torch.cat([log_spec, pad], dim=-1)
+    return log_spec[..., :N_FRAMES]
+
+
+def window_log_mel(audio, n_mels, overlap_seconds=2.0, batch_size=8):
+    """
+    Log-mel spectrograms of every 30 s window of audio (see split_windows), as a
+    (windows, n_mels, 3000) float32 array, e.g. for storing in the feature store.
+    """
+    windows = split_windows(audio, overlap_seconds)
+    return np.concatenate([batch_log_mel(windows[b:b + batch_size], n_mels).cpu().numpy()
+                           for b in range(0, len(windows), batch_size)])
+
+
+def _norm(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def seam_overlap(prev_words, next_words, max_words=20, min_ratio=0.8):
+    """
+    Return how many leading words of next_words repeat the tail of prev_words.
+    Compares normalised words (case and punctuation ignored) and accepts the
+    longest overlap where at least min_ratio of the words agree; single-word
+    overlaps must match exactly.
+    """
+    prev_norm = [_norm(w) for w in prev_words[-max_words:]]
+    next_norm = [_norm(w) for w in next_words[:max_words]]
+    for k in range(min(len(prev_norm), len(next_norm)), 0, -1):
+        matches = sum(a == b for a, b in zip(prev_norm[-k:], next_norm[:k]))
+        if (k == 1 and matches == 1) or (k > 1 and matches / k >= min_ratio):
+            return k
+    return 0
+
+
+def merge_window_texts(texts, max_words=20):
+    """Join per-window transcripts, dropping the words repeated across each seam."""
+    words = []
+    for text in texts:
+        new_words = text.split()
+        words.extend(new_words[seam_overlap(words, new_words, max_words):])
+    return ' '.join(words)
+
+
+def transcribe_chunked(model, audio, language=None, overlap_seconds=2.0, batch_size=8, fp16=False, mel=None):
+    """
+    Transcribe audio of any length with a Whisper model by decoding overlapping
+    30 s windows in batches and de-duplicating text at the seams.
+    Args:
+        model: A loaded openai-whisper model
+        audio (np.ndarray): 16kHz mono float32 samples (unused when mel is given)
+        language (str, optional): Language code, or None to detect it from the first window
+        overlap_seconds (float): Overlap between consecutive windows
+        batch_size (int): Windows encoded and decoded together
+        fp16 (bool): Decode in half precision (GPU only)
+        mel (np.ndarray, optional): Precomputed window_log_mel(audio, ...) output,
+            e.g. memory-mapped from the feature store; skips the STFT
+    Returns:
+        tuple: (transcript text, language)
+    """
+    import torch
+    import whisper
+
+    windows = split_windows(audio, overlap_seconds) if mel is None else mel
+    n_mels = model.dims.n_mels
+    texts = []
+    for b in range(0, len(windows), batch_size):
+        if mel is None:
+            with tracing.span('mel', windows=len(windows[b:b + batch_size])):
+                batch = batch_log_mel(windows[b:b + batch_size], n_mels, model.device)
+        else:
+            # Copy the batch out of the (read-only) mapping onto the model's device
+            batch = torch.from_numpy(np.array(mel[b:b + batch_size])).to(model.device)
+        if language is None:
+            _, probs = model.detect_language(batch[0])
+            language = max(probs, key=probs.get)
+            print(f"Detected language: {language}")
+        options = whisper.DecodingOptions(language=language, fp16=fp16, without_timestamps=True)
+        with tracing.span('whisper_decode', windows=batch.shape[0]):
+            texts.extend(result.text.strip() for result in whisper.decode(model, batch, options))
+    return merge_window_texts(texts), language
+
+
+def plan_clip_batches(clips, batch_size=8, overlap_seconds=2.0):
+    """
+    Split clips into 30 s windows and group the windows of all clips into
+    batches of similar length (longest first), so each padded mel batch wastes
+    little STFT and decoder work. Empty clips get no windows.
+    Returns:
+        list: Batches of (clip index, window index, samples) tuples
+    """
+    windows = []
+    for c, audio in enumerate(clips):
+        if len(audio) == 0:
+            continue
+        for w, samples in enumerate(split_windows(audio, overlap_seconds)):
+            if len(samples) < N_FFT:
+                samples = np.pad(samples, (0, N_FFT - len(samples)))  # The STFT needs one full frame
+            windows.append((c, w, samples))
+    windows.sort(key=lambda window: len(window[2]), reverse=True)
+    return [windows[b:b + batch_size] for b in range(0, len(windows), batch_size)]
+
+
+def assemble_clip_results(clips, decoded, language=None, overlap_seconds=2.0):
+    """
+    Put decoded windows back together per clip.
+    Args:
+        clips (list): The clips given to plan_clip_batches
+        decoded (dict): (clip index, window index) -> (text, language)
+        language (str, optional): Language reported for clips with no windows
+    Returns:
+        list: One {'text', 'segments', 'language'} per clip; each window is one segment
+    """
+    step = N_SAMPLES - int(overlap_seconds * SAMPLE_RATE)
+    outputs = []
+    for c, audio in enumerate(clips):
+        parts = []
+        while (c, len(parts)) in decoded:
+            parts.append(decoded[(c, len(parts))])
+        segments = []
+        for w, (text, _) in enumerate(parts):
+            start = w * step / SAMPLE_RATE
+            end = min(start + CHUNK_SECONDS, len(audio) / SAMPLE_RATE)
+            segments.append({'id': w, 'start': round(start, 2), 'end': round(end, 2), 'text': text})
+        outputs.append({'text': merge_window_texts([text for text, _ in parts]), 'segments': segments,
+                        'language': parts[0][1] if parts else language})
+    return outputs
+
+
+def transcribe_clips(model, clips, language=None, batch_size=8, overlap_seconds=2.0, fp16=False):
+    """
+    Transcribe many clips with shared encoder/decoder passes instead of one
+    model.transcribe call per clip. The windows of all clips (a short call is a
+    single window) are batched by length, turned into one padded log-mel batch
+    each and decoded together; text is then merged back per clip.
+    Like transcribe_chunked, this decodes once at temperature 0 without timestamps,
+    so there is no temperature fallback and each window becomes one segment.
+    Args:
+        model: A loaded openai-whisper model
+        clips (list): 16kHz mono float32 arrays
+        language (str, optional): Language code, or None to detect it per window
+        batch_size (int): Windows encoded and decoded together
+        overlap_seconds (float): Overlap between consecutive windows of a long clip
+        fp16 (bool): Decode in half precision (GPU only)
+    Returns:
+        list: One {'text', 'segments', 'language'} per clip, in input order
+    """
+    import whisper
+
+    decoded = {}
+    options = whisper.DecodingOptions(language=language, fp16=fp16, without_timestamps=True)
+    for batch in plan_clip_batches(clips, batch_size, overlap_seconds):
+        with tracing.span('mel', windows=len(batch)):
+            mel = batch_log_mel([samples for _, _, samples in batch], model.dims.n_mels, model.device)
+        with tracing.span('whisper_decode', windows=len(batch)):
+            results = whisper.decode(model, mel, options)
+        for (c, w, _), result in zip(batch, results):
+            decoded[(c, w)] = (result.text.strip(), result.language)
+    return assemble_clip_results(clips, decoded, language, overlap_seconds)
@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import http.client  # For the client (works over TCP and Unix sockets)
+import json  # For the job API bodies
+import os  # For file path operations
+import queue  # For the bounded job queue
+import socket  # For the Unix-socket server and client
+import socketserver  # For the Unix-socket server
+import sys  # For exiting on error
+import tempfile  # For uploaded audio
+import threading  # For the worker threads
+import time  # For job timings and uptime
+import uuid  # For job ids
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# The audio stack (numpy, whisper, torch) is imported by the server on first use, so the client stays thin
+from LLM import get_client
+from model_registry import get_registry
+from profiling import release_thread
+import tracing
+import transcript_cache
+from triage import triage
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 1  # Jobs processed at once (they share the warm models)
+DEFAULT_QUEUE = 16  # Jobs waiting beyond that; further submissions get 503
+MAX_UPLOAD_MB = 200
+KEEP_FINISHED = 1000  # Finished jobs kept for GET /jobs/<id>
+
+_TRUE = {'1', 'true', 'yes', 'on'}
+
+
+class JobError(Exception):
+    """Raised for a job request the daemon cannot accept (HTTP 400)."""
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at its limit (HTTP 503)."""
+
+
+class DaemonJob:
+    """One submitted job: its settings, audio, state and (once finished) its output."""
+
+    def __init__(self, settings, audio_path, upload=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.settings = settings
+        self.audio_path = audio_path
+        self.upload = upload  # audio_path is a temp file owned by the job
+        self.status = 'queued'
+        self.output = None
+        self.error = None
+        self.submitted = time.time()
+        self.done = threading.Event()
+
+    def to_dict(self):
+        record = {'id': self.id, 'status': self.status}
+        if self.output is not None:
+            record['output'] = self.output
+        if self.error is not None:
+            record['error'] = self.error
+        return record
+
+
+class InferenceDaemon:
+    """
+    Keeps Whisper model(s) and the LLM HTTP session warm and runs submitted jobs
+    through the same steps as main.py (transcribe -> triage -> extract), so a
+    job's latency is inference only. Jobs wait in a bounded queue and at most
+    `workers` run at once.
+    Args:
+        model_size (str): Default Whisper model for jobs that do not name one
+        language (str, optional): Default language (None = auto-detect)
+        workers (int): Jobs processed concurrently
+        queue_size (int): Jobs allowed to wait; more are refused
+        warm_models (list, optional): Models to load at start (default: [model_size])
+        registry (ModelRegistry, optional): Model registry (default: the process-wide one)
+        client (MistralClient, optional): LLM client (default: the shared one)
+        cache (TranscriptCache, optional): Transcript cache (default: the process-wide one)
+    """
+
+    def __init__(self, model_size='base', language='en', workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE,
+                 warm_models=None, registry=None, client=None, cache=None):
+        self.defaults = {'model': model_size, 'language': language, 'vad': False, 'use_cache': True,
+                         'use_llm_cache': True, 'fast_path': True, 'triage': True, 'triage_llm': False}
+        self.workers = max(1, int(workers))
+        self.registry = registry or get_registry()
+        self.client = client
+        self.cache = cache
+        self.warm_models = warm_models or [model_size]
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.started = time.time()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Load the models, open the LLM session and start the workers."""
+        self.registry.warm_up(self.warm_models)
+        self.client = self.client or get_client()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'daemon-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def job_settings(self, overrides):
+        """Merge a job's options over the daemon defaults, rejecting unknown ones."""
+        unknown = set(overrides) - set(self.defaults) - {'audio_path'}
+        if unknown:
+            raise JobError(f"Unknown job option(s): {', '.join(sorted(unknown))}")
+        settings = dict(self.defaults)
+        for name, value in overrides.items():
+            if name in settings and isinstance(settings[name], bool) and isinstance(value, str):
+                value = value.lower() in _TRUE
+            settings[name] = value
+        return settings
+
+    def submit(self, overrides, audio_path=None, audio_bytes=None, suffix='.wav'):
+        """
+        Queue a job for an audio file on this machine or uploaded audio bytes.
+        Raises JobError for a bad request and QueueFull when the queue is at its limit.
+        """
+        settings = self.job_settings(overrides)
+        upload = audio_bytes is not None
+        if upload:
+            fd, audio_path = tempfile.mkstemp(prefix='rnli_job_', suffix=suffix)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_bytes)
+        elif not audio_path or not os.path.isfile(audio_path):
+            raise JobError(f"Audio file not found: {audio_path}")
+        job = DaemonJob(settings, audio_path, upload=upload)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > KEEP_FINISHED + self._queue.maxsize + self.workers:
+                oldest = next(iter(self._jobs))
+                if not self._jobs[oldest].done.is_set():
+                    break
+                del self._jobs[oldest]
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            if upload:
+                os.remove(audio_path)
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} waiting)")
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def health(self):
+        with self._lock:
+            return {
+                'status': 'ok',
+                'uptime_s': round(time.time() - self.started, 1),
+                'models': [key[0] for key, _, _ in self.registry.loaded()],
+                'workers': self.workers,
+                'queued': self._queue.qsize(),
+                'queue_limit': self._queue.maxsize,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+            }
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            release_thread()
+            if job is None:
+                return
+            with self._lock:
+                self.running += 1
+            job.status = 'running'
+            try:
+                with tracing.span('daemon_job', job=job.id, model=job.settings['model']):
+                    job.output = self.process(job)
+                job.status = 'done'
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = 'failed'
+            finally:
+                if job.upload:
+                    try:
+                        os.remove(job.audio_path)
+                    except OSError:
+                        pass
+                with self._lock:
+                    self.running -= 1
+                    self.completed += job.status == 'done'
+                    self.failed += job.status == 'failed'
+                job.done.set()
+                tracing.flush()
+
+    def process(self, job):
+        """Transcribe, triage and extract one job; returns the JSON main.py writes."""
+        from audio_io import load_audio
+        from vad import transcribe_speech_only
+        settings = job.settings
+        model_size, language = settings['model'], settings['language']
+        timings = {'queue': time.time() - job.submitted}
+        options = {'task': 'transcribe'}
+        if settings['vad']:
+            options['vad'] = True
+
+        def run_whisper():
+            audio = load_audio(job.audio_path)
+            with self.registry.use(model_size) as model:
+                if settings['vad']:
+                    return transcribe_speech_only(model, audio, language=language, verbose=None, task='transcribe')
+                return model.transcribe(audio, language=language, verbose=None, task='transcribe')
+
+        start = time.perf_counter()
+        result = transcript_cache.cached_transcribe(job.audio_path, model_size, language, options, run_whisper,
+                                                    use_cache=settings['use_cache'], cache=self.cache)
+        transcript = result['text'].strip()
+        timings['transcribe'] = time.perf_counter() - start
+
+        triage_result = None
+        if settings['triage']:
+            start = time.perf_counter()
+            with tracing.span('triage') as span:
+                triage_result = triage(transcript, use_llm=settings['triage_llm'], client=self.client,
+                                       use_cache=settings['use_llm_cache'])
+                span.set(decision=triage_result['decision'], method=triage_result['method'])
+            timings['triage'] = time.perf_counter() - start
+
+        llm_result = None
+        if triage_result is None or triage_result['extract']:
+            start = time.perf_counter()
+            with tracing.span('extract'):
+                llm_result = self.client.extract(transcript, use_cache=settings['use_llm_cache'],
+                                                 fast_path=settings['fast_path'])
+            timings['extract'] = time.perf_counter() - start
+        return {
+            "transcript": transcript,
+            "triage": triage_result,
+            "llm_result": llm_result,
+            "timings": {name: round(t, 3) for name, t in timings.items()},
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    GET  /health       daemon status, loaded models and queue depth
+    POST /jobs         JSON {"audio_path": ..., "model": ..., "language": ..., ...}, or raw audio bytes
+                       with the options in the query string; waits for the result unless ?wait=0
+    GET  /jobs/<id>    status (and output once finished) of a job
+    """
+
+    protocol_version = 'HTTP/1.1'
+    daemon = None  # Set on the subclass built by make_server()
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            sys.stderr.write(f"[daemon] {format % args}\n")
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip('/')
+        if path == '/health':
+            self._reply(200, self.daemon.health())
+        elif path.startswith('/jobs/'):
+            job = self.daemon.get_job(path[len('/jobs/'):])
+            if job is None:
+                self._reply(404, {'error': 'Unknown job'})
+            else:
+                self._reply(200, job.to_dict())
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            self._reply(404, {'error': 'Not found'})
+            return
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        wait = params.pop('wait', '1').lower() in _TRUE
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_UPLOAD_MB * 1024 * 1024:
+            self._reply(413, {'error': f"Upload larger than {MAX_UPLOAD_MB} MB"})
+            return
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                options = json.loads(body or b'{}')
+                if not isinstance(options, dict):
+                    raise JobError("JSON body must be an object of job options")
+                params.update(options)
+                job = self.daemon.submit(params, audio_path=params.pop('audio_path', None))
+            else:
+                suffix = params.pop('suffix', '.wav')
+                job = self.daemon.submit(params, audio_bytes=body, suffix=suffix)
+        except (JobError, ValueError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except QueueFull as e:
+            self._reply(503, {'error': str(e)}, headers={'Retry-After': '1'})
+            return
+        if not wait:
+            self._reply(202, job.to_dict(), headers={'Location': f'/jobs/{job.id}'})
+            return
+        job.done.wait()
+        self._reply(200 if job.status == 'done' else 500, job.to_dict())
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """HTTP over a Unix domain socket (no TCP port; access follows file permissions)."""
+
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)  # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def make_server(daemon, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, verbose=False):
+    """Build (not start) the HTTP server for a daemon, on host:port or a Unix socket path."""
+    handler = type('Handler', (_Handler,), {'daemon': daemon, 'verbose': verbose})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return _UnixHTTPServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def request(method, path, url=None, unix_socket=None, body=None, headers=None, timeout=600):
+    """Send one request to a daemon and return (HTTP status, decoded JSON body)."""
+    if unix_socket:
+        conn = _UnixHTTPConnection(unix_socket, timeout)
+    else:
+        parsed = urlparse(url or f'http://{DEFAULT_HOST}:{DEFAULT_PORT}')
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(description="Run the warm inference daemon.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument('--socket', default=None, help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument('--model', default='base', help="Default Whisper model for jobs (default: base)")
+    parser.add_argument('--warm', nargs='+', default=None, help="Models to load at start (default: --model)")
+    parser.add_argument('--language', default='en', help="Default language (default: en)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Jobs processed at once (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE,
+                        help=f"Jobs allowed to wait before new ones are refused (default: {DEFAULT_QUEUE})")
+    parser.add_argument('--verbose', action='store_true', help="Log every HTTP request")
+    args = parser.parse_args(argv)
+
+    daemon = InferenceDaemon(model_size=args.model, language=args.language, workers=args.workers,
+                             queue_size=args.queue_size, warm_models=args.warm)
+    daemon.start()
+    server = make_server(daemon, args.host, args.port, unix_socket=args.socket, verbose=args.verbose)
+    where = args.socket or f'http://{args.host}:{server.server_port}'
+    print(f"Daemon ready on {where} (models: {', '.join(daemon.warm_models)}, workers: {daemon.workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        daemon.stop()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+        tracing.flush()
+
+
+def client_main(argv):
+    parser = argparse.ArgumentParser(description="Submit audio to a running daemon, or check its health.")
+    parser.add_argument('input_audio', nargs='?', help="Audio file to analyze (omit with --health)")
+    parser.add_argument('output_json', nargs='?', help="Where to write the result (default: print it)")
+    parser.add_argument('--url', default=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}', help="Daemon URL")
+    parser.add_argument('--socket', default=None, help="Daemon Unix socket path (instead of --url)")
+    parser.add_argument('--upload', action='store_true',
+                        help="Send the audio bytes instead of the path (daemon on another machine or container)")
+    parser.add_argument('--model', default=None, help="Whisper model (default: the daemon's)")
+    parser.add_argument('--language', default=None, help="Language (default: the daemon's)")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and squelch before transcribing")
+    parser.add_argument('--no-triage', action='store_true', help="Run full extraction even on non-distress calls")
+    parser.add_argument('--health', action='store_true', help="Print the daemon's health and exit")
+    args = parser.parse_args(argv)
+
+    target = {'url': args.url, 'unix_socket': args.socket}
+    try:
+        if args.health:
+            status, body = request('GET', '/health', **target)
+            print(json.dumps(body, indent=2))
+            sys.exit(0 if status == 200 else 1)
+        if not args.input_audio:
+            parser.error("input_audio is required unless --health is given")
+        options = {name: value for name, value in (('model', args.model), ('language', args.language)) if value}
+        if args.vad:
+            options['vad'] = True
+        if args.no_triage:
+            options['triage'] = False
+        start = time.time()
+        if args.upload:
+            with open(args.input_audio, 'rb') as f:
+                data = f.read()
+            options['suffix'] = os.path.splitext(args.input_audio)[1] or '.wav'
+            query = '&'.join(f'{k}={v}' for k, v in options.items())
+            status, body = request('POST', f'/jobs?{query}', body=data,
+                                   headers={'Content-Type': 'application/octet-stream'}, **target)
+        else:
+            options['audio_path'] = os.path.abspath(args.input_audio)
+            status, body = request('POST', '/jobs', body=json.dumps(options).encode('utf-8'),
+                                   headers={'Content-Type': 'application/json'}, **target)
+    except OSError as e:
+        print(f"Could not reach the daemon at {args.socket or args.url}: {e}")
+        sys.exit(1)
+    if status != 200:
+        print(f"Job failed ({status}): {body.get('error')}")
+        sys.exit(1)
+    output = body['output']
+    if args.output_json:
+        with open(args.output_json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"Output saved to {args.output_json}")
+    else:
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+    print(f"\n[Timer] Job {body['id']} took {time.time() - start:.2f} seconds.")
+
+
+def main():
+    """'serve' starts the daemon; anything else is passed to the client."""
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+    else:
+        client_main(sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()
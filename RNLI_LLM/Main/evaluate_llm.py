@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import hashlib  # For the per-case change detection key
+import json  # For the test cases and the results state
+import os  # For file path operations
+import re  # For value normalization
+import sys  # For exiting on failures
+import tempfile  # For atomic state writes
+import threading  # For saving state from worker threads
+import time  # For per-case latency
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fast_extract
+from LLM import FIELD_LINES, LLMError, MistralClient, STRUCTURED_OUTPUT
+from benchmark_whisper import percentile
+
+DEFAULT_CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Unit-Tests', 'llm_testcases',
+                             'test1.json')
+DEFAULT_STATE = 'RNLI_LLM/output/llm_eval_state.json'
+STATE_VERSION = 1  # Bump when scoring changes so stored results are re-scored
+
+# Fields compared by the number they contain ("3 crew" == "Three")
+NUMBER_FIELDS = ('number_of_people', 'injuries')
+
+# Answers that mean "nothing"/"nobody" and answers that mean "not known" (same sets as LLM_test.py)
+_NONE_VALUES = frozenset({'', 'none', 'no', 'n/a', 'na', 'not known', 'notknown', 'not specified', 'not stated', '0'})
+_UNKNOWN_VALUES = frozenset({'unknown', 'unk', 'notstated'})
+
+_UNITS = {w: n for n, w in enumerate('zero one two three four five six seven eight nine ten eleven twelve thirteen '
+                                     'fourteen fifteen sixteen seventeen eighteen nineteen'.split())}
+_TENS = {w: n * 10 for n, w in enumerate('twenty thirty forty fifty sixty seventy eighty ninety'.split(), 2)}
+_SCALES = {'hundred': 100, 'thousand': 1000}
+_PUNCTUATION = re.compile(r'[^a-z0-9 ]')
+_SPACES = re.compile(r'\s+')
+
+
+def _words_to_number(words):
+    """'forty one' -> 41; None unless every word is a number word."""
+    if not words or not all(w in _UNITS or w in _TENS or w in _SCALES or w == 'and' for w in words):
+        return None
+    total = current = 0
+    for word in words:
+        if word in _UNITS:
+            current += _UNITS[word]
+        elif word in _TENS:
+            current += _TENS[word]
+        elif word in _SCALES:
+            current = max(current, 1) * _SCALES[word]
+            if word == 'thousand':
+                total, current = total + current, 0
+    return total + current
+
+
+@lru_cache(maxsize=8192)
+def normalize(value):
+    """
+    Canonical form of a field value for comparison: lowercase, no punctuation,
+    "none"-like answers as '0', "unknown"-like answers as 'unknown', and values
+    that are entirely a number (digits or words) as digits.
+    """
+    val = (value or '').strip().lower()
+    if val in _NONE_VALUES:
+        return '0'
+    val = _SPACES.sub(' ', _PUNCTUATION.sub('', val.replace('-', ' '))).strip()
+    if val in _NONE_VALUES:
+        return '0'
+    if val in _UNKNOWN_VALUES:
+        return 'unknown'
+    if val.isdigit():
+        return str(int(val))
+    number = _words_to_number(val.split())
+    return str(number) if number is not None else val
+
+
+@lru_cache(maxsize=8192)
+def leading_number(value):
+    """The first number in a normalized value ('3 crew' -> '3', 'two injured' -> '2'), else the value itself."""
+    words = value.split()
+    for i, word in enumerate(words):
+        if word.isdigit():
+            return str(int(word))
+        run = []
+        for w in words[i:]:
+            if _words_to_number([w]) is None:
+                break
+            run.append(w)
+        if run:
+            return str(_words_to_number(run))
+    return value
+
+
+def field_matches(field, actual, expected):
+    """Whether an extracted value counts as correct (also usable as fast_extract.corpus_report's compare)."""
+    actual, expected = normalize(actual), normalize(expected)
+    if actual == expected:
+        return True
+    return field in NUMBER_FIELDS and leading_number(actual) == leading_number(expected)
+
+
+def load_cases(path=DEFAULT_CASES):
+    """Load {name: {transcript, expected}} cases (a JSON list is keyed by position)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    if isinstance(cases, list):
+        cases = {str(i + 1): case for i, case in enumerate(cases)}
+    return cases
+
+
+@lru_cache(maxsize=1)
+def rules_version():
+    """Hash of fast_extract.py, so any change to the rules re-runs the fast-path cases."""
+    with open(fast_extract.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def case_key(client, case, fast_path):
+    """
+    Hash of everything that decides a case's result: transcript, expected values
+    and the extraction request actually sent (prompt, model, sampling, schema).
+    With the fast path that is the request for the fields the rules left open,
+    plus the rule fields themselves and the version of the rules.
+    """
+    payload = {'version': STATE_VERSION, 'transcript': case['transcript'], 'expected': case['expected'],
+               'fast_path': fast_path}
+    if fast_path:
+        confident, missing = fast_extract.split_confident(fast_extract.extract_fields(case['transcript']))
+        payload.update(rules=rules_version(), rule_fields=confident,
+                       request=client.build_extraction(case['transcript'], missing)[0] if missing else None)
+    else:
+        payload['request'] = client.build_extraction(case['transcript'])[0]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def evaluate_case(client, case, key, fast_path=True, use_cache=False):
+    """Run one case against the LLM and score every expected field."""
+    record = {'key': key}
+    start = time.perf_counter()
+    try:
+        result = client.extract(case['transcript'], use_cache=use_cache, fast_path=fast_path)
+    except LLMError as e:
+        record.update(error=f"{type(e).__name__}: {e}", latency_s=round(time.perf_counter() - start, 3))
+        return record
+    record['latency_s'] = round(time.perf_counter() - start, 3)
+    record['fields'] = {}
+    for field, expected in case['expected'].items():
+        actual = (result.get(field) or {}).get('value')
+        record['fields'][field] = {'expected': expected, 'actual': actual,
+                                   'ok': field_matches(field, actual, expected)}
+    return record
+
+
+def load_state(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    """Rewrite the state file atomically, so an interrupted run keeps every finished case."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def run_evaluation(cases, client=None, state_path=DEFAULT_STATE, concurrency=8, fast_path=True, force=False,
+                   use_cache=False, on_done=None):
+    """
+    Evaluate every case with up to `concurrency` LLM requests in flight.
+    A case whose key (see case_key) matches a successful stored result is not
+    re-run; its stored result is reused. Results are saved to state_path as each
+    case finishes, so an interrupted run resumes where it stopped.
+    Args:
+        cases (dict): {name: {'transcript', 'expected'}}
+        client (MistralClient, optional): Client to use (default: a new one without the response cache)
+        state_path (str, optional): JSON file of stored results (None: keep nothing)
+        concurrency (int): Maximum concurrent requests
+        fast_path (bool): Fill formulaic fields with rules, as call_mistral does
+        force (bool): Re-run every case even if unchanged
+        use_cache (bool): Let the client's LLM response cache answer (off: latencies are real)
+        on_done (callable, optional): on_done(name, record, skipped) after each case
+    Returns:
+        dict: {name: record} for every case
+    """
+    client = client or MistralClient(structured_output=STRUCTURED_OUTPUT, pool_size=max(8, concurrency))
+    state = load_state(state_path)
+    lock = threading.Lock()
+    records = {}
+    todo = []
+    for name, case in cases.items():
+        key = case_key(client, case, fast_path)
+        stored = state.get(name)
+        if not force and stored and stored.get('key') == key and 'error' not in stored:
+            records[name] = stored
+            if on_done:
+                on_done(name, stored, True)
+        else:
+            todo.append((name, case, key))
+
+    def finish(name, record):
+        with lock:
+            records[name] = state[name] = record
+            if state_path:
+                save_state(state_path, state)
+        if on_done:
+            on_done(name, record, False)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(evaluate_case, client, case, key, fast_path, use_cache): name
+                   for name, case, key in todo}
+        for future in as_completed(futures):
+            finish(futures[future], future.result())
+    return {name: records[name] for name in cases}
+
+
+def summarize(records, fresh=None):
+    """
+    Per-field accuracy, fully correct cases and latency percentiles over all records.
+    Args:
+        records (dict): Output of run_evaluation
+        fresh (int, optional): How many of them were run (rather than reused) this time
+    """
+    fields = {}
+    passed = 0
+    latencies = []
+    errors = 0
+    for record in records.values():
+        if 'error' in record:
+            errors += 1
+            continue
+        latencies.append(record['latency_s'])
+        passed += all(f['ok'] for f in record['fields'].values())
+        for field, result in record['fields'].items():
+            counts = fields.setdefault(field, [0, 0])
+            counts[0] += result['ok']
+            counts[1] += 1
+    order = [f for f in FIELD_LINES if f in fields] + [f for f in fields if f not in FIELD_LINES]
+    return {
+        'cases': len(records),
+        'fresh': fresh,
+        'errors': errors,
+        'passed': passed,
+        'field_accuracy': {field: fields[field][0] / fields[field][1] for field in order},
+        'latency_s': {f'p{q}': percentile(latencies, q) for q in (50, 95, 99)} if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate LLM extraction on the test corpus, concurrently and "
+                                                 "skipping cases that have not changed since the last run.")
+    parser.add_argument('cases', nargs='?', default=DEFAULT_CASES, help="JSON file of {name: {transcript, expected}}")
+    parser.add_argument('--state', default=DEFAULT_STATE, help=f"Stored results file (default: {DEFAULT_STATE})")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent LLM requests (default: 8)")
+    parser.add_argument('--force', action='store_true', help="Re-run every case, even unchanged ones")
+    parser.add_argument('--no-fast-path', action='store_true', help="Send every field to the LLM")
+    parser.add_argument('--structured-output', action='store_true', default=STRUCTURED_OUTPUT,
+                        help="Constrain answers with a JSON Schema (needs server response_format support)")
+    parser.add_argument('--llm-cache', action='store_true',
+                        help="Allow answers from the LLM response cache (latencies are then not real)")
+    args = parser.parse_args(argv)
+
+    cases = load_cases(args.cases)
+    fresh = []
+
+    def report(name, record, skipped):
+        if not skipped:
+            fresh.append(name)
+        if 'error' in record:
+            print(f"{name}: ERROR {record['error']}")
+            return
+        failed = [f"{field} (expected {r['expected']!r}, got {r['actual']!r})"
+                  for field, r in record['fields'].items() if not r['ok']]
+        status = 'unchanged' if skipped else f"{record['latency_s']:.2f}s"
+        print(f"{name}: {'PASS' if not failed else 'FAIL'} [{status}]" + ''.join(f"\n  {f}" for f in failed))
+
+    start = time.perf_counter()
+    try:
+        client = MistralClient(structured_output=args.structured_output, pool_size=max(8, args.concurrency))
+        if args.llm_cache:
+            import llm_cache
+            client.cache = llm_cache.get_cache()
+        records = run_evaluation(cases, client=client, state_path=args.state, concurrency=args.concurrency,
+                                 fast_path=not args.no_fast_path, force=args.force, use_cache=args.llm_cache,
+                                 on_done=report)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; finished cases are saved in {args.state}.")
+        sys.exit(130)
+    summary = summarize(records, fresh=len(fresh))
+
+    print(f"\nCases: {summary['cases']} ({summary['fresh']} run, {summary['cases'] - summary['fresh']} unchanged), "
+          f"{summary['passed']} fully correct, {summary['errors']} error(s)")
+    for field, accuracy in summary['field_accuracy'].items():
+        print(f"  {field:<17} {accuracy * 100:5.1f}%")
+    if summary['latency_s']:
+        print("Latency: " + ', '.join(f"{q} {v:.2f}s" for q, v in summary['latency_s'].items()))
+    print(f"[Timer] Evaluation took {time.perf_counter() - start:.2f} seconds.")
+    if summary['errors'] or summary['passed'] < summary['cases']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+
+import argparse  # For the corpus report CLI
+import json  # For reading test cases and printing results
+import re  # For the extraction rules
+import time  # For timing the rules against the LLM
+
+# The fields of LLM.PROMPT_TEMPLATE, in output order
+FIELDS = ('ship_name', 'position', 'number_of_people', 'injuries', 'distress_type', 'boat_name')
+
+# Fields at or above this confidence are not sent to the LLM
+CONFIDENCE_THRESHOLD = 0.8
+
+WORD_NUMBERS = {
+    'no': 0, 'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14,
+    'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
+}
+NUMBER_WORDS = {n: w for w, n in WORD_NUMBERS.items() if w != 'no'}
+
+_NUM = r'(?:\d{1,3}|' + '|'.join(w for w in WORD_NUMBERS if w != 'no') + r')'
+_PEOPLE = r'(?:adults?|children|child|kids?|crew|persons?|people|souls|passengers?|men|women|POB)'
+_ONBOARD = r'(?:on\s?board|aboard)'
+_CAPS = r"[A-Z][\w'’-]*(?:\s+[A-Z][\w'’-]*)*"  # A run of capitalised words, e.g. "Sea Turtle"
+_VESSEL_TYPES = (r'(?i:motor\s+vessel|sailing\s+vessel|fishing\s+vessel|fishing\s+boat|vessel|yacht|boat|'
+                 r'catamaran|trawler|ketch|sloop|dinghy|rib|cruiser|MV|FV|SV)')
+_NOT_NAMES = {'mayday', 'pan', 'pan-pan', 'sos', 'coastguard', 'over', 'help', 'calling',
+              # Pronouns and other capitalised words that follow "boat" or "this is" in speech
+              'i', 'we', 'me', 'us', 'my', 'our', 'you', 'your', 'he', 'she', 'it', 'they', 'his', 'her',
+              'their', 'the', 'a', 'an', 'and', 'but', 'or', 'so', 'just', 'not', 'here', 'there', 'this',
+              'that', 'is', 'are', 'was', 'please', 'yes', 'no', 'ok', 'okay', 'roger', 'out'}
+# Shore stations answering or relaying a call, e.g. "this is Holyhead Coastguard"
+_STATION = re.compile(r'(?i:\b(?:coast\s*guard|radio|control)\b)')
+
+# Distress keywords; the matched text is returned as the value
+_DISTRESS = [
+    r'taking\s+on\s+water', r'water\s+ingress', r'sinking', r'capsi[sz]ed', r'flooding',
+    r'(?:run|ran|gone|went|is|are)\s+aground', r'on\s+fire', r'fire\s+on\s+board', r'explosion',
+    r'engine\s+failure', r'engine\s+(?:has\s+)?failed', r'lost\s+(?:all\s+)?(?:power|engine|steering)',
+    r'(?:man|person)\s+overboard', r'\bMOB\b', r'dismasted', r'adrift', r'drifting', r'listing',
+    r'collision', r'collided', r'hit\s+(?:a\s+|something\s+)?(?:submerged\s+object|rocks?|something)',
+    r'medical\s+emergency',
+]
+
+# Explicit statements that a field is not known
+_UNKNOWN = {
+    'ship_name': r'(?i:(?:vessel|boat)\s+name\s+(?:unknown|not\s+given)|no\s+(?:boat|vessel)\s+name)',
+    'position': r'(?i:(?:position|location)\s+(?:unknown|unclear|not\s+known)|unsure\s+of\s+(?:our\s+|exact\s+)*position)',
+    'number_of_people': r'(?i:crew\s+of\s+unknown\s+size|unknown\s+number\s+of\s+(?:people|persons|crew))',
+}
+
+
+def _field(value, confidence):
+    return {'value': value, 'confidence': confidence}
+
+
+def _to_int(token):
+    token = token.lower()
+    return int(token) if token.isdigit() else WORD_NUMBERS.get(token)
+
+
+def _count_words(n):
+    """Format a head count the way the LLM does ("Three")."""
+    return NUMBER_WORDS.get(n, str(n)).capitalize()
+
+
+def _sentences(text):
+    return [s for s in re.split(r'(?<=[.!?;])\s+', text) if s]
+
+
+def _is_name(name):
+    """Reject pronouns, single letters, procedure words and shore stations."""
+    words = name.lower().split()
+    return (len(name) > 1 and words[0] not in _NOT_NAMES and not all(w in _NOT_NAMES for w in words)
+            and not _STATION.search(name))
+
+
+def _ship_name(text):
+    procedure = r'(?:mayday|pan-pan|pan\s+pan|sos)'
+    patterns = [
+        (rf'\b{_VESSEL_TYPES}\s+(?:called\s+|named\s+)?({_CAPS})', 0.9),
+        (rf'(?i:\b(?:mayday|sos|pan-pan|distress\s+call|call)\s+from)\s+(?:the\s+)?({_CAPS})', 0.85),
+        # "Mayday, mayday, mayday, this is X": the radio procedure names the vessel
+        (rf'(?i:\b{procedure}(?:[\s,.!]+{procedure})*[\s,.!]+this\s+is)\s+(?:the\s+)?({_CAPS})', 0.8),
+        # A bare "this is X" may be a person or a station, so the LLM confirms it
+        (rf'(?i:\bthis\s+is)\s+(?:the\s+)?({_CAPS})', 0.7),
+    ]
+    for pattern, confidence in patterns:
+        for match in re.finditer(pattern, text):
+            name = match.group(1).strip()
+            if _is_name(name):
+                return _field(name, confidence)
+    return None
+
+
+def _position(text):
+    hemisphere = r"(?:[NSEW]\b|(?i:north|south|east|west)\b)"
+    deg = r"(?:°|º|\s*(?i:degrees?)\b)"
+    minutes = r"(?:['′]|\s*(?i:minutes?)\b)"
+    coordinate = rf"\d{{1,3}}(?:\.\d+)?\s*{deg}\s*(?:\d{{1,2}}(?:\.\d+)?\s*{minutes}\s*)?,?\s*{hemisphere}"
+    decimal = rf"\d{{1,3}}\.\d+\s*{hemisphere}"
+    patterns = [
+        (rf"(?:{coordinate}|{decimal}),?\s+(?:(?i:and)\s+)?(?:{coordinate}|{decimal})", 0.95),
+        (rf"{_NUM}\s+(?i:(?:nautical\s+)?miles?)\s+(?i:north|south|east|west|north-?east|north-?west|"
+         rf"south-?east|south-?west)\s+(?i:of)\s+(?:the\s+)?{_CAPS}", 0.9),
+        (rf"(?i:\b(?:near|off\s+the\s+coast\s+of|off|outside|approaching|just\s+outside))\s+(?:the\s+)?{_CAPS}", 0.85),
+    ]
+    for pattern, confidence in patterns:
+        match = re.search(pattern, text)
+        if match:
+            return _field(' '.join(match.group(0).split()), confidence)
+    return None
+
+
+def _number_of_people(text):
+    patterns = [
+        (rf'(?i:\bcrew\s+of\s+({_NUM})\b)', 0.95),
+        (rf'(?i:\btotal\s+(?:of\s+)?({_NUM})\b)', 0.95),
+        (rf'(?i:\b({_NUM})\s+(?:\w+\s+)?(?:in\s+)?total\b)', 0.95),
+        (rf'(?i:\b({_NUM})\s+of\s+us\b)', 0.9),
+    ]
+    for pattern, confidence in patterns:
+        match = re.search(pattern, text)
+        if match:
+            return _field(_count_words(_to_int(match.group(1))), confidence)
+
+    # "Two adults, one child onboard": add up every group in the sentence
+    for sentence in _sentences(text):
+        if re.search(rf'(?i:{_ONBOARD})', sentence):
+            groups = re.findall(rf'(?i:\b({_NUM})\s+{_PEOPLE}\b)', sentence)
+            if not groups:
+                groups = re.findall(rf'(?i:\b({_NUM})\s+{_ONBOARD})', sentence)
+            if groups:
+                return _field(_count_words(sum(_to_int(g) for g in groups)), 0.9)
+    for sentence in _sentences(text):
+        groups = re.findall(rf'(?i:\b({_NUM})\s+{_PEOPLE}\b(?!\s+(?:injured|hurt|unconscious|missing)))', sentence)
+        if groups:
+            return _field(_count_words(sum(_to_int(g) for g in groups)), 0.8)
+    return None
+
+
+def _injuries(text):
+    none = (r"(?i:\bno\s+(?:injuries|injury|casualties)\b|\bno(?:\s+one|body)(?:'s|’s|\s+is)?\s+"
+            r"(?:hurt|injured)\b|\ball\s+(?:safe|well|ok|okay|unhurt)\b)")
+    if re.search(none, text):
+        return _field('none', 0.9)
+    match = re.search(rf'(?i:\b({_NUM})\s+(?:{_PEOPLE}\s+)?(injured|hurt|unconscious|missing|casualties)\b)', text)
+    if match:
+        count = _count_words(_to_int(match.group(1)))
+        condition = match.group(2).lower()
+        return _field(count if condition in ('injured', 'hurt', 'casualties') else f'{count} {condition}', 0.85)
+    match = re.search(r'(?i:\b(minor|serious|severe|major)\s+injur(?:y|ies)\b)', text)
+    if match:
+        return _field(match.group(1).capitalize(), 0.8)
+    return None
+
+
+def _distress_type(text):
+    matches = []
+    for pattern in _DISTRESS:
+        match = re.search(rf'(?i:{pattern})', text)
+        if match:
+            matches.append(match)
+    if not matches:
+        return None
+    first = min(matches, key=lambda m: m.start())
+    # Several different emergencies in one call are left for the LLM to weigh up
+    confidence = 0.9 if len(matches) == 1 else 0.5
+    return _field(' '.join(first.group(0).split()), confidence)
+
+
+_RULES = {
+    'ship_name': _ship_name,
+    'position': _position,
+    'number_of_people': _number_of_people,
+    'injuries': _injuries,
+    'distress_type': _distress_type,
+}
+
+
+def extract_fields(transcript):
+    """
+    Extract the SAR fields from a transcript with deterministic rules (no LLM).
+    Returns {field: {"value": ..., "confidence": ...}} in the same schema as the
+    LLM output, for the fields that a rule matched. boat_name mirrors ship_name.
+    """
+    result = {}
+    for field, rule in _RULES.items():
+        found = rule(transcript)
+        if found is None and field in _UNKNOWN and re.search(_UNKNOWN[field], transcript):
+            found = _field('unknown', 0.85)
+        if found is not None:
+            result[field] = found
+    if 'ship_name' in result:
+        result['boat_name'] = dict(result['ship_name'])
+    return {field: result[field] for field in FIELDS if field in result}
+
+
+def split_confident(fields, threshold=CONFIDENCE_THRESHOLD):
+    """Return (confident fields, names of the fields still needed from the LLM)."""
+    confident = {name: f for name, f in fields.items() if f['confidence'] >= threshold}
+    return confident, [name for name in FIELDS if name not in confident]
+
+
+def corpus_report(cases, threshold=CONFIDENCE_THRESHOLD, compare=None):
+    """
+    Run the rules over {name: {transcript, expected}} test cases and return
+    per-field hit rate (confidently filled), accuracy of the filled values
+    (when compare(field, actual, expected) is given), the share of calls that
+    need no LLM request at all and the mean rule time per call.
+    """
+    filled = {field: 0 for field in FIELDS}
+    correct = {field: 0 for field in FIELDS}
+    no_llm = 0
+    fields_sent = 0
+    elapsed = 0.0
+    for case in cases.values():
+        start = time.perf_counter()
+        confident, missing = split_confident(extract_fields(case['transcript']), threshold)
+        elapsed += time.perf_counter() - start
+        no_llm += not missing
+        fields_sent += len(missing)
+        for field, value in confident.items():
+            filled[field] += 1
+            if compare is not None and compare(field, value['value'], case['expected'].get(field)):
+                correct[field] += 1
+    n = len(cases)
+    return {
+        'cases': n,
+        'hit_rate': {field: filled[field] / n for field in FIELDS},
+        'accuracy': {field: correct[field] / filled[field] if filled[field] else None for field in FIELDS}
+                    if compare is not None else None,
+        'no_llm_rate': no_llm / n,
+        'fields_sent_to_llm': fields_sent / (n * len(FIELDS)),
+        'rule_ms_per_call': elapsed / n * 1000,
+    }
+
+
+def main(argv=None):
+    """
+    Report how much of a test-case corpus the rules can answer without the LLM.
+    With --llm, also time each call against the LLM with and without the fast path.
+    """
+    parser = argparse.ArgumentParser(description="Measure the rule-based fast path on a test-case corpus.")
+    parser.add_argument('cases', nargs='?', default='RNLI_LLM/Unit-Tests/llm_testcases/test1.json',
+                        help="JSON file of {name: {transcript, expected}} cases")
+    parser.add_argument('--threshold', type=float, default=CONFIDENCE_THRESHOLD,
+                        help=f"Minimum confidence to skip the LLM for a field (default: {CONFIDENCE_THRESHOLD})")
+    parser.add_argument('--llm', action='store_true', help="Also time the LLM with and without the fast path")
+    args = parser.parse_args(argv)
+
+    with open(args.cases, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    report = corpus_report(cases, args.threshold)
+    print(f"Cases: {report['cases']}")
+    for field, rate in report['hit_rate'].items():
+        print(f"  {field:<17} filled by rules in {rate * 100:5.1f}% of calls")
+    print(f"Calls answered without the LLM: {report['no_llm_rate'] * 100:.1f}%")
+    print(f"Fields still sent to the LLM:  {report['fields_sent_to_llm'] * 100:.1f}%")
+    print(f"Rule time: {report['rule_ms_per_call']:.2f} ms per call")
+
+    if args.llm:
+        from LLM import call_mistral
+        for label, fast_path in (('LLM only', False), ('fast path', True)):
+            start = time.perf_counter()
+            for case in cases.values():
+                call_mistral(case['transcript'], use_cache=False, fast_path=fast_path)
+            print(f"[Timer] {label}: {(time.perf_counter() - start) / len(cases):.2f} s per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+# CTranslate2 engine (faster-whisper) behind the same transcribe() interface as openai-whisper.
+# faster_whisper is only imported when a model is loaded, so this module is cheap to import.
+
+import os  # For sizing local model directories
+
+# Compute types worth using on CPU-only hosts: int8 weights with int8 or float32 activations
+CPU_COMPUTE_TYPES = ('int8', 'int8_float32')
+
+# Parameter counts of the Whisper checkpoints faster-whisper downloads by name ('.en' variants are the same size)
+PARAMETERS = {
+    'tiny': 39e6, 'base': 74e6, 'small': 244e6, 'medium': 769e6,
+    'large-v1': 1550e6, 'large-v2': 1550e6, 'large-v3': 1550e6, 'large': 1550e6,
+    'large-v3-turbo': 809e6, 'turbo': 809e6,
+    'distil-small': 166e6, 'distil-medium': 394e6, 'distil-large-v2': 756e6, 'distil-large-v3': 756e6,
+}
+# Bytes per weight once CTranslate2 has converted the checkpoint to the compute type
+WEIGHT_BYTES = {'int8': 1, 'int16': 2, 'float16': 2, 'bfloat16': 2, 'float32': 4}
+
+# openai-whisper transcribe() options that faster-whisper takes under another name
+_RENAMED = {'logprob_threshold': 'log_prob_threshold'}
+# openai-whisper transcribe() options that faster-whisper takes unchanged
+_PASSTHROUGH = {'beam_size', 'best_of', 'patience', 'length_penalty', 'temperature', 'compression_ratio_threshold',
+                'log_prob_threshold', 'no_speech_threshold', 'condition_on_previous_text', 'initial_prompt',
+                'prefix', 'suppress_blank', 'suppress_tokens', 'without_timestamps', 'word_timestamps',
+                'prepend_punctuations', 'append_punctuations', 'clip_timestamps',
+                'hallucination_silence_threshold'}
+
+
+def _timestamp(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{seconds:06.3f}"
+
+
+class FasterWhisperModel:
+    """
+    Wrap a faster_whisper.WhisperModel so callers get openai-whisper's result
+    shape: {'text', 'segments': [{'id', 'start', 'end', 'text', ...}], 'language'}.
+    """
+
+    def __init__(self, model, compute_type, model_size=None):
+        self.model = model
+        self.compute_type = compute_type
+        self.model_size = model_size
+
+    def estimated_bytes(self):
+        """Resident size of the weights; 0 if unknown."""
+        return estimate_faster_whisper_bytes(self.model_size, self.compute_type)
+
+    def transcribe(self, audio, language=None, task='transcribe', verbose=None, fp16=None, **options):
+        """
+        Transcribe a path or a 16kHz mono float32 array. Accepts the openai-whisper
+        options this codebase uses; fp16 is ignored (the compute type fixes precision).
+        Decoding is greedy unless beam_size is given, like openai-whisper's transcribe().
+        """
+        kwargs = {'beam_size': 1}
+        for name, value in options.items():
+            name = _RENAMED.get(name, name)
+            if name not in _PASSTHROUGH:
+                raise TypeError(f"faster-whisper backend does not support the '{name}' option")
+            kwargs[name] = value
+        segments, info = self.model.transcribe(audio, language=language, task=task, **kwargs)
+
+        results = []
+        # segments is a generator: the audio is decoded while it is consumed
+        for i, seg in enumerate(segments):
+            record = {'id': i, 'seek': seg.seek, 'start': seg.start, 'end': seg.end, 'text': seg.text,
+                      'tokens': list(seg.tokens), 'temperature': seg.temperature, 'avg_logprob': seg.avg_logprob,
+                      'compression_ratio': seg.compression_ratio, 'no_speech_prob': seg.no_speech_prob}
+            if seg.words:
+                record['words'] = [{'word': w.word, 'start': w.start, 'end': w.end, 'probability': w.probability}
+                                   for w in seg.words]
+            if verbose:
+                print(f"[{_timestamp(seg.start)} --> {_timestamp(seg.end)}] {seg.text.strip()}")
+            results.append(record)
+        return {'text': ''.join(seg['text'] for seg in results), 'segments': results, 'language': info.language}
+
+
+def estimate_faster_whisper_bytes(model_size, compute_type):
+    """
+    Estimate the memory a faster-whisper model takes: its parameter count times
+    the bytes per weight of the compute type ('int8_float32' keeps int8 weights).
+    A local model directory is sized from its model.bin instead. Returns 0 for
+    checkpoints or compute types it does not know.
+    """
+    if not model_size:
+        return 0
+    weights = os.path.join(model_size, 'model.bin')
+    if os.path.isfile(weights):
+        return os.path.getsize(weights)
+    parameters = PARAMETERS.get(model_size[:-3] if model_size.endswith('.en') else model_size)
+    weight_bytes = WEIGHT_BYTES.get((compute_type or 'int8').split('_')[0])
+    if parameters is None or weight_bytes is None:
+        return 0
+    return int(parameters * weight_bytes)
+
+
+def load_faster_whisper_model(model_size, device, dtype):
+    """
+    Load a CTranslate2 Whisper checkpoint with faster-whisper.
+    Args:
+        model_size (str): Whisper model size (tiny, base, small, medium, large)
+        device (str): 'cpu' or 'cuda'
+        dtype (str): CTranslate2 compute type, e.g. 'int8', 'int8_float32', 'float16', 'float32'
+    """
+    from faster_whisper import WhisperModel
+    return FasterWhisperModel(WhisperModel(model_size, device=device, compute_type=dtype), dtype, model_size)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+import os  # For file path operations
+import tempfile  # For atomic writes
+
+import numpy as np
+
+import tracing
+from audio_io import SAMPLE_RATE, load_audio as decode_with_ffmpeg
+from transcript_cache import evict_lru, hash_audio
+
+# Where decoded audio and log-mel features live and how large the store may grow
+DEFAULT_STORE_DIR = os.environ.get(
+    'RNLI_FEATURE_STORE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'rnli_llm', 'features'))
+DEFAULT_MAX_MB = int(os.environ.get('RNLI_FEATURE_STORE_MB', '4096'))
+
+# Bump when the stored arrays change (e.g. a different mel front end) so old ones are ignored
+STORE_VERSION = 2
+
+
+class FeatureStore:
+    """
+    On-disk store of the audio front end's output: decoded 16 kHz float32 PCM and
+    Whisper log-mel windows, as .npy files keyed by the SHA-256 of the audio file.
+    Arrays are opened with mmap_mode='r', so a hit skips ffmpeg/librosa and the
+    STFT, and concurrent processes (e.g. a sweep over model sizes) share the
+    same pages. Writes are atomic; least recently used files are evicted once the
+    store grows past max_mb (a hit refreshes the file's mtime, its LRU clock).
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.store_dir = os.path.join(store_dir, f'v{STORE_VERSION}')
+        self.max_bytes = int(max_mb) * 1024 * 1024
+
+    def _path(self, audio_hash, name):
+        return os.path.join(self.store_dir, audio_hash[:2], f'{audio_hash}.{name}.npy')
+
+    def get(self, audio_hash, name):
+        """Return the stored array memory-mapped read-only, or None on a miss."""
+        path = self._path(audio_hash, name)
+        try:
+            try:
+                array = np.load(path, mmap_mode='r')
+            except ValueError:
+                array = np.load(path)  # Empty arrays cannot be memory-mapped
+                if array.size:
+                    return None
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return array
+
+    def put(self, audio_hash, name, array):
+        """Atomically store an array, evict old files if over budget, and return the stored (mapped) copy."""
+        path = self._path(audio_hash, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=path)
+        if not array.size:
+            return array  # Empty arrays cannot be memory-mapped
+        return np.load(path, mmap_mode='r')
+
+    def load_audio(self, input_path, sr=SAMPLE_RATE, decoder=decode_with_ffmpeg, source='ffmpeg', audio_hash=None):
+        """
+        Decoded mono float32 samples of an audio file, decoding and storing them on a miss.
+        Args:
+            input_path (str): Audio file path
+            sr (int): Sample rate
+            decoder (callable): decoder(input_path, sr) -> samples, run on a miss
+            source (str): Names the decoder in the key, since ffmpeg and librosa
+                resample differently
+            audio_hash (str, optional): hash_audio(input_path), if already known
+        """
+        audio_hash = audio_hash or hash_audio(input_path)
+        name = f'{source}_pcm{sr}'
+        samples = self.get(audio_hash, name)
+        if samples is not None:
+            tracing.count('feature_store', kind='pcm', result='hit')
+            return samples
+        tracing.count('feature_store', kind='pcm', result='miss')
+        return self.put(audio_hash, name, decoder(input_path, sr))
+
+    def log_mel_windows(self, input_path, n_mels, overlap_seconds=2.0, decoder=decode_with_ffmpeg, source='ffmpeg'):
+        """
+        Whisper log-mel spectrograms of an audio file's overlapping 30 s windows,
+        shape (windows, n_mels, 3000), as used by chunked_transcribe. On a miss the
+        samples come from load_audio (and so are stored too).
+        """
+        from chunked_transcribe import window_log_mel
+
+        audio_hash = hash_audio(input_path)
+        name = f'{source}_mel{n_mels}_overlap{overlap_seconds:g}'
+        mel = self.get(audio_hash, name)
+        if mel is not None:
+            tracing.count('feature_store', kind='mel', result='hit')
+            return mel
+        tracing.count('feature_store', kind='mel', result='miss')
+        audio = self.load_audio(input_path, decoder=decoder, source=source, audio_hash=audio_hash)
+        return self.put(audio_hash, name, window_log_mel(audio, n_mels, overlap_seconds))
+
+    def evict(self, keep=None):
+        """Delete least recently used arrays (except keep) until the store fits in max_bytes."""
+        evict_lru(self.store_dir, self.max_bytes, '.npy', keep)
+
+    def clear(self):
+        """Remove every stored array."""
+        for root, _, names in os.walk(self.store_dir):
+            for name in names:
+                if name.endswith('.npy'):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+
+_STORE = FeatureStore()
+
+
+def get_store():
+    """Return the process-wide feature store."""
+    return _STORE
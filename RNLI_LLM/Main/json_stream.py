@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+import json  # For parsing each completed field value
+
+
+class IncrementalFieldParser:
+    """
+    Incremental parser for the top-level fields of a JSON object that arrives in
+    pieces (e.g. streamed LLM tokens). As soon as the value of a top-level key
+    is complete - for SAR output, its whole {"value": ..., "confidence": ...}
+    object - on_field(name, value) is called. Text before the first '{' (such as
+    a markdown code fence) is ignored.
+    """
+
+    def __init__(self, on_field=None):
+        self.on_field = on_field
+        self.fields = {}
+        self.done = False
+        self._text = ''
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = 'key'  # At depth 1: key -> colon -> value -> in_value -> after
+        self._key = None
+        self._token_start = None
+
+    def feed(self, chunk):
+        """Consume the next piece of text, emitting any fields it completes."""
+        start = len(self._text)
+        self._text += chunk
+        for i in range(start, len(self._text)):
+            if self.done:
+                return
+            self._step(i, self._text[i])
+
+    def _step(self, i, c):
+        if not self._started:
+            if c == '{':
+                self._started = True
+                self._depth = 1
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == '\\':
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                if self._depth == 1 and self._state == 'key':
+                    self._key = self._load(self._token_start, i + 1)
+                    self._state = 'colon'
+                elif self._depth == 1 and self._state == 'in_value':
+                    self._emit(i + 1)
+            return
+
+        if self._depth == 1 and self._state == 'value' and not c.isspace():
+            self._token_start = i
+            self._state = 'in_value'
+        if c == '"':
+            self._in_string = True
+            if self._depth == 1 and self._state == 'key':
+                self._token_start = i
+        elif c == ':' and self._depth == 1 and self._state == 'colon':
+            self._state = 'value'
+        elif c in '{[':
+            self._depth += 1
+        elif c in '}]':
+            if self._depth == 1 and self._state == 'in_value':
+                self._emit(i)  # Scalar value ended by the closing brace
+            self._depth -= 1
+            if self._depth == 0:
+                self.done = True
+            elif self._depth == 1 and self._state == 'in_value':
+                self._emit(i + 1)  # Nested object/array value just closed
+        elif c == ',' and self._depth == 1:
+            if self._state == 'in_value':
+                self._emit(i)  # Scalar value ended by a comma
+            self._state = 'key'
+
+    def _load(self, start, end):
+        try:
+            return json.loads(self._text[start:end])
+        except json.JSONDecodeError:
+            return None
+
+    def _emit(self, end):
+        value = self._load(self._token_start, end)
+        self._state = 'after'
+        if self._key is None or value is None and self._text[self._token_start:end].strip() != 'null':
+            return
+        self.fields[self._key] = value
+        if self.on_field is not None:
+            self.on_field(self._key, value)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+import hashlib  # For request-aware keys
+import json  # For the on-disk entry format
+import os  # For file path operations
+import tempfile  # For atomic writes
+import threading  # For thread-safe counters and LRU
+import time  # For TTL checks
+from collections import OrderedDict  # For the in-memory LRU tier
+
+from transcript_cache import evict_lru
+
+# Where cached LLM responses live, how many stay in memory, how large the disk tier may grow,
+# and how long entries stay valid
+DEFAULT_CACHE_DIR = os.environ.get(
+    'RNLI_LLM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'rnli_llm', 'llm'))
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get('RNLI_LLM_CACHE_MEMORY_ENTRIES', '256'))
+DEFAULT_MAX_MB = int(os.environ.get('RNLI_LLM_CACHE_MB', '256'))
+DEFAULT_TTL_SECONDS = int(os.environ.get('RNLI_LLM_CACHE_TTL', str(30 * 24 * 3600)))  # 0 = never expire
+
+
+def make_key(request_body):
+    """
+    Hash everything that determines the model output: model name, temperature,
+    max_tokens and the rendered prompt (plus any other request options).
+    """
+    payload = json.dumps(request_body, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache of LLM responses: an in-memory LRU in front of JSON files on
+    disk (sharded by the first two hex digits of the key, written atomically).
+    Entries older than ttl_seconds are treated as misses and removed. Once the
+    disk tier grows past max_mb, least recently used files are evicted (a disk
+    hit refreshes the file's mtime, its LRU clock).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_mb) * 1024 * 1024
+        self._memory = OrderedDict()  # key -> (created, value), least recently used first
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _expired(self, created):
+        return bool(self.ttl_seconds) and time.time() - created > self.ttl_seconds
+
+    def _remember(self, key, created, value):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            entry = None
+        if entry is not None and self._expired(entry['created']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry['created'], entry['value'])
+        return entry['value']
+
+    def put(self, key, value):
+        """Store a JSON-serialisable value in both tiers."""
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+        path = self._path(key)
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'value': value}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException as e:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            if not isinstance(e, OSError):
+                raise
+            print(f"Warning: could not write LLM cache: {e}")
+            return
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Delete least recently used disk entries (except keep) until the disk tier fits in max_bytes."""
+        evict_lru(self.cache_dir, self.max_bytes, '.json', keep)
+
+    def stats(self):
+        """Return hit/miss counters."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide LLM response cache (created on first use)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMCache()
+        return _CACHE
@@ -5,37 +5,261 @@ import argparse
 import json
 import os
 
-from simple_transcribe import transcribe_audio
-from LLM import call_mistral
+from LLM import LLMError, call_mistral, call_mistral_stream
+from triage import triage
+from model_registry import DEFAULT_BACKEND, add_backend_arguments, backend_cache_options
+import tracing
+from profiling import add_profile_arguments, profile_run
 
+
+def output_names(files):
+    """
+    Map each input file to its output JSON name. The audio extension is kept
+    (LOTTIE.m4a -> LOTTIE.m4a.json) so LOTTIE.m4a and LOTTIE.wav do not overwrite
+    each other; files with the same name in different folders get -2, -3, ...
+    """
+    names = {}
+    taken = set()
+    for item in files:
+        base = os.path.basename(item)
+        name = base + '.json'
+        n = 1
+        while name in taken:
+            n += 1
+            name = f'{base}-{n}.json'
+        taken.add(name)
+        names[item] = name
+    return names
+
+
+def run_pipeline(inputs, output_dir, model_size='base', language='en', decode_workers=2, transcribe_workers=1,
+                 extract_workers=4, queue_size=2, use_cache=True, use_llm_cache=True, vad=False, fast_path=True,
+                 use_triage=True, triage_llm=False, backend=DEFAULT_BACKEND, compute_type=None):
+    """
+    Process many audio files with overlapping stages: decode -> transcribe -> triage -> extract -> write.
+    Each stage runs on its own thread pool with bounded queues in between, so
+    Whisper works on call N+1 while the LLM is still answering for call N.
+    Writes one {transcript, triage, llm_result, timings} JSON per input file into output_dir,
+    named after the audio file including its extension (see output_names); llm_result is
+    null for calls that triage marked as chatter.
+    Args:
+        inputs (str or list): Directory, glob pattern or file path (or a list of them)
+        output_dir (str): Folder for the per-file JSON outputs
+        model_size (str): Whisper model size (tiny, base, small, medium, large)
+        language (str, optional): Language code (e.g., 'en') or None for auto-detect
+        decode_workers (int): Concurrent ffmpeg/WAV decodes
+        transcribe_workers (int): Concurrent Whisper transcriptions (they share one model; keep at 1
+            unless the model is thread-safe for your backend)
+        extract_workers (int): Concurrent LLM requests
+        queue_size (int): Maximum jobs waiting between two stages (backpressure)
+        vad (bool): Transcribe only the speech regions of each file
+        fast_path (bool): Fill formulaic fields with rules and ask the LLM only for the rest
+        use_triage (bool): Skip full extraction for transcripts that are not distress calls
+        triage_llm (bool): Ask the LLM a one-token question when the keyword scorer is unsure
+        backend (str): ASR engine, 'whisper' (openai-whisper) or 'faster-whisper' (CTranslate2)
+        compute_type (str, optional): Engine precision (default: the backend's default)
+    Returns:
+        list: The finished pipeline jobs, in input order
+    """
+    import time
+    from audio_io import load_audio
+    from batch_transcribe import expand_inputs
+    from model_registry import use_model, warm_up
+    from pipeline import Pipeline, Stage
+    import transcript_cache
+    from vad import transcribe_speech_only
+
+    options = {'task': 'transcribe'}
+    if vad:
+        options['vad'] = True
+    options.update(backend_cache_options(backend, compute_type))
+    files = expand_inputs(inputs)
+    names = output_names(files)
+    os.makedirs(output_dir, exist_ok=True)
+
+    def decode(job):
+        # A cached transcript means the audio never needs decoding
+        key, cached = transcript_cache.lookup(job.item, model_size, language, options)
+        job.data['cache_key'] = key
+        if use_cache and cached is not None:
+            job.data['whisper'] = cached
+        else:
+            job.data['audio'] = load_audio(job.item)
+
+    def transcribe(job):
+        if 'whisper' not in job.data:
+            audio = job.data.pop('audio')
+            with use_model(model_size, dtype=compute_type, backend=backend) as model:
+                if vad:
+                    result = transcribe_speech_only(model, audio, language=language, verbose=None, task='transcribe')
+                else:
+                    result = model.transcribe(audio, language=language, verbose=None, task='transcribe')
+            transcript_cache.store(job.data['cache_key'], result)
+            job.data['whisper'] = result
+        job.data['transcript'] = job.data['whisper']['text'].strip()
+
+    def triage_stage(job):
+        if use_triage:
+            job.data['triage'] = triage(job.data['transcript'], use_llm=triage_llm, use_cache=use_llm_cache)
+
+    def extract(job):
+        if job.data.get('triage', {}).get('extract', True):
+            job.data['llm_result'] = call_mistral(job.data['transcript'], use_cache=use_llm_cache, fast_path=fast_path)
+
+    def write(job):
+        output = {"transcript": job.data.get('transcript'), "triage": job.data.get('triage'),
+                  "llm_result": job.data.get('llm_result'),
+                  "timings": {name: round(t, 3) for name, t in job.timings.items()}}
+        if job.error:
+            output["error"] = job.error
+        job.data['output_json'] = os.path.join(output_dir, names[job.item])
+        with open(job.data['output_json'], 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    pipe = Pipeline([
+        Stage('decode', decode, decode_workers),
+        Stage('transcribe', transcribe, transcribe_workers),
+        Stage('triage', triage_stage, extract_workers),
+        Stage('extract', extract, extract_workers),
+        Stage('write', write, 1),
+    ], queue_size=queue_size, run_on_error={'write'})
+
+    # Load the model before the clock starts so the first file does not pay for it
+    warm_up(model_size, dtype=compute_type, backend=backend)
+    start = time.time()
+
+    def report(job):
+        status = f"FAILED ({job.error})" if job.error else "ok"
+        timings = ', '.join(f"{name} {t:.2f}s" for name, t in job.timings.items())
+        print(f"[{job.index + 1}/{len(files)}] {job.item}: {status} [{timings}]")
+
+    jobs = pipe.run(files, on_done=report)
+    elapsed = time.time() - start
+    print(f"\n[Timer] Pipeline processed {len(jobs)} file(s) in {elapsed:.2f} seconds.")
+    for name, busy in pipe.busy.items():
+        print(f"  {name:<10} busy {busy:8.2f}s ({busy / elapsed * 100 if elapsed else 0:5.1f}% of wall time)")
+    return jobs
+
+
+def pipeline_main(argv):
+    parser = argparse.ArgumentParser(description="Transcribe and analyze many audio files with overlapping stages.")
+    parser.add_argument('inputs', nargs='+', help="Audio directory, glob pattern (quote it) or file paths")
+    parser.add_argument('output_dir', help="Folder for the per-file JSON outputs")
+    parser.add_argument('--model', default='base', help="Whisper model size: tiny, base, small, medium, large")
+    parser.add_argument('--language', default='en', help="Force language (e.g., 'en'). Default: en.")
+    parser.add_argument('--decode-workers', type=int, default=2, help="Concurrent audio decodes (default: 2)")
+    parser.add_argument('--transcribe-workers', type=int, default=1, help="Concurrent Whisper runs (default: 1)")
+    parser.add_argument('--extract-workers', type=int, default=4, help="Concurrent LLM requests (default: 4)")
+    parser.add_argument('--queue-size', type=int, default=2, help="Max jobs waiting between stages (default: 2)")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached transcripts and re-run Whisper")
+    parser.add_argument('--no-llm-cache', action='store_true', help="Ignore cached LLM responses and query the model again")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and squelch before transcribing")
+    parser.add_argument('--no-fast-path', action='store_true', help="Send every field to the LLM instead of filling formulaic ones with rules")
+    parser.add_argument('--no-triage', action='store_true', help="Run full extraction even on transcripts that are not distress calls")
+    parser.add_argument('--triage-llm', action='store_true', help="Ask the LLM (one-token answer) when keyword triage is unsure")
+    add_backend_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Reports land in the output folder as pipeline.profile.txt / .prof / .trace.json
+    with profile_run(os.path.join(args.output_dir, 'pipeline'), enabled=args.profile, memory=args.profile_memory):
+        jobs = run_pipeline(args.inputs, args.output_dir, model_size=args.model, language=args.language,
+                            decode_workers=args.decode_workers, transcribe_workers=args.transcribe_workers,
+                            extract_workers=args.extract_workers, queue_size=args.queue_size,
+                            use_cache=not args.no_cache, use_llm_cache=not args.no_llm_cache, vad=args.vad,
+                            fast_path=not args.no_fast_path, use_triage=not args.no_triage, triage_llm=args.triage_llm,
+                            backend=args.backend, compute_type=args.compute_type)
+    if any(job.error for job in jobs):
+        sys.exit(1)
+
+
+@tracing.traced('main')
 def main():
+    # 'pipeline' as the first argument switches to multi-file mode
+    if len(sys.argv) > 1 and sys.argv[1] == 'pipeline':
+        pipeline_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Transcribe audio and analyze with LLM, output JSON.")
     parser.add_argument('input_audio', help="Path to input audio file")
     parser.add_argument('output_json', help="Path to output JSON file")
     parser.add_argument('--model', default='base', help="Whisper model size: tiny, base, small, medium, large")
     parser.add_argument('--language', default='en', help="Force language (e.g., 'en'). Default: auto-detect.")
     parser.add_argument('--hf_token', default=None, help="Optional: Hugging Face token for pyannote-audio")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached transcripts and re-run Whisper")
+    parser.add_argument('--no-llm-cache', action='store_true', help="Ignore cached LLM responses and query the model again")
+    parser.add_argument('--stream', action='store_true', help="Stream the LLM response and print each field as soon as it is complete")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and squelch before transcribing")
+    parser.add_argument('--no-fast-path', action='store_true', help="Send every field to the LLM instead of filling formulaic ones with rules")
+    parser.add_argument('--no-triage', action='store_true', help="Run full extraction even on transcripts that are not distress calls")
+    parser.add_argument('--triage-llm', action='store_true', help="Ask the LLM (one-token answer) when keyword triage is unsure")
+    add_backend_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    with profile_run(args.output_json, enabled=args.profile, memory=args.profile_memory):
+        analyze_file(args)
+
+
+def analyze_file(args):
+    """Transcribe, triage and extract one audio file as configured by main()'s arguments, then write the JSON."""
+    import time
+    from simple_transcribe import transcribe_audio  # The audio stack is only imported once there is audio
+    timings = {}
+
     # Transcribe audio
+    start = time.perf_counter()
     transcript = transcribe_audio(
         args.input_audio,
         output_txt=None,
         model_size=args.model,
-        language=args.language
+        language=args.language,
+        use_cache=not args.no_cache,
+        vad=args.vad,
+        backend=args.backend,
+        compute_type=args.compute_type
     )
+    timings['transcribe'] = time.perf_counter() - start
 
-    # Query LLM with transcript
-    llm_result = call_mistral(transcript)
+    # Query LLM with transcript, unless triage says this is routine traffic
+    llm_result = None
+    triage_result = None
+    try:
+        if not args.no_triage:
+            start = time.perf_counter()
+            with tracing.span('triage') as span:
+                triage_result = triage(transcript, use_llm=args.triage_llm, use_cache=not args.no_llm_cache)
+                span.set(decision=triage_result['decision'], method=triage_result['method'])
+            timings['triage'] = time.perf_counter() - start
+            print(f"[Triage] {triage_result['decision']} (score {triage_result['score']}, {triage_result['method']})")
+        start = time.perf_counter()
+        if triage_result is not None and not triage_result['extract']:
+            print("[Triage] Not a distress call; skipping full extraction.")
+        elif args.stream:
+            def print_field(name, field):
+                print(f"[LLM] {name}: {json.dumps(field, ensure_ascii=False)}", flush=True)
+            with tracing.span('extract', stream=True):
+                llm_result = call_mistral_stream(transcript, on_field=print_field, use_cache=not args.no_llm_cache,
+                                                 fast_path=not args.no_fast_path)
+        else:
+            with tracing.span('extract'):
+                llm_result = call_mistral(transcript, use_cache=not args.no_llm_cache, fast_path=not args.no_fast_path)
+        if llm_result is not None:
+            timings['extract'] = time.perf_counter() - start
+    except LLMError as e:
+        print(f"LLM extraction failed: {e}")
+        sys.exit(1)
 
     # Compose output JSON
     output = {
         "transcript": transcript,
-        "llm_result": llm_result
+        "triage": triage_result,
+        "llm_result": llm_result,
+        "timings": {name: round(t, 3) for name, t in timings.items()}
     }
 
     # Save to JSON file
-    with open(args.output_json, 'w', encoding='utf-8') as f:
+    with tracing.span('write', path=args.output_json), open(args.output_json, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
     print(f"Output saved to {args.output_json}")
 
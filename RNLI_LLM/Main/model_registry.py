@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+
+import importlib.util  # For checking that whisper is installed without importing it
+import os  # For reading the memory budget from the environment
+import threading  # For thread-safe lazy loading
+import time  # For last-used timestamps
+from collections import OrderedDict  # For LRU ordering of loaded models
+from contextlib import contextmanager
+
+import tracing
+from faster_whisper_backend import CPU_COMPUTE_TYPES, FasterWhisperModel, load_faster_whisper_model
+
+# Default memory budget (in MB) for all loaded models. 0 means "no limit".
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get('RNLI_WHISPER_MEMORY_BUDGET_MB', '0'))
+
+
+def _default_device():
+    """Pick CUDA when available, otherwise CPU (same rule as whisper.load_model)."""
+    try:
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    except ImportError:
+        return 'cpu'
+
+
+WHISPER_MISSING = ("The 'whisper' package is not installed. Install it with: pip install openai-whisper torch "
+                   "(see the README for details).")
+FASTER_WHISPER_MISSING = ("The 'faster_whisper' package is not installed. Install it with: pip install faster-whisper "
+                          "(see the README for details).")
+
+
+def whisper_available():
+    """Check that openai-whisper is installed without importing it (importing pulls in torch)."""
+    return importlib.util.find_spec('whisper') is not None
+
+
+def backend_available(backend='whisper'):
+    """Check that the package behind an ASR backend is installed, without importing it."""
+    return importlib.util.find_spec(BACKENDS[backend]['package']) is not None
+
+
+def backend_missing(backend='whisper'):
+    """Install hint for a backend whose package is missing."""
+    return BACKENDS[backend]['missing']
+
+
+def load_whisper_model(model_size, device, dtype):
+    """
+    Load an openai-whisper checkpoint onto the given device.
+    Args:
+        model_size (str): Whisper model size (tiny, base, small, medium, large)
+        device (str): Torch device string, e.g. 'cpu' or 'cuda'
+        dtype (str): 'float32' or 'float16'
+    """
+    import whisper
+    model = whisper.load_model(model_size, device=device)
+    if dtype == 'float16':
+        model = model.half()
+    # Encoder/decoder time shows up on whatever span runs the model
+    return tracing.instrument_whisper(model)
+
+
+# ASR engines: each returns models whose transcribe(audio, language=..., task=..., verbose=...)
+# gives {'text', 'segments', 'language'}. dtype doubles as the engine's compute type.
+BACKENDS = {
+    'whisper': {'loader': load_whisper_model, 'dtype': 'float32', 'package': 'whisper',
+                'missing': WHISPER_MISSING},
+    'faster-whisper': {'loader': load_faster_whisper_model, 'dtype': 'int8', 'package': 'faster_whisper',
+                       'missing': FASTER_WHISPER_MISSING},
+}
+DEFAULT_BACKEND = 'whisper'
+
+
+def backend_cache_options(backend=DEFAULT_BACKEND, dtype=None):
+    """
+    Transcript-cache options that tell engines apart. Empty for openai-whisper, so
+    transcripts cached before backends existed stay valid.
+    """
+    if backend == DEFAULT_BACKEND:
+        return {}
+    return {'backend': backend, 'compute_type': dtype or BACKENDS[backend]['dtype']}
+
+
+def add_backend_arguments(parser):
+    """Add --backend and --compute-type to an argparse parser."""
+    parser.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help="ASR engine: openai-whisper (torch) or faster-whisper (CTranslate2, much faster on "
+                             "CPU) (default: whisper)")
+    parser.add_argument('--compute-type', default=None,
+                        help="Engine precision. whisper: float32 (default) or float16; faster-whisper: "
+                             f"{' or '.join(CPU_COMPUTE_TYPES)} on CPU (default: int8), float16 on GPU")
+
+
+def estimate_model_bytes(model):
+    """
+    Estimate the resident size of a model: a torch model from its parameters and
+    buffers, a faster-whisper model from its size and compute type.
+    """
+    if isinstance(model, FasterWhisperModel):
+        return model.estimated_bytes()
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class _Entry:
+    """A loaded model plus its bookkeeping."""
+
+    def __init__(self, model, size_bytes):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.in_use = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models keyed by (model size, device, dtype).
+
+    Models are loaded lazily on first use, at most once per key even when many
+    threads ask for the same model at the same time. When the total estimated
+    size of loaded models exceeds the memory budget, the least recently used
+    idle models are unloaded.
+    """
+
+    def __init__(self, loader=load_whisper_model, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 size_estimator=estimate_model_bytes, default_dtype='float32'):
+        self._loader = loader
+        self._default_dtype = default_dtype
+        self._size_estimator = size_estimator
+        self._budget_bytes = int(memory_budget_mb) * 1024 * 1024
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._key_locks = {}  # key -> Lock held while that key is loading
+        self._lock = threading.RLock()
+
+    def _key(self, model_size, device, dtype):
+        return (model_size, device or _default_device(), dtype or self._default_dtype)
+
+    def set_memory_budget(self, memory_budget_mb):
+        """Change the memory budget (in MB, 0 = unlimited) and evict if now over it."""
+        with self._lock:
+            self._budget_bytes = int(memory_budget_mb) * 1024 * 1024
+            self._evict()
+
+    def get(self, model_size, device=None, dtype=None):
+        """
+        Return the model for the given key, loading it on first use.
+        Args:
+            model_size (str): Whisper model size (tiny, base, small, medium, large)
+            device (str, optional): Torch device; defaults to CUDA if available, else CPU
+            dtype (str, optional): Precision / compute type; defaults to the registry's
+                default_dtype ('float32' for openai-whisper)
+        """
+        key = self._key(model_size, device, dtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._touch(key, entry)
+                return entry.model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other keys stay available meanwhile
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._touch(key, entry)
+                    return entry.model
+            with tracing.span('model_load', model=model_size, device=key[1], dtype=key[2]):
+                model = self._loader(*key)
+            entry = _Entry(model, self._size_estimator(model))
+            print(f"Loaded Whisper model: {model_size} ({key[1]}, {key[2]})")
+            with self._lock:
+                self._entries[key] = entry
+                self._key_locks.pop(key, None)
+                self._evict(keep=key)
+            return model
+
+    @contextmanager
+    def use(self, model_size, device=None, dtype=None):
+        """Context manager that pins the model so it cannot be evicted while in use."""
+        key = self._key(model_size, device, dtype)
+        while True:
+            model = self.get(model_size, device, dtype)
+            with self._lock:
+                entry = self._entries.get(key)
+                # The model may have been evicted between get() and pinning it
+                if entry is not None and entry.model is model:
+                    entry.in_use += 1
+                    break
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+                self._evict()
+
+    def warm_up(self, model_sizes, device=None, dtype=None):
+        """Load the given model sizes ahead of time."""
+        if isinstance(model_sizes, str):
+            model_sizes = [model_sizes]
+        for model_size in model_sizes:
+            self.get(model_size, device, dtype)
+
+    def unload(self, model_size=None, device=None, dtype=None):
+        """
+        Unload idle models. With no model_size every idle model is unloaded;
+        otherwise only the matching key. Returns the number of models unloaded.
+        """
+        with self._lock:
+            if model_size is None:
+                keys = [k for k, e in self._entries.items() if e.in_use == 0]
+            else:
+                key = self._key(model_size, device, dtype)
+                entry = self._entries.get(key)
+                keys = [key] if entry is not None and entry.in_use == 0 else []
+            for key in keys:
+                self._drop(key)
+        if keys:
+            _release_memory()
+        return len(keys)
+
+    def loaded(self):
+        """Return a list of (key, size_bytes, in_use) for every loaded model, LRU first."""
+        with self._lock:
+            return [(k, e.size_bytes, e.in_use) for k, e in self._entries.items()]
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(e.size_bytes for e in self._entries.values())
+
+    def _touch(self, key, entry):
+        entry.last_used = time.time()
+        self._entries.move_to_end(key)
+
+    def _drop(self, key):
+        del self._entries[key]
+        print(f"Unloaded Whisper model: {key[0]} ({key[1]}, {key[2]})")
+
+    def _evict(self, keep=None):
+        """Unload least recently used idle models until under the memory budget."""
+        if not self._budget_bytes:
+            return
+        evicted = False
+        for key in list(self._entries):
+            if self.total_bytes() <= self._budget_bytes:
+                break
+            entry = self._entries[key]
+            if key == keep or entry.in_use:
+                continue
+            self._drop(key)
+            evicted = True
+        if evicted:
+            _release_memory()
+
+
+def _release_memory():
+    """Give freed model memory back to the allocator."""
+    import gc
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+# Shared registries (one per backend) used by every transcribe entry point
+_REGISTRIES = {name: ModelRegistry(loader=spec['loader'], default_dtype=spec['dtype'])
+               for name, spec in BACKENDS.items()}
+
+
+def get_registry(backend=DEFAULT_BACKEND):
+    """Return the process-wide model registry for a backend."""
+    return _REGISTRIES[backend]
+
+
+def get_model(model_size, device=None, dtype=None, backend=DEFAULT_BACKEND):
+    """Return a (possibly cached) model from the process-wide registry."""
+    return _REGISTRIES[backend].get(model_size, device, dtype)
+
+
+def use_model(model_size, device=None, dtype=None, backend=DEFAULT_BACKEND):
+    """Pin a model from the process-wide registry for the duration of a with-block."""
+    return _REGISTRIES[backend].use(model_size, device, dtype)
+
+
+def warm_up(model_sizes, device=None, dtype=None, backend=DEFAULT_BACKEND):
+    """Preload models into the process-wide registry."""
+    _REGISTRIES[backend].warm_up(model_sizes, device, dtype)
+
+
+def unload(model_size=None, device=None, dtype=None, backend=None):
+    """Unload idle models from the process-wide registries (every backend unless one is named)."""
+    registries = [_REGISTRIES[backend]] if backend else _REGISTRIES.values()
+    return sum(registry.unload(model_size, device, dtype) for registry in registries)
+
+
+def set_memory_budget(memory_budget_mb):
+    """Set the memory budget in MB (0 = unlimited) of each backend's process-wide registry."""
+    for registry in _REGISTRIES.values():
+        registry.set_memory_budget(memory_budget_mb)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+import queue  # For the bounded queues between stages
+import threading  # For stage bookkeeping
+import time  # For per-stage timings
+from concurrent.futures import ThreadPoolExecutor  # One executor per stage
+
+from profiling import release_thread
+import tracing
+
+# Marks the end of the input on a stage queue
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of a pipeline.
+    Args:
+        name (str): Stage name, used in timings and error messages
+        fn (callable): fn(job) does the work, reading and writing job.data
+        concurrency (int): Number of workers running this stage in parallel
+    """
+
+    def __init__(self, name, fn, concurrency=1):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, int(concurrency))
+
+
+class Job:
+    """A single item flowing through the pipeline."""
+
+    def __init__(self, index, item, trace_context=None):
+        self.index = index
+        self.item = item
+        self.trace_context = trace_context  # tracing.context() of the run, parent of this job's stage spans
+        self.data = {}
+        self.error = None
+        self.timings = {}  # stage name -> seconds spent in that stage
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages. Each stage has its own executor and
+    worker count; stages are connected by bounded queues, so a slow stage
+    applies backpressure to the ones before it instead of letting work pile up.
+    While one item is in a later stage (e.g. the LLM call for file N) the earlier
+    stages are already working on the next items (transcribing file N+1), so
+    sustained throughput approaches that of the slowest stage.
+
+    A job whose stage raises keeps flowing with job.error set; later stages skip it
+    unless they were created with run_on_error=True (e.g. a writer that records failures).
+    """
+
+    def __init__(self, stages, queue_size=2, run_on_error=()):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.run_on_error = set(run_on_error)
+        self.busy = {stage.name: 0.0 for stage in self.stages}  # Total seconds spent per stage
+        self._lock = threading.Lock()
+
+    def run(self, items, on_done=None):
+        """
+        Push items through every stage and return the finished jobs in input order.
+        on_done(job) is called from the caller's thread as each job leaves the last stage.
+        The run is one 'pipeline' span; every stage span is its child, whichever thread ran it.
+        """
+        with tracing.span('pipeline', stages=len(self.stages)):
+            return self._run(items, on_done)
+
+    def _run(self, items, on_done):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = queue.Queue()
+        remaining = [stage.concurrency for stage in self.stages]
+        executors = [ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=f'stage-{stage.name}')
+                     for stage in self.stages]
+
+        def worker(i):
+            stage = self.stages[i]
+            out = queues[i + 1] if i + 1 < len(self.stages) else results
+            while True:
+                job = queues[i].get()
+                release_thread()
+                if job is _STOP:
+                    break
+                if job.error is None or stage.name in self.run_on_error:
+                    start = time.perf_counter()
+                    try:
+                        with tracing.span(stage.name, parent=job.trace_context, job=job.index):
+                            stage.fn(job)
+                    except Exception as e:
+                        if job.error is None:
+                            job.error = f"{stage.name}: {type(e).__name__}: {e}"
+                    elapsed = time.perf_counter() - start
+                    job.timings[stage.name] = elapsed
+                    with self._lock:
+                        self.busy[stage.name] += elapsed
+                out.put(job)  # Blocks while the next stage is saturated
+            # The last worker of this stage to finish tells the next stage to stop
+            with self._lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last:
+                if i + 1 < len(self.stages):
+                    for _ in range(self.stages[i + 1].concurrency):
+                        queues[i + 1].put(_STOP)
+                else:
+                    results.put(_STOP)
+
+        futures = []
+        for i, stage in enumerate(self.stages):
+            futures += [executors[i].submit(worker, i) for _ in range(stage.concurrency)]
+
+        # Stages run on worker threads, which have no open span, so link them to the run explicitly
+        trace_context = tracing.context()
+
+        def feed():
+            for index, item in enumerate(items):
+                queues[0].put(Job(index, item, trace_context))
+            for _ in range(self.stages[0].concurrency):
+                queues[0].put(_STOP)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        finished = []
+        while True:
+            job = results.get()
+            if job is _STOP:
+                break
+            finished.append(job)
+            if on_done is not None:
+                on_done(job)
+
+        feeder.join()
+        for executor in executors:
+            executor.shutdown()
+        for future in futures:
+            future.result()  # Surface bugs in the pipeline machinery itself
+        return sorted(finished, key=lambda job: job.index)
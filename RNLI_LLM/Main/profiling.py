@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+import cProfile  # For the Python-level CPU profile
+import io  # For rendering pstats into the report
+import os  # For output paths
+import pstats  # For the sorted stats report
+import sys  # For the per-thread profiler hook
+import threading  # For profiling worker threads too
+import time  # For wall time
+import tracemalloc  # For the optional allocation report
+from contextlib import contextmanager
+
+try:
+    import resource  # Peak RSS (not available on Windows)
+except ImportError:
+    resource = None
+
+REPORT_ROWS = 40  # Functions / operators listed in each report section
+ALLOCATION_ROWS = 20  # tracemalloc lines listed with --profile-memory
+
+
+def add_profile_arguments(parser):
+    """Add the --profile / --profile-memory flags shared by the entry points."""
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the run (cProfile + torch.profiler) and write the reports next to the output")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="With --profile: also record peak RSS and the top tracemalloc allocators (slower)")
+
+
+def profile_paths(prefix):
+    """Files written for a profiled run whose output is `prefix` (its extension is dropped)."""
+    base = os.path.splitext(prefix)[0]
+    return {
+        'report': base + '.profile.txt',  # Sorted cProfile + torch operator tables
+        'stats': base + '.prof',  # Raw cProfile stats (snakeviz, pstats)
+        'chrome_trace': base + '.trace.json',  # torch.profiler trace for chrome://tracing or Perfetto
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+_THREAD = threading.local()  # (_ThreadProfiles, profiler) started on this thread, if any
+
+
+class _ThreadProfiles:
+    """
+    cProfile only sees the thread that enabled it, and only that thread can
+    disable it. While installed, every new thread (pipeline stage workers, LLM
+    request threads) starts its own profiler; their stats are merged into the
+    report afterwards. Threads still running when the run ends stop theirs at
+    their next release_thread() call.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self.active = True
+        self._lock = threading.Lock()
+
+    def _start(self, frame, event, arg):
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # Python 3.12+: the main profiler already covers every thread
+        _THREAD.profile = (self, profile)
+        with self._lock:
+            self.profiles.append(profile)
+
+    def install(self):
+        threading.setprofile(self._start)
+
+    def uninstall(self):
+        threading.setprofile(None)
+        self.active = False
+
+
+def release_thread():
+    """
+    Stop the calling thread's profiler if the profile_run that started it has
+    ended. Long-lived worker threads call this between jobs, so they do not
+    keep profiling after --profile is over.
+    """
+    started = getattr(_THREAD, 'profile', None)
+    if started is not None and not started[0].active:
+        started[1].disable()
+        _THREAD.profile = None
+
+
+def _torch_profiler():
+    try:
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        return None
+    return profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+
+
+@contextmanager
+def profile_run(prefix, enabled=True, memory=False):
+    """
+    Profile the enclosed block when `enabled` (a no-op otherwise) and write:
+      <prefix>.profile.txt  cProfile functions sorted by cumulative and own time, the
+                            torch operator table, peak RSS and (with memory=True) the
+                            top tracemalloc allocation sites
+      <prefix>.prof         raw cProfile stats
+      <prefix>.trace.json   torch.profiler Chrome trace (CPU activities), if torch is installed
+    The reports are written even if the block raises or calls sys.exit.
+    Args:
+        prefix (str): Output path the reports are placed next to (its extension is dropped)
+        enabled (bool): Profile at all (lets callers pass args.profile straight through)
+        memory (bool): Also trace Python allocations (slows the run down noticeably)
+    """
+    if not enabled:
+        yield None
+        return
+    paths = profile_paths(prefix)
+    directory = os.path.dirname(os.path.abspath(paths['report']))
+    os.makedirs(directory, exist_ok=True)
+
+    if memory:
+        tracemalloc.start(25)
+    torch_prof = _torch_profiler()
+    threads = _ThreadProfiles()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    if torch_prof is not None:
+        torch_prof.__enter__()
+    threads.install()
+    profiler.enable()
+    try:
+        yield paths
+    finally:
+        profiler.disable()
+        threads.uninstall()
+        if torch_prof is not None:
+            torch_prof.__exit__(None, None, None)
+        wall = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot() if memory else None
+        traced_peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+        _write_reports(paths, profiler, threads.profiles, torch_prof, wall, snapshot, traced_peak)
+
+
+def _write_reports(paths, profiler, thread_profiles, torch_prof, wall, snapshot, traced_peak):
+    stats = pstats.Stats(profiler)
+    for profile in thread_profiles:
+        try:
+            stats.add(profile)
+        except TypeError:
+            pass  # A thread that never made a call has no stats
+    stats.dump_stats(paths['stats'])
+
+    out = io.StringIO()
+    rss = peak_rss_mb()
+    out.write(f"Wall time: {wall:.2f}s\n")
+    out.write(f"Peak RSS: {rss:.1f} MB\n" if rss is not None else "Peak RSS: unavailable on this platform\n")
+    out.write(f"Threads profiled: {1 + len(thread_profiles)}\n")
+    for sort in ('cumulative', 'tottime'):
+        out.write(f"\n=== Python functions by {sort} time ===\n")
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(REPORT_ROWS)
+
+    if torch_prof is not None:
+        torch_prof.export_chrome_trace(paths['chrome_trace'])
+        out.write("\n=== torch operators by self CPU time ===\n")
+        out.write(torch_prof.key_averages().table(sort_by='self_cpu_time_total', row_limit=REPORT_ROWS))
+        out.write("\n")
+    else:
+        paths.pop('chrome_trace')
+        out.write("\n(torch is not installed: no operator profile or Chrome trace)\n")
+
+    if snapshot is not None:
+        out.write(f"\n=== Top {ALLOCATION_ROWS} allocation sites (traced peak {traced_peak / 2**20:.1f} MB) ===\n")
+        for stat in snapshot.statistics('lineno')[:ALLOCATION_ROWS]:
+            out.write(f"{stat.size / 2**20:9.2f} MB {stat.count:8d} blocks  {stat.traceback[0]}\n")
+
+    with open(paths['report'], 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+    print(f"[Profile] {wall:.2f}s profiled; " + ', '.join(f"{k}: {v}" for k, v in paths.items()))
@@ -1,35 +1,40 @@
 import sys
 import os
 import argparse
-import whisper
-import subprocess
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from model_registry import DEFAULT_BACKEND, add_backend_arguments, backend_cache_options, use_model
+from audio_io import AudioDecodeError, load_audio
+from transcript_cache import cached_transcribe
+from vad import transcribe_speech_only
 
-def convert_audio_to_wav(input_audio, temp_wav):
-    """Convert any audio file to a temporary WAV file using ffmpeg."""
-    try:
-        subprocess.run(['ffmpeg', '-i', input_audio, '-ar', '16000', '-ac', '1', temp_wav], check=True)
-        print(f"Converted {input_audio} to {temp_wav}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error converting audio file: {e}")
-        sys.exit(1)
 
+def transcribe_audio(input_audio, output_txt, model_size='base', language='en', use_cache=True, vad=False,
+                     backend=DEFAULT_BACKEND, compute_type=None):
+    def run_whisper():
+        audio = input_audio
+        # Decode straight into memory (no temp_audio.wav, so concurrent runs cannot collide)
+        if isinstance(audio, str):
+            print("Decoding audio...")
+            try:
+                audio = load_audio(audio)
+            except AudioDecodeError as e:
+                print(f"Error converting audio file: {e}")
+                sys.exit(1)
+        # Transcribe the decoded samples with the shared (cached) model
+        with use_model(model_size, dtype=compute_type, backend=backend) as model:
+            if vad:
+                # Only the speech regions reach the encoder
+                return transcribe_speech_only(model, audio, language=language, verbose=True, task='transcribe')
+            return model.transcribe(audio, language=language, verbose=True, task='transcribe')
 
-def transcribe_audio(input_audio, output_txt, model_size='base', language='en'):
-    print("Converting audio to WAV format...")
-    
-    # Temporary WAV file path
-    temp_wav = "temp_audio.wav"
-    
-    # Convert the input audio to WAV format
-    convert_audio_to_wav(input_audio, temp_wav)
-
-    model = whisper.load_model(model_size)
-    print(f"Loaded Whisper model: {model_size}")
-    
+    options = {'task': 'transcribe'}
+    if vad:
+        options['vad'] = True
+    options.update(backend_cache_options(backend, compute_type))
     try:
-        # Transcribe the converted WAV file
-        result = model.transcribe(temp_wav, language=language, verbose=True, task='transcribe')
+        # Reruns on the same audio (e.g. after LLM prompt tweaks) come from the transcript cache
+        result = cached_transcribe(input_audio, model_size, language, options, run_whisper, use_cache=use_cache)
     except Exception as e:
         print("Audio loading failed. Make sure your input file is valid.")
         print(f"Error: {e}")
@@ -46,9 +51,6 @@ def transcribe_audio(input_audio, output_txt, model_size='base', language='en'):
     # Print detected language
     print(f"Detected language: {result['language']}")
 
-    # Clean up temporary WAV file
-    os.remove(temp_wav)
-
     return transcript
 
 
@@ -56,13 +58,18 @@ def main():
     parser = argparse.ArgumentParser(description="Transcribe audio files using Whisper.")
     parser.add_argument('input_audio', help="Path to input audio file (any format supported by ffmpeg)")
     parser.add_argument('output_txt', help="Path to output .txt file for transcription")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and squelch before transcribing")
+    add_backend_arguments(parser)
     args = parser.parse_args()
 
     transcript = transcribe_audio(
         args.input_audio,
         output_txt=args.output_txt,
         model_size='base',
-        language='en'
+        language='en',
+        vad=args.vad,
+        backend=args.backend,
+        compute_type=args.compute_type
     )
     print("\nTranscription complete.\n")
     print(transcript)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import json  # For the JSON report
+import os  # For file path operations
+import re  # For parsing -X importtime output
+import subprocess  # For running each entry point in a fresh interpreter
+import sys  # For the interpreter path and exit status
+import time  # For wall time
+
+MAIN_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(MAIN_DIR)
+
+# Modules that cost hundreds of milliseconds to seconds to import. None of them may be
+# imported just to parse arguments or to load the LLM client.
+HEAVY_MODULES = ('whisper', 'torch', 'librosa', 'pyannote', 'requests', 'numpy')
+
+# name -> (command line, import-time budget in ms). The budgets are about 2.5x what these take
+# on a laptop, so they only trip when something heavy creeps back into startup.
+ENTRY_POINTS = {
+    'Transcribe_ffmpeg --help': ([os.path.join(PACKAGE_DIR, 'Transcribe_ffmpeg.py'), '--help'], 300),
+    'Transcript --help': ([os.path.join(MAIN_DIR, 'Transcript.py'), '--help'], 300),
+    'main --help': ([os.path.join(MAIN_DIR, 'main.py'), '--help'], 350),
+    'main pipeline --help': ([os.path.join(MAIN_DIR, 'main.py'), 'pipeline', '--help'], 350),
+    'daemon client --help': ([os.path.join(MAIN_DIR, 'daemon.py'), '--help'], 400),
+    'LLM-only import': (['-c', f'import sys; sys.path.insert(0, {MAIN_DIR!r}); import LLM, triage'], 300),
+}
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)\s*$')
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output.
+    Returns:
+        tuple: (total import time in microseconds, {module: cumulative us})
+    """
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules[name] = int(cumulative)
+        if not indent:
+            total += int(cumulative)  # Top-level imports include everything they import
+    return total, modules
+
+
+def measure(args, runs=3):
+    """
+    Run `python -X importtime <args>` in fresh interpreters and return the fastest run's
+    {'import_ms', 'wall_ms', 'heavy', 'slowest', 'returncode'}. The fastest of several runs
+    filters out scheduling noise.
+    """
+    best = None
+    heavy = set()
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=PACKAGE_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall_ms = (time.perf_counter() - start) * 1000
+        total, modules = parse_importtime(proc.stderr)
+        result = {
+            'import_ms': round(total / 1000, 1),
+            'wall_ms': round(wall_ms, 1),
+            'slowest': sorted(((round(us / 1000, 1), name) for name, us in modules.items() if '.' not in name),
+                              reverse=True)[:5],
+            'returncode': proc.returncode,
+        }
+        heavy |= {name.split('.')[0] for name in modules} & set(HEAVY_MODULES)
+        if best is None or result['import_ms'] < best['import_ms']:
+            best = result
+    best['heavy'] = sorted(heavy)
+    return best
+
+
+def check(entry_points=None, runs=3, budget_scale=1.0):
+    """
+    Measure every entry point and compare it with its budget.
+    Returns:
+        dict: name -> measurement plus 'budget_ms' and 'ok'
+    """
+    results = {}
+    for name, (args, budget_ms) in (entry_points or ENTRY_POINTS).items():
+        result = measure(args, runs)
+        result['budget_ms'] = budget_ms * budget_scale
+        result['ok'] = not result['heavy'] and result['import_ms'] <= result['budget_ms']
+        results[name] = result
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when CLI startup imports heavy modules or exceeds its "
+                                                 "import-time budget (measured with python -X importtime).")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per entry point; the fastest counts (default: 3)")
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="Multiply every budget (e.g. 2 on a slow CI machine)")
+    parser.add_argument('--json', default=None, help="Also write the measurements to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = check(runs=args.runs, budget_scale=args.budget_scale)
+    for name, r in results.items():
+        status = 'ok' if r['ok'] else 'FAIL'
+        print(f"{status:<4} {name:<26} imports {r['import_ms']:7.1f} ms (budget {r['budget_ms']:.0f}), "
+              f"wall {r['wall_ms']:7.1f} ms")
+        if r['heavy']:
+            print(f"     heavy modules imported: {', '.join(r['heavy'])}")
+        if not r['ok']:
+            print("     slowest imports: " + ', '.join(f"{n} {ms} ms" for ms, n in r['slowest']))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if not all(r['ok'] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
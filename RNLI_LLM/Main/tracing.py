@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+
+import functools  # For the entry-point decorator
+import json  # For the JSON-lines trace exporter
+import os  # For exporter paths from the environment and atomic writes
+import tempfile  # For atomic metric file writes
+import threading  # For the per-thread span stack and shared metrics
+import time  # For span timings
+import uuid  # For trace and span ids
+from contextlib import contextmanager
+
+# Exporters are enabled by pointing these at files (or with configure())
+TRACE_FILE = os.environ.get('RNLI_TRACE_FILE')  # JSON lines, one span per line (appended)
+METRICS_FILE = os.environ.get('RNLI_METRICS_FILE')  # Prometheus text format (rewritten on flush)
+
+METRIC_PREFIX = 'rnli'
+MAX_BUFFERED_SPANS = 10000  # Spans kept in memory between flushes
+
+
+class Span:
+    """One timed operation. Attributes set with .set() end up in the exported record."""
+
+    def __init__(self, name, trace_id, parent_id, attrs):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.start = time.time()
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, name, value):
+        """Accumulate a numeric attribute (e.g. seconds spent in the encoder)."""
+        self.attrs[name] = self.attrs.get(name, 0) + value
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_s': round(self.duration, 6) if self.duration is not None else None,
+            'attrs': self.attrs,
+        }
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is disabled, so call sites need no checks."""
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans and metrics for one process.
+    Spans nest per thread: a span opened inside another becomes its child and
+    shares its trace id. A span with no open parent on its thread joins the
+    trace given as parent= (a context() taken on another thread or in another
+    process), or else starts a new trace.
+    Every finished span also feeds the rnli_span_seconds summary, counters
+    (e.g. LLM token usage) feed rnli_<name>_total. Nothing is recorded unless
+    at least one exporter path is set.
+    """
+
+    def __init__(self, trace_path=None, metrics_path=None):
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._spans = []
+        self._timers = {}  # (metric, labels) -> [count, sum]
+        self._counters = {}  # (metric, labels) -> value
+
+    @property
+    def enabled(self):
+        return bool(self.trace_path or self.metrics_path)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        """Return the innermost open span on this thread (a no-op span if none)."""
+        stack = self._stack() if self.enabled else None
+        return stack[-1] if stack else _NULL_SPAN
+
+    def context(self):
+        """Return (trace_id, span_id) of the innermost open span on this thread, or None."""
+        stack = self._stack() if self.enabled else None
+        return (stack[-1].trace_id, stack[-1].span_id) if stack else None
+
+    @contextmanager
+    def span(self, name, parent=None, **attrs):
+        """
+        Time the enclosed block as a span named `name` and yield it. parent is a
+        context() to attach to when no span is open on this thread (worker threads
+        and processes).
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        stack = self._stack()
+        if stack:
+            trace_id, parent_id = stack[-1].trace_id, stack[-1].span_id
+        elif parent is not None:
+            trace_id, parent_id = parent
+        else:
+            trace_id, parent_id = uuid.uuid4().hex, None
+        span = Span(name, trace_id, parent_id, attrs)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                if len(self._spans) < MAX_BUFFERED_SPANS:
+                    self._spans.append(span)
+                self._observe('span_seconds', (('span', name),), span.duration)
+
+    def add_time(self, name, seconds):
+        """
+        Record time spent in a sub-step that is too frequent for its own span
+        (e.g. one decoder forward pass per token): it is added to the current
+        span as `<name>_s` and to the rnli_span_seconds summary.
+        """
+        if not self.enabled:
+            return
+        self.current().add(f'{name}_s', seconds)
+        with self._lock:
+            self._observe('span_seconds', (('span', name),), seconds)
+
+    def count(self, name, value=1, **labels):
+        """Increment the counter rnli_<name>_total{labels} by value."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name, labels, seconds):
+        entry = self._timers.setdefault((name, labels), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def prometheus_text(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            timers = sorted(self._timers.items())
+            counters = sorted(self._counters.items())
+        lines = []
+        seen = set()
+        for (name, labels), (count, total) in timers:
+            metric = f'{METRIC_PREFIX}_{name}'
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f'# TYPE {metric} summary')
+            lines.append(f'{metric}_sum{_labels(labels)} {total:.6f}')
+            lines.append(f'{metric}_count{_labels(labels)} {count}')
+        for (name, labels), value in counters:
+            metric = f'{METRIC_PREFIX}_{name}_total'
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Append buffered spans to the trace file and rewrite the metrics file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if self.trace_path and spans:
+            # One write per flush, so processes appending to the same file do not interleave lines
+            with open(self.trace_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n'
+                                for span in spans))
+        if self.metrics_path:
+            directory = os.path.dirname(os.path.abspath(self.metrics_path))
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, self.metrics_path)  # Scrapers never see a half-written file
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{str(v)}"' for k, v in labels) + '}'
+
+
+_TRACER = Tracer(TRACE_FILE, METRICS_FILE)
+
+
+def get_tracer():
+    return _TRACER
+
+
+def configure(trace_path=None, metrics_path=None):
+    """Point the process-wide tracer at new exporter files (None disables that exporter)."""
+    _TRACER.flush()
+    _TRACER.trace_path = trace_path
+    _TRACER.metrics_path = metrics_path
+
+
+def span(name, parent=None, **attrs):
+    return _TRACER.span(name, parent=parent, **attrs)
+
+
+def context():
+    return _TRACER.context()
+
+
+def current_span():
+    return _TRACER.current()
+
+
+def add_time(name, seconds):
+    _TRACER.add_time(name, seconds)
+
+
+def count(name, value=1, **labels):
+    _TRACER.count(name, value, **labels)
+
+
+def record_usage(usage):
+    """Count LLM token usage from an OpenAI-style `usage` object and attach it to the current span."""
+    if not usage:
+        return
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        if usage.get(kind) is not None:
+            _TRACER.count('llm_tokens', usage[kind], kind=kind.split('_')[0])
+            _TRACER.current().add(kind, usage[kind])
+
+
+def flush():
+    _TRACER.flush()
+
+
+def traced(name):
+    """Decorator for entry points: run inside a root span named `name`, then flush the exporters (even on sys.exit)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                with span(name):
+                    return fn(*args, **kwargs)
+            finally:
+                flush()
+        return wrapper
+    return decorator
+
+
+def instrument_whisper(model):
+    """
+    Time every forward pass of a Whisper model's encoder and decoder. Each pass
+    is added to the enclosing span (encoder_s / decoder_s) and the metrics, so a
+    transcription span shows how its time splits between the two.
+    """
+    for part in ('encoder', 'decoder'):
+        module = getattr(model, part, None)
+        if module is None or not hasattr(module, 'register_forward_hook'):
+            continue
+        starts = threading.local()
+
+        def before(module, inputs, starts=starts):
+            starts.t = time.perf_counter()
+
+        def after(module, inputs, output, starts=starts, part=part):
+            if getattr(starts, 't', None) is not None:
+                _TRACER.add_time(f'whisper_{part}', time.perf_counter() - starts.t)
+                starts.t = None
+
+        module.register_forward_pre_hook(before)
+        module.register_forward_hook(after)
+    return model
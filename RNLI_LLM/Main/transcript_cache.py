@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+import hashlib  # For content-addressed keys
+import json  # For the on-disk entry format
+import os  # For file path operations
+import tempfile  # For atomic writes
+
+import tracing
+
+# Where cached transcripts live and how large the cache may grow
+DEFAULT_CACHE_DIR = os.environ.get(
+    'RNLI_TRANSCRIPT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'rnli_llm', 'transcripts'))
+DEFAULT_MAX_MB = int(os.environ.get('RNLI_TRANSCRIPT_CACHE_MB', '512'))
+
+# Bump when the stored entry layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+
+def hash_audio(audio):
+    """
+    SHA-256 of the audio content. File paths are hashed from their raw bytes
+    (no decoding needed); decoded arrays are hashed from their samples.
+    """
+    h = hashlib.sha256()
+    if isinstance(audio, str):
+        h.update(b'file:')
+        with open(audio, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    else:
+        import numpy as np
+        h.update(b'pcm_f32:')
+        h.update(memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast('B'))
+    return h.hexdigest()
+
+
+def make_key(audio_hash, model_size, language, options=None):
+    """Combine the audio hash with everything that changes the transcript."""
+    payload = json.dumps({
+        'v': CACHE_VERSION,
+        'audio': audio_hash,
+        'model': model_size,
+        'language': language,
+        'options': options or {},
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def evict_lru(directory, max_bytes, suffix, keep=None):
+    """
+    Delete the least recently used files ending in suffix under directory (except
+    keep) until they fit in max_bytes. A file's mtime is its LRU clock, so stores
+    refresh it on every hit. max_bytes of 0 means unlimited.
+    """
+    if not max_bytes:
+        return
+    entries = []
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already removed by a concurrent process
+        total -= size
+
+
+class TranscriptCache:
+    """
+    On-disk cache of Whisper results (text, segments, detected language).
+    Entries are JSON files sharded by the first two hex digits of their key,
+    written atomically, and evicted least-recently-used first once the cache
+    grows past max_mb. A hit refreshes the entry's mtime, which is its LRU clock.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb) * 1024 * 1024
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key):
+        """Return the cached result dict for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return entry.get('result')
+
+    def put(self, key, result):
+        """Atomically store a result dict and evict old entries if over budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'key': key, 'result': {
+            'text': result['text'],
+            'segments': result.get('segments', []),
+            'language': result.get('language'),
+        }}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, default=float)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Delete least recently used entries (except keep) until the cache fits in max_bytes."""
+        evict_lru(self.cache_dir, self.max_bytes, '.json', keep)
+
+    def clear(self):
+        """Remove every cached entry."""
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+
+_CACHE = TranscriptCache()
+
+
+def get_cache():
+    """Return the process-wide transcript cache."""
+    return _CACHE
+
+
+def lookup(audio, model_size, language, options, cache=None):
+    """Return (key, cached result or None) for the given audio and settings."""
+    cache = cache or _CACHE
+    key = make_key(hash_audio(audio), model_size, language, options)
+    return key, cache.get(key)
+
+
+def store(key, result, cache=None):
+    """Store a fresh Whisper result under a key from lookup(); write errors are only reported."""
+    cache = cache or _CACHE
+    try:
+        cache.put(key, result)
+    except OSError as e:
+        print(f"Warning: could not write transcript cache: {e}")
+
+
+def cached_transcribe(audio, model_size, language, options, transcribe_fn, use_cache=True, cache=None):
+    """
+    Return the Whisper result for audio, from the cache if possible.
+    Args:
+        audio (str or np.ndarray): Audio file path or decoded samples (used for the key)
+        model_size (str): Whisper model size
+        language (str or None): Requested language (None = auto-detect)
+        options (dict): Decoding options that affect the transcript
+        transcribe_fn (callable): Runs the real transcription and returns a Whisper result dict
+        use_cache (bool): Set to False to bypass the cache (the fresh result is still stored)
+        cache (TranscriptCache, optional): Defaults to the process-wide cache
+    """
+    key, result = lookup(audio, model_size, language, options, cache)
+    if use_cache and result is not None:
+        print(f"Loaded transcript from cache ({key[:12]})")
+        tracing.count('transcript_cache', result='hit')
+        return result
+    tracing.count('transcript_cache', result='miss')
+    with tracing.span('transcribe', model=model_size, language=language):
+        result = transcribe_fn()
+    store(key, result, cache)
+    return result
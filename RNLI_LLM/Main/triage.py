@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import re  # For the lexicon patterns
+import time  # For timing each triage decision
+
+# Phrases that point to a real Mayday/Pan-Pan call, with their weight. Each pattern counts once.
+DISTRESS_TERMS = {
+    r'\bmayday\b': 3.0,
+    r'\bpan[\s-]?pan\b': 3.0,
+    r'\bsos\b': 3.0,
+    r'\bdistress\b': 2.0,
+    r'taking\s+on\s+water|water\s+ingress|water\s+(?:is\s+)?coming\s+in|sinking|capsi[sz]ed|flooding|'
+    r'sprung\s+a\s+leak|hull\s+breach|cracked\s+hull': 2.5,
+    r'(?:man|person)\s+overboard|(?:fallen|fell)\s+in\b|(?:fallen|fell|gone|went)\s+overboard|\bmob\b|abandon(?:ing)?\s+ship|'
+    r'life\s?raft': 2.5,
+    r'\bfire\b|explosion|\bsmoke\b|\bburn(?:s|ed|t)?\b': 2.0,
+    r'aground|\bhit\s+(?:something|a\s+\w+|rocks?)|collision|collided': 2.0,
+    r'engines?\s+(?:\w+\s+)?(?:failure|failed|died|dead)|lost\s+(?:all\s+)?(?:power|steerage|steering|engine)|'
+    r'dead\s+in\s+the\s+water|adrift|drifting|dismasted|rudder': 1.5,
+    r'injur|unconscious|\bhurt\b|bleeding|(?:broken|busted)\s+\w+|\bgash\b|hypotherm|man\s+down|medical|evac': 1.5,
+    r'\bhelp\b|assistance|emergency|urgent|rescue|\btow\b|immediately': 1.0,
+    r'\bposition\b|coordinates|latitude|longitude|\bdegrees\b|\bPOB\b|on\s?board|aboard|souls': 0.5,
+}
+
+# Phrases typical of routine traffic, test calls and cancellations
+CHATTER_TERMS = {
+    r'radio\s+check|comms?\s+check|signal\s+check|test(?:ing)?\s+call|this\s+is\s+(?:a|only\s+a)\s+test|'
+    r'testing[,.]?\s+testing|testing\s+(?:one|1)\b': -3.0,
+    r'false\s+alarm|disregard|cancel(?:led|ling)?\s+(?:the\s+|my\s+|our\s+)?(?:mayday|pan|distress)': -4.0,
+    r'no\s+(?:assistance|help)\s+(?:required|needed)': -2.0,  # Also cancels the +1 for "assistance"/"help"
+    r'just\s+checking\s+in|checking\s+in|no\s+issues|all\s+good|all\s+fine|nothing\s+to\s+report': -2.0,
+    r'how\s+are\s+you|see\s+you|cheers|catch\s+you|good\s+morning|good\s+evening|weather\s+(?:report|forecast)|'
+    r'\bforecast\b|\bpub\b|\bdinner\b|\btonight\b': -1.0,
+}
+
+# Scores at or above this are treated as distress, below CHATTER_SCORE as chatter. A transcript
+# with no lexicon hits scores 0 and is ambiguous: only net chatter evidence skips extraction.
+DISTRESS_SCORE = 1.5
+CHATTER_SCORE = 0.0
+
+_LEXICON = [(re.compile(p, re.IGNORECASE), w) for p, w in {**DISTRESS_TERMS, **CHATTER_TERMS}.items()]
+
+
+def score_transcript(transcript):
+    """
+    Score a transcript against the distress and chatter lexicons.
+    Returns (score, matched phrases); higher scores mean more likely distress.
+    """
+    score = 0.0
+    matched = []
+    for pattern, weight in _LEXICON:
+        match = pattern.search(transcript or '')
+        if match:
+            score += weight
+            matched.append(match.group(0).lower())
+    return score, matched
+
+
+def triage(transcript, use_llm=False, client=None, use_cache=True):
+    """
+    Decide whether a transcript is a distress call that needs full extraction.
+    The lexicon decides clear cases; a score from CHATTER_SCORE up to
+    DISTRESS_SCORE (including no hits at all) is ambiguous and is sent to a one-token classification
+    prompt when use_llm is True (client defaults to the shared MistralClient).
+    Without the LLM, ambiguous calls are treated as distress so no real call is dropped.
+    Returns a dict: decision ('distress' or 'chatter'), extract (bool), method
+    ('lexicon' or 'llm'), score, matched phrases and seconds taken.
+    """
+    start = time.perf_counter()
+    score, matched = score_transcript(transcript)
+    method = 'lexicon'
+    if score >= DISTRESS_SCORE:
+        decision = 'distress'
+    elif score < CHATTER_SCORE:
+        decision = 'chatter'
+    elif use_llm:
+        from LLM import get_client
+        client = client or get_client()
+        decision = 'distress' if client.classify_distress(transcript, use_cache=use_cache) else 'chatter'
+        method = 'llm'
+    else:
+        decision = 'distress'
+    return {
+        'decision': decision,
+        'extract': decision == 'distress',
+        'method': method,
+        'score': round(score, 2),
+        'matched': matched,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE
+
+
+def frame_features(audio, frame_ms=30):
+    """
+    Split audio into non-overlapping frames and compute, for all frames at once:
+    energy (dBFS), zero-crossing rate, and spectral flatness (0 = tonal/voiced,
+    1 = white noise such as squelch hiss).
+    Returns (energy_db, zcr, flatness), one value per frame.
+    """
+    frame = SAMPLE_RATE * frame_ms // 1000
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return empty, empty, empty
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame).astype(np.float32), axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return energy_db, zcr, flatness
+
+
+def _runs(mask):
+    """Return (starts, ends) of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(audio, frame_ms=30, margin_db=10.0, min_db=-50.0, speech_db=-35.0, max_flatness=0.5,
+                  max_zcr=0.5, hangover_ms=300, min_speech_ms=120, max_gap_ms=400):
+    """
+    Frame-level voice activity decision.
+    A frame is speech when it is louder than the noise floor by margin_db (or
+    louder than speech_db dBFS, since a clip that is speech throughout has no
+    quiet frames to estimate the floor from), is not noise-like (spectral
+    flatness below max_flatness) and does not look like pure hiss (zero-crossing
+    rate below max_zcr). The decision is then smoothed:
+    bursts shorter than min_speech_ms are dropped, gaps shorter than max_gap_ms
+    are bridged, and speech is extended by hangover_ms on both sides.
+    Returns a boolean array, one entry per frame.
+    """
+    energy_db, zcr, flatness = frame_features(audio, frame_ms)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(min_db, min(noise_floor + margin_db, speech_db))
+    speech = ((energy_db > threshold)
+              & (flatness < max_flatness) & (zcr < max_zcr))
+
+    # Drop isolated clicks
+    starts, ends = _runs(speech)
+    for s, e in zip(starts, ends):
+        if (e - s) * frame_ms < min_speech_ms:
+            speech[s:e] = False
+
+    # Bridge short pauses between words
+    starts, ends = _runs(~speech)
+    for s, e in zip(starts, ends):
+        if s > 0 and e < len(speech) and (e - s) * frame_ms < max_gap_ms:
+            speech[s:e] = True
+
+    # Hangover: dilate in both directions so word onsets and tails are kept
+    h = max(0, hangover_ms // frame_ms)
+    if h:
+        kernel = np.ones(2 * h + 1)
+        speech = np.convolve(speech.astype(np.float32), kernel, mode='same') > 0
+    return speech
+
+
+class TrimmedAudio:
+    """
+    Speech-only audio plus the map back to the original timeline.
+    `regions` lists (trimmed_start, original_start, length) in samples for each
+    kept region; regions are joined with `gap` samples of silence.
+    """
+
+    def __init__(self, audio, regions, original_samples):
+        self.audio = audio
+        self.regions = regions
+        self.original_samples = original_samples
+
+    @property
+    def kept_seconds(self):
+        return len(self.audio) / SAMPLE_RATE
+
+    @property
+    def total_seconds(self):
+        return self.original_samples / SAMPLE_RATE
+
+    def to_original(self, seconds):
+        """Map a time (s) in the trimmed audio back to the original recording."""
+        if not self.regions:
+            return seconds
+        sample = seconds * SAMPLE_RATE
+        starts = np.array([r[0] for r in self.regions])
+        i = max(0, int(np.searchsorted(starts, sample, side='right')) - 1)
+        trimmed_start, original_start, length = self.regions[i]
+        # Times inside an inserted gap snap to the end of the region before it
+        offset = min(max(sample - trimmed_start, 0), length)
+        return float(original_start + offset) / SAMPLE_RATE
+
+
+def trim_silence(audio, frame_ms=30, gap_ms=200, **vad_args):
+    """
+    Remove non-speech from audio before decoding. Speech regions are kept in
+    order and separated by gap_ms of silence so Whisper still sees the pauses.
+    Returns a TrimmedAudio.
+    """
+    speech = detect_speech(audio, frame_ms=frame_ms, **vad_args)
+    frame = SAMPLE_RATE * frame_ms // 1000
+    gap = np.zeros(SAMPLE_RATE * gap_ms // 1000, dtype=np.float32)
+    pieces = []
+    regions = []
+    trimmed_pos = 0
+    starts, ends = _runs(speech)
+    for s, e in zip(starts, ends):
+        if pieces:
+            pieces.append(gap)
+            trimmed_pos += len(gap)
+        start, end = s * frame, min(e * frame, len(audio))
+        pieces.append(np.asarray(audio[start:end], dtype=np.float32))
+        regions.append((trimmed_pos, start, end - start))
+        trimmed_pos += end - start
+    trimmed = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return TrimmedAudio(trimmed, regions, len(audio))
+
+
+def remap_segments(segments, trimmed):
+    """Rewrite Whisper segment (and word) timestamps onto the original timeline."""
+    remapped = []
+    for seg in segments:
+        seg = dict(seg)
+        seg['start'] = round(trimmed.to_original(seg['start']), 2)
+        seg['end'] = round(trimmed.to_original(seg['end']), 2)
+        if seg.get('words'):
+            seg['words'] = [dict(w, start=round(trimmed.to_original(w['start']), 2),
+                                 end=round(trimmed.to_original(w['end']), 2)) for w in seg['words']]
+        remapped.append(seg)
+    return remapped
+
+
+def transcribe_speech_only(model, audio, language=None, **transcribe_args):
+    """
+    Run model.transcribe on the speech regions of audio only, then map segment
+    timestamps back to the original recording. Returns a Whisper result dict.
+    """
+    trimmed = trim_silence(audio)
+    print(f"VAD: kept {trimmed.kept_seconds:.1f}s of {trimmed.total_seconds:.1f}s "
+          f"({len(trimmed.regions)} speech region(s))")
+    if not trimmed.regions:
+        return {'text': '', 'segments': [], 'language': language}
+    result = model.transcribe(trimmed.audio, language=language, **transcribe_args)
+    result['segments'] = remap_segments(result['segments'], trimmed)
+    return result
@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+
+import argparse  # For command-line argument parsing
+import glob  # For expanding the simulated channel's file list
+import json  # For per-utterance JSONL reports
+import os  # For file path operations
+import queue  # For the bounded utterance queue
+import socket  # For the TCP source
+import sys  # For stdin/stdout
+import threading  # For the transcription worker
+import time  # For real-time pacing and latency measurement
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audio_io import SAMPLE_RATE, load_audio, pcm16_to_float32
+
+# Samples per block read from a source (100 ms)
+BLOCK_SAMPLES = SAMPLE_RATE // 10
+
+
+class RawPCMSource:
+    """
+    Reads raw 16 kHz mono s16le PCM from a binary file object (a pipe, stdin,
+    a socket file or a .pcm file) and yields float32 sample blocks.
+    """
+
+    def __init__(self, fileobj, block_samples=BLOCK_SAMPLES):
+        self.fileobj = fileobj
+        self.block_bytes = block_samples * 2
+
+    def __iter__(self):
+        leftover = b''
+        while True:
+            data = self.fileobj.read(self.block_bytes)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - len(data) % 2  # Keep an odd trailing byte for the next read
+            leftover = data[usable:]
+            if usable:
+                yield pcm16_to_float32(data[:usable])
+
+
+class SocketSource(RawPCMSource):
+    """Connects to host:port and reads raw 16 kHz mono s16le PCM from it."""
+
+    def __init__(self, address, block_samples=BLOCK_SAMPLES):
+        host, port = address.rsplit(':', 1)
+        self.sock = socket.create_connection((host, int(port)))
+        super().__init__(self.sock.makefile('rb'), block_samples)
+
+
+class SimulatedChannelSource:
+    """
+    Local stand-in for a Channel 16 receiver: replays recorded calls as one
+    continuous channel at real-time rate, with low-level squelch hiss between
+    calls.
+    Args:
+        paths (list): Audio files to replay, in order (any format load_audio reads)
+        gap_seconds (float): Hiss between consecutive calls
+        speed (float): 1.0 = real time, 2.0 = twice as fast, 0 = as fast as possible
+        loop (bool): Start again from the first call after the last one
+        noise_level (float): RMS amplitude of the hiss between calls
+    """
+
+    def __init__(self, paths, gap_seconds=3.0, speed=1.0, loop=False, noise_level=0.002,
+                 block_samples=BLOCK_SAMPLES, seed=0):
+        self.paths = list(paths)
+        self.gap_seconds = gap_seconds
+        self.speed = speed
+        self.loop = loop
+        self.noise_level = noise_level
+        self.block_samples = block_samples
+        self.rng = np.random.default_rng(seed)
+
+    def _channel(self):
+        gap = int(self.gap_seconds * SAMPLE_RATE)
+        while True:
+            for path in self.paths:
+                yield self._hiss(gap)
+                yield load_audio(path)
+            yield self._hiss(gap)
+            if not self.loop:
+                return
+
+    def _hiss(self, n):
+        return (self.rng.standard_normal(n) * self.noise_level).astype(np.float32)
+
+    def __iter__(self):
+        start = time.monotonic()
+        emitted = 0
+        for audio in self._channel():
+            for i in range(0, len(audio), self.block_samples):
+                block = audio[i:i + self.block_samples]
+                emitted += len(block)
+                if self.speed:
+                    # Release each block no earlier than it would arrive over the air
+                    delay = start + emitted / SAMPLE_RATE / self.speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield block
+
+
+class RingBuffer:
+    """Fixed-size circular buffer of float32 samples addressed by absolute sample index."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.buf = np.zeros(self.capacity, dtype=np.float32)
+        self.total = 0  # Samples ever written
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        start = (self.total + n - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.buf[start:start + first] = samples[:first]
+        self.buf[:len(samples) - first] = samples[first:]
+        self.total += n
+
+    def read(self, start, end):
+        """Copy out samples [start, end). Samples older than the buffer are clipped off."""
+        start = max(start, self.total - self.capacity, 0)
+        end = min(end, self.total)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        return self.buf[np.arange(start, end) % self.capacity]
+
+
+class Utterance:
+    """A cut-out stretch of speech, with the timestamps needed for latency reporting."""
+
+    def __init__(self, index, start, end, audio, last_speech_arrival, cut_time):
+        self.index = index
+        self.start = start  # Absolute sample indices on the channel
+        self.end = end
+        self.audio = audio
+        self.last_speech_arrival = last_speech_arrival  # When the final speech sample was received
+        self.cut_time = cut_time  # When the segmenter closed the utterance
+
+
+class UtteranceSegmenter:
+    """
+    Cuts a continuous sample stream into utterances using frame energy against
+    an adaptive noise floor. An utterance ends after `hangover` seconds of
+    non-speech, or is force-cut at max_seconds so latency stays bounded.
+    """
+
+    def __init__(self, ring, frame_ms=30, margin_db=12.0, min_db=-50.0, hangover=0.8,
+                 min_speech=0.3, max_seconds=20.0, pre_roll=0.3):
+        self.ring = ring
+        self.frame = SAMPLE_RATE * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.hangover_frames = int(hangover * 1000 / frame_ms)
+        self.min_speech_frames = int(min_speech * 1000 / frame_ms)
+        self.max_samples = int(max_seconds * SAMPLE_RATE)
+        self.pre_roll = int(pre_roll * SAMPLE_RATE)
+        self.noise_db = None
+        self.pos = 0  # Absolute index of the next unanalysed sample
+        self.speech_start = None
+        self.speech_end = None
+        self.speech_frames = 0
+        self.silent_frames = 0
+        self.last_speech_arrival = None
+        self.count = 0
+
+    def process(self, samples, arrival_time):
+        """Add a block of samples and return any utterances it completes."""
+        self.ring.write(samples)
+        done = []
+        n_frames = (self.ring.total - self.pos) // self.frame
+        if n_frames == 0:
+            return done
+        frames = self.ring.read(self.pos, self.pos + n_frames * self.frame).reshape(n_frames, self.frame)
+        # Vectorised per-frame energy in dBFS
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+        for db in energy_db:
+            frame_start = self.pos
+            self.pos += self.frame
+            if self.noise_db is None:
+                self.noise_db = db
+            is_speech = db > max(self.min_db, self.noise_db + self.margin_db)
+            if not is_speech:
+                # Track the squelch/hiss level slowly so the threshold adapts to the channel
+                self.noise_db = 0.95 * self.noise_db + 0.05 * db
+            if is_speech:
+                if self.speech_start is None:
+                    self.speech_start = frame_start
+                    self.speech_frames = 0
+                self.speech_frames += 1
+                self.silent_frames = 0
+                self.speech_end = self.pos
+                self.last_speech_arrival = arrival_time
+            elif self.speech_start is not None:
+                self.silent_frames += 1
+                if self.silent_frames >= self.hangover_frames:
+                    utt = self._close()
+                    if utt is not None:
+                        done.append(utt)
+            if self.speech_start is not None and self.pos - self.speech_start >= self.max_samples:
+                utt = self._close(forced=True)
+                if utt is not None:
+                    done.append(utt)
+        return done
+
+    def flush(self):
+        """Close any utterance still open at the end of the stream."""
+        utt = self._close()
+        return [utt] if utt is not None else []
+
+    def _close(self, forced=False):
+        start, end = self.speech_start, self.speech_end if not forced else self.pos
+        speech_frames = self.speech_frames
+        self.speech_start = None
+        self.speech_end = None
+        self.silent_frames = 0
+        if start is None or speech_frames < self.min_speech_frames:
+            return None
+        if forced:
+            # Carry on with a new utterance if the speaker is still talking
+            self.speech_start = end
+            self.speech_end = end
+            self.speech_frames = 0
+        audio = self.ring.read(max(0, start - self.pre_roll), end)
+        self.count += 1
+        return Utterance(self.count, start, end, audio, self.last_speech_arrival, time.monotonic())
+
+
+def whisper_transcriber(model_size='base', language='en'):
+    """Return a function that transcribes an utterance with a shared Whisper model."""
+    from model_registry import use_model, warm_up
+    warm_up(model_size)
+
+    def transcribe(audio):
+        with use_model(model_size) as model:
+            return model.transcribe(audio, language=language, verbose=None, task='transcribe',
+                                    condition_on_previous_text=False)['text'].strip()
+    return transcribe
+
+
+def run_stream(source, transcribe, on_result=None, queue_size=8, ring_seconds=60, **segmenter_args):
+    """
+    Ingest a live sample source, cut utterances and transcribe them on a worker
+    thread, reporting per-utterance delay.
+    Args:
+        source: Iterable of float32 sample blocks (16 kHz mono)
+        transcribe (callable): transcribe(audio) -> text
+        on_result (callable, optional): Called with each utterance's report dict
+        queue_size (int): Utterances allowed to wait for transcription
+        ring_seconds (float): Audio kept in the ring buffer
+    Returns:
+        list: Report dicts, one per utterance
+    """
+    ring = RingBuffer(ring_seconds * SAMPLE_RATE)
+    segmenter = UtteranceSegmenter(ring, **segmenter_args)
+    pending = queue.Queue(maxsize=queue_size)
+    reports = []
+
+    def worker():
+        while True:
+            utt = pending.get()
+            if utt is None:
+                return
+            asr_start = time.monotonic()
+            error = None
+            try:
+                text = transcribe(utt.audio)
+            except Exception as e:
+                # One bad utterance must not stop the worker, or ingest blocks on the full queue
+                text = ''
+                error = f"{type(e).__name__}: {e}"
+            done = time.monotonic()
+            report = {
+                'utterance': utt.index,
+                'channel_start_s': round(utt.start / SAMPLE_RATE, 2),
+                'channel_end_s': round(utt.end / SAMPLE_RATE, 2),
+                'duration_s': round((utt.end - utt.start) / SAMPLE_RATE, 2),
+                'transcript': text,
+                'cut_delay_s': round(utt.cut_time - utt.last_speech_arrival, 3),
+                'queue_wait_s': round(asr_start - utt.cut_time, 3),
+                'asr_s': round(done - asr_start, 3),
+                'end_to_end_delay_s': round(done - utt.last_speech_arrival, 3),
+            }
+            if error is not None:
+                report['error'] = error
+            reports.append(report)
+            if on_result is not None:
+                try:
+                    on_result(report)
+                except Exception as e:
+                    print(f"Warning: on_result failed for utterance {utt.index}: {e}", file=sys.stderr)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    for block in source:
+        for utt in segmenter.process(block, time.monotonic()):
+            if pending.full():
+                print(f"Warning: transcription backlog full ({queue_size} utterances); ingest is stalling",
+                      file=sys.stderr)
+            pending.put(utt)
+    for utt in segmenter.flush():
+        pending.put(utt)
+    pending.put(None)
+    thread.join()
+    return reports
+
+
+def summarize(reports):
+    """Return latency percentiles over all successfully transcribed utterance reports."""
+    failed = sum('error' in r for r in reports)
+    reports = [r for r in reports if 'error' not in r]
+    if not reports:
+        return {'utterances': 0, 'failed': failed}
+    delays = np.array([r['end_to_end_delay_s'] for r in reports])
+    speech = sum(r['duration_s'] for r in reports)
+    asr = sum(r['asr_s'] for r in reports)
+    return {
+        'utterances': len(reports),
+        'end_to_end_p50_s': round(float(np.percentile(delays, 50)), 3),
+        'end_to_end_p95_s': round(float(np.percentile(delays, 95)), 3),
+        'end_to_end_max_s': round(float(delays.max()), 3),
+        'asr_real_time_factor': round(asr / speech, 3) if speech else None,
+        'failed': failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live VHF channel ingest: cut utterances and transcribe them in real time.")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument('--simulate', nargs='*', metavar='AUDIO',
+                     help="Replay audio files as a continuous channel (default: RNLI_LLM/input/*.wav)")
+    src.add_argument('--pipe', action='store_true', help="Read raw 16 kHz mono s16le PCM from stdin")
+    src.add_argument('--socket', metavar='HOST:PORT', help="Read raw 16 kHz mono s16le PCM from a TCP socket")
+    src.add_argument('--file', metavar='PCM', help="Read raw 16 kHz mono s16le PCM from a file or named pipe")
+    parser.add_argument('--speed', type=float, default=1.0, help="Simulated channel speed (1 = real time, 0 = no pacing)")
+    parser.add_argument('--gap', type=float, default=3.0, help="Seconds of hiss between simulated calls (default: 3)")
+    parser.add_argument('--loop', action='store_true', help="Keep replaying the simulated channel")
+    parser.add_argument('--model', default='base', help="Whisper model size: tiny, base, small, medium, large")
+    parser.add_argument('--language', default='en', help="Force language (e.g., 'en'). Default: en.")
+    parser.add_argument('--max-utterance', type=float, default=20.0, help="Force-cut utterances after this many seconds")
+    parser.add_argument('--hangover', type=float, default=0.8, help="Silence (s) that ends an utterance")
+    parser.add_argument('--output', help="Optional: append per-utterance reports to this JSONL file")
+    args = parser.parse_args()
+
+    if args.simulate is not None:
+        paths = args.simulate or sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'input', '*.wav')))
+        source = SimulatedChannelSource(paths, gap_seconds=args.gap, speed=args.speed, loop=args.loop)
+    elif args.pipe:
+        source = RawPCMSource(sys.stdin.buffer)
+    elif args.socket:
+        source = SocketSource(args.socket)
+    else:
+        source = RawPCMSource(open(args.file, 'rb'))
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else None
+    reports = []  # Also collected here, so Ctrl-C still summarizes what was reported
+
+    def on_result(report):
+        reports.append(report)
+        text = f"FAILED ({report['error']})" if 'error' in report else report['transcript']
+        print(f"[{report['channel_start_s']:8.2f}s] ({report['end_to_end_delay_s']:.2f}s delay) {text}")
+        if out:
+            out.write(json.dumps(report, ensure_ascii=False) + '\n')
+            out.flush()
+
+    transcribe = whisper_transcriber(args.model, args.language)
+    try:
+        run_stream(source, transcribe, on_result=on_result, max_seconds=args.max_utterance, hangover=args.hangover)
+    except KeyboardInterrupt:
+        print("\nStopped; utterances still queued were not transcribed.")
+    finally:
+        if out:
+            out.close()
+    print(f"\n[Latency] {json.dumps(summarize(reports))}")
+
+
+if __name__ == '__main__':
+    main()
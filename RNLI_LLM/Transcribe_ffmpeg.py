@@ -4,22 +4,26 @@ import argparse  # For command-line argument parsing
 import os  # For file path operations
 import subprocess  # For running ffmpeg
 import sys  # For exiting on error
-import tempfile  # For temporary file management
 
 
-# Try to import Whisper for speech-to-text
-try:
-    import whisper
-except ImportError:
-    print("The 'whisper' package is not installed. Please see the instructions below.")
-    sys.exit(1)
+# Shared helpers (model registry, etc.) live in the Main/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Main'))
+# Whisper/torch, numpy and the batch pool are imported on first use, so --help and
+# argument errors return immediately
+from model_registry import (DEFAULT_BACKEND, add_backend_arguments, backend_available, backend_cache_options,
+                            backend_missing, use_model)
+from transcript_cache import cached_transcribe
+import tracing
+from profiling import add_profile_arguments, profile_run
 
-# Optional: For SRT/VTT subtitle output
-try:
-    from whisper.utils import write_srt, write_vtt
-except ImportError:
-    write_srt = None
-    write_vtt = None
+
+def subtitle_writers():
+    """Return whisper's (write_srt, write_vtt), or (None, None) if this whisper version lacks them."""
+    try:
+        from whisper.utils import write_srt, write_vtt
+    except ImportError:
+        return None, None
+    return write_srt, write_vtt
 
 
 def convert_to_wav(input_path, output_path):
@@ -43,40 +47,73 @@ def convert_to_wav(input_path, output_path):
         sys.exit(1)
 
 
-def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None, model_size='large', language=None):
+def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None, model_size='large', language=None,
+                     use_cache=True, vad=False, backend=DEFAULT_BACKEND, compute_type=None, use_features=False):
     """
-    Transcribe audio using OpenAI Whisper and save results in text, SRT, and VTT formats.
+    Transcribe audio using Whisper and save results in text, SRT, and VTT formats.
     Args:
-        input_audio (str): Path to the input WAV file
+        input_audio (str or np.ndarray): Path to the input audio file (any format; 16kHz mono
+            PCM WAVs are memory-mapped, the rest decoded in memory with ffmpeg) or an
+            already decoded 16kHz mono float32 array
         output_txt (str): Path to save the plain text transcript
         output_srt (str, optional): Path to save SRT subtitles
         output_vtt (str, optional): Path to save VTT subtitles
         model_size (str): Whisper model size (tiny, base, small, medium, large)
         language (str, optional): Language code (e.g., 'en') or None for auto-detect
+        use_cache (bool): Look the audio up in the transcript cache first (default: True)
+        vad (bool): Drop silence and squelch before decoding; subtitle timestamps still
+            refer to the original recording (default: False)
+        backend (str): ASR engine, 'whisper' (openai-whisper) or 'faster-whisper' (CTranslate2)
+        compute_type (str, optional): Engine precision, e.g. 'int8' or 'int8_float32' for
+            faster-whisper (default: the backend's default)
+        use_features (bool): Take the decoded samples from the feature store (memory-mapped),
+            decoding and storing them on the first run (default: False)
     """
-    model = whisper.load_model(model_size)
-    print(f"Loaded Whisper model: {model_size}")
-    # Transcribe the audio file
-    result = model.transcribe(input_audio, language=language, verbose=True, task='transcribe')
+    from audio_io import load_audio
+    from feature_store import get_store
+    from vad import transcribe_speech_only
+
+    def run_whisper():
+        # Decode once, in memory, so Whisper does not run its own ffmpeg pass
+        if not isinstance(input_audio, str):
+            audio = input_audio
+        elif use_features:
+            audio = get_store().load_audio(input_audio)
+        else:
+            audio = load_audio(input_audio)
+        # Reuse the process-wide model instead of reloading it for every file
+        with use_model(model_size, dtype=compute_type, backend=backend) as model:
+            if vad:
+                return transcribe_speech_only(model, audio, language=language, verbose=True, task='transcribe')
+            return model.transcribe(audio, language=language, verbose=True, task='transcribe')
+
+    options = {'task': 'transcribe'}
+    if vad:
+        options['vad'] = True
+    options.update(backend_cache_options(backend, compute_type))
+    # Identical audio + model + language is only ever transcribed once
+    result = cached_transcribe(input_audio, model_size, language, options, run_whisper, use_cache=use_cache)
 
     transcript = result['text'].strip()
 
-    # Write plain text output if output_txt is provided
-    if output_txt:
-        with open(output_txt, 'w', encoding='utf-8') as f:
-            f.write(transcript + '\n')
-        print(f"Transcription saved to {output_txt}")
-
-    # Write SRT subtitles if requested and supported
-    if output_srt and write_srt:
-        with open(output_srt, 'w', encoding='utf-8') as f:
-            write_srt(result['segments'], file=f)
-        print(f"SRT subtitles saved to {output_srt}")
-    # Write VTT subtitles if requested and supported
-    if output_vtt and write_vtt:
-        with open(output_vtt, 'w', encoding='utf-8') as f:
-            write_vtt(result['segments'], file=f)
-        print(f"VTT subtitles saved to {output_vtt}")
+    write_srt, write_vtt = subtitle_writers() if output_srt or output_vtt else (None, None)
+    with tracing.span('write', path=output_txt):
+        # Write plain text output if output_txt is provided
+        if output_txt:
+            with open(output_txt, 'w', encoding='utf-8') as f:
+                f.write(transcript + '\n')
+            print(f"Transcription saved to {output_txt}")
+
+        # Write SRT subtitles if requested and supported
+        if output_srt and write_srt:
+            with open(output_srt, 'w', encoding='utf-8') as f:
+                write_srt(result['segments'], file=f)
+            print(f"SRT subtitles saved to {output_srt}")
+        # Write VTT subtitles if requested and supported
+        if output_vtt and write_vtt:
+            with open(output_vtt, 'w', encoding='utf-8') as f:
+                write_vtt(result['segments'], file=f)
+            print(f"VTT subtitles saved to {output_vtt}")
 
     # Print detected language
     print(f"Detected language: {result['language']}")
@@ -87,10 +124,34 @@ def transcribe_audio(input_audio, output_txt, output_srt=None, output_vtt=None,
     return transcript
 
 
+def transcribe_batch(inputs, output_jsonl, model_size='large', language=None, workers=None, resume=True,
+                     use_cache=True, clip_batch=0):
+    """
+    Transcribe a directory, glob or list of audio files across worker processes
+    (each loads the model once), writing one JSON record per file to output_jsonl.
+    See batch_transcribe.transcribe_batch for details.
+    """
+    import batch_transcribe
+    return batch_transcribe.transcribe_batch(inputs, output_jsonl, model_size=model_size, language=language,
+                                             workers=workers, resume=resume, use_cache=use_cache,
+                                             clip_batch=clip_batch)
+
+
+@tracing.traced('Transcribe_ffmpeg.main')
 def main():
     """
-    Main entry point: parses arguments, converts input audio to WAV, and transcribes it.
+    Main entry point: parses arguments, decodes the input audio in memory, and transcribes it.
+    Use 'batch' as the first argument to transcribe a whole directory or glob instead.
     """
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        # Batch workers always run openai-whisper
+        if not backend_available('whisper'):
+            print(backend_missing('whisper'))
+            sys.exit(1)
+        import batch_transcribe
+        batch_transcribe.main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Transcribe audio using OpenAI Whisper (commercial-grade accuracy)")
     parser.add_argument('input_audio', help="Path to input audio file (any format) in the 'input/' folder")
     parser.add_argument('output_txt', help="Path to output .txt file for transcription in the 'output/' folder")
@@ -98,27 +159,40 @@ def main():
     parser.add_argument('--vtt', help="Optional: Output VTT subtitle file in the 'output/' folder")
     parser.add_argument('--model', default='large', help="Whisper model size: tiny, base, small, medium, large (default: large)")
     parser.add_argument('--language', default=None, help="Force language (e.g., 'en'). Default: auto-detect.")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached transcripts and re-run Whisper")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and squelch before transcribing")
+    parser.add_argument('--features', action='store_true',
+                        help="Reuse decoded audio from the feature store instead of running ffmpeg again")
+    add_backend_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    if not backend_available(args.backend):
+        print(backend_missing(args.backend))
+        sys.exit(1)
+    from audio_io import AudioDecodeError
 
     import time
     start_time = time.time()
-    # Convert input to WAV if needed, using a temporary directory
-    with tempfile.TemporaryDirectory() as tmpdir:
-        wav_path = os.path.join(tmpdir, 'converted.wav')
+    # The input is loaded as 16kHz mono samples inside transcribe_audio (memory-mapped if
+    # already in that format, otherwise decoded from ffmpeg's stdout) unless the cache hits
+    with profile_run(args.output_txt, enabled=args.profile, memory=args.profile_memory):
         try:
-            convert_to_wav(args.input_audio, wav_path)
-        except Exception as e:
+            transcribe_audio(
+                args.input_audio,
+                args.output_txt,
+                output_srt=args.srt,
+                output_vtt=args.vtt,
+                model_size=args.model,
+                language=args.language,
+                use_cache=not args.no_cache,
+                vad=args.vad,
+                backend=args.backend,
+                compute_type=args.compute_type,
+                use_features=args.features
+            )
+        except AudioDecodeError as e:
             print(f"FFmpeg conversion failed: {e}")
             sys.exit(1)
-        # Transcribe the converted WAV file
-        transcribe_audio(
-            wav_path,
-            args.output_txt,
-            output_srt=args.srt,
-            output_vtt=args.vtt,
-            model_size=args.model,
-            language=args.language
-        )
     elapsed = time.time() - start_time
     print(f"\n[Timer] Transcription process took {elapsed:.2f} seconds.")
 
@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+from collections import namedtuple
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from faster_whisper_backend import FasterWhisperModel, estimate_faster_whisper_bytes
+from model_registry import ModelRegistry, backend_cache_options, estimate_model_bytes
+
+Segment = namedtuple('Segment', 'seek start end text tokens temperature avg_logprob compression_ratio '
+                                'no_speech_prob words')
+Word = namedtuple('Word', 'word start end probability')
+Info = namedtuple('Info', 'language')
+
+
+class FakeCT2Model:
+    """Stands in for faster_whisper.WhisperModel: a lazy segment generator plus info."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        words = [Word(' Mayday', 0.0, 0.6, 0.9)] if kwargs.get('word_timestamps') else None
+        segments = (Segment(0, start, end, text, [1, 2], 0.0, -0.2, 1.1, 0.01, words)
+                    for start, end, text in [(0.0, 1.5, ' Mayday mayday.'), (1.5, 3.0, ' This is Sea Turtle.')])
+        return segments, Info('en')
+
+
+class TestFasterWhisperAdapter(unittest.TestCase):
+    def test_result_has_whisper_shape(self):
+        model = FasterWhisperModel(FakeCT2Model(), 'int8')
+        result = model.transcribe('call.wav', language='en', task='transcribe', verbose=None, fp16=False)
+        self.assertEqual(result['text'], ' Mayday mayday. This is Sea Turtle.')
+        self.assertEqual(result['language'], 'en')
+        self.assertEqual([(s['id'], s['start'], s['end']) for s in result['segments']], [(0, 0.0, 1.5), (1, 1.5, 3.0)])
+        self.assertNotIn('words', result['segments'][0])
+        # Greedy by default, like openai-whisper's transcribe()
+        self.assertEqual(model.model.calls[0], {'language': 'en', 'task': 'transcribe', 'beam_size': 1})
+
+    def test_options_are_translated(self):
+        model = FasterWhisperModel(FakeCT2Model(), 'int8_float32')
+        result = model.transcribe('call.wav', beam_size=5, logprob_threshold=-1.0, word_timestamps=True,
+                                  condition_on_previous_text=False)
+        call = model.model.calls[0]
+        self.assertEqual((call['beam_size'], call['log_prob_threshold']), (5, -1.0))
+        self.assertEqual(result['segments'][0]['words'][0]['word'], ' Mayday')
+        with self.assertRaises(TypeError):
+            model.transcribe('call.wav', carrier_sense=True)
+
+
+class TestBackendSelection(unittest.TestCase):
+    def test_cache_options_separate_engines(self):
+        self.assertEqual(backend_cache_options('whisper'), {})
+        self.assertEqual(backend_cache_options('faster-whisper'), {'backend': 'faster-whisper', 'compute_type': 'int8'})
+        self.assertEqual(backend_cache_options('faster-whisper', 'int8_float32')['compute_type'], 'int8_float32')
+
+    def test_registry_default_compute_type(self):
+        loads = []
+        registry = ModelRegistry(loader=lambda *key: loads.append(key) or object(), default_dtype='int8')
+        registry.get('base', device='cpu')
+        registry.get('base', device='cpu', dtype='int8_float32')
+        self.assertEqual(loads, [('base', 'cpu', 'int8'), ('base', 'cpu', 'int8_float32')])
+
+    def test_model_size_follows_compute_type(self):
+        self.assertEqual(estimate_faster_whisper_bytes('base', 'int8'), 74_000_000)
+        self.assertEqual(estimate_faster_whisper_bytes('base.en', 'int8_float32'), 74_000_000)
+        self.assertEqual(estimate_faster_whisper_bytes('base', 'float16'), 148_000_000)
+        self.assertEqual(estimate_faster_whisper_bytes('someone/custom-ct2', 'int8'), 0)
+        self.assertEqual(estimate_model_bytes(FasterWhisperModel(FakeCT2Model(), 'float32', 'tiny')), 156_000_000)
+
+    def test_registry_budget_counts_faster_whisper_models(self):
+        registry = ModelRegistry(loader=lambda size, device, dtype: FasterWhisperModel(FakeCT2Model(), dtype, size),
+                                 memory_budget_mb=300, default_dtype='int8')
+        registry.get('base', device='cpu')
+        registry.get('small', device='cpu')
+        self.assertEqual([key[0] for key, _, _ in registry.loaded()], ['small'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+
+import unittest
+import os
+import sys
+import tempfile
+import wave
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from audio_io import load_audio, load_pcm16_wav, pcm16_to_float32, sniff_pcm16_wav
+
+
+class TestAudioIO(unittest.TestCase):
+    def test_pcm16_to_float32(self):
+        pcm = np.array([0, 16384, -32768, 32767], dtype='<i2').tobytes()
+        samples = pcm16_to_float32(pcm)
+        self.assertEqual(samples.dtype, np.float32)
+        np.testing.assert_allclose(samples, [0.0, 0.5, -1.0, 32767 / 32768], rtol=1e-6)
+
+    def write_wav(self, path, samples, rate=16000, channels=1):
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(channels)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+
+    def test_16k_mono_wav_is_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'native.wav')
+            self.write_wav(path, [0, 16384, -16384, 8192])
+            self.assertEqual(sniff_pcm16_wav(path), (44, 4))
+            # load_audio must not need ffmpeg for this file
+            np.testing.assert_allclose(load_audio(path), [0.0, 0.5, -0.5, 0.25])
+
+    def test_other_formats_are_not_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stereo = os.path.join(tmpdir, 'stereo.wav')
+            self.write_wav(stereo, [0, 0, 1, 1], channels=2)
+            self.assertIsNone(load_pcm16_wav(stereo))
+            # The repo's 48 kHz recordings must fall back to the decoder
+            lottie = os.path.join(os.path.dirname(__file__), '..', 'input', 'LOTTIE_16.wav')
+            self.assertIsNone(sniff_pcm16_wav(lottie))
+            self.assertIsNone(sniff_pcm16_wav(os.path.join(tmpdir, 'missing.wav')))
+
+
+if __name__ == '__main__':
+    unittest.main()
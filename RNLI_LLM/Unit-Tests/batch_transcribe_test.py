@@ -0,0 +1,52 @@
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from batch_transcribe import _truncate_partial_line, expand_inputs, load_completed, transcribe_batch
+
+
+class TestBatchTranscribe(unittest.TestCase):
+    def test_expand_directory_and_glob(self):
+        input_dir = os.path.join(os.path.dirname(__file__), '..', 'input')
+        files = expand_inputs(input_dir)
+        self.assertIn(os.path.normpath(os.path.join(input_dir, 'LOTTIE.wav')), files)
+        self.assertEqual(files, sorted(set(files)))
+        wavs = expand_inputs(os.path.join(input_dir, '*.wav'))
+        self.assertTrue(wavs and all(f.endswith('.wav') for f in wavs))
+        self.assertLess(len(wavs), len(files))
+
+    def test_resume_skips_only_successful_records(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'out.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'audio_path': 'a.wav', 'status': 'ok'}) + '\n')
+                f.write(json.dumps({'audio_path': 'b.wav', 'status': 'error'}) + '\n')
+                f.write('{"audio_path": "c.wav", "sta')  # truncated by a crash
+            self.assertEqual(load_completed(path), {'a.wav'})
+            # Before appending, the partial line is cut off so the next record stays intact
+            _truncate_partial_line(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'audio_path': 'c.wav', 'status': 'ok'}) + '\n')
+            self.assertEqual(load_completed(path), {'a.wav', 'c.wav'})
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 3)
+
+    def test_failed_model_load_writes_error_records(self):
+        # The model cannot load (unknown size, or Whisper missing): the batch must finish
+        # with an error record per file instead of respawning workers forever
+        audio = os.path.join(os.path.dirname(__file__), '..', 'input', 'LOTTIE.wav')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'out.jsonl')
+            summary = transcribe_batch(audio, path, model_size='no-such-model', workers=1, use_cache=False)
+            self.assertEqual(summary, {'ok': 0, 'error': 1, 'skipped': 0})
+            with open(path, encoding='utf-8') as f:
+                record = json.loads(f.readline())
+            self.assertEqual(record['status'], 'error')
+            self.assertTrue(record['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import wave
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from benchmark_whisper import (compare_to_baseline, load_clips, normalize_text, parse_engine, percentile, recommend,
+                               run_benchmark, word_error_rate, write_results)
+
+EXPECTED = "This is the vessel Sea Turtle. We're taking on water."
+
+
+class FakeModel:
+    """Stands in for a Whisper model: answers every clip with a fixed text per model size."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def transcribe(self, audio, **options):
+        return {'text': ' ' + self.text}
+
+
+def fake_loader(model_size, device, dtype):
+    return FakeModel({'tiny': "this is the vessel sea turtle we are taking on water",
+                      'base': "This is the vessel Sea Turtle, we’re taking on water!"}[model_size])
+
+
+class TestMetrics(unittest.TestCase):
+    def test_normalization_ignores_case_and_punctuation(self):
+        self.assertEqual(normalize_text("Mayday, MAYDAY! We’re forty-one degrees."),
+                         ['mayday', 'mayday', "we're", 'forty', 'one', 'degrees'])
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate(EXPECTED, "this is the vessel sea turtle we're taking on water"), 0.0)
+        # One substitution and one deletion over 10 reference words
+        self.assertAlmostEqual(word_error_rate(EXPECTED, "this is a vessel sea turtle we're taking water"), 0.2)
+        self.assertEqual(word_error_rate(EXPECTED, ""), 1.0)
+
+    def test_percentile(self):
+        self.assertEqual(percentile([0.4, 0.1, 0.3, 0.2], 50), 0.2)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_cases(self):
+        wav = os.path.join(self.tmp.name, 'clip.wav')
+        with wave.open(wav, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(np.zeros(32000, dtype='<i2').tobytes())
+        cases = [{'audio_path': wav, 'expected_transcript': EXPECTED},
+                 {'audio_path': wav, 'expected_transcript': EXPECTED},
+                 {'audio_path': os.path.join(self.tmp.name, 'missing.wav'), 'expected_transcript': EXPECTED}]
+        path = os.path.join(self.tmp.name, 'inputs.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cases, f)
+        return path
+
+    def test_clips_are_decoded_once_and_missing_ones_skipped(self):
+        clips = load_clips(self.write_cases(), root=self.tmp.name)
+        self.assertEqual(len(clips), 2)
+        self.assertIs(clips[0]['audio'], clips[1]['audio'])
+        self.assertEqual(clips[0]['duration_s'], 2.0)
+
+    def test_models_are_compared_on_the_same_clips(self):
+        clips = load_clips(self.write_cases(), root=self.tmp.name)
+        report = run_benchmark(['tiny', 'base'], clips, isolate=False, slo_rtf=1.0, loader=fake_loader)
+        tiny, base = report['models']
+        self.assertEqual((tiny['model'], tiny['clips'], tiny['audio_s']), ('tiny', 2, 4.0))
+        self.assertEqual(tiny['wer'], 0.2)  # "we are" vs "we're": one substitution, one insertion
+        self.assertEqual(base['wer'], 0.0)
+        self.assertTrue(base['meets_slo'])
+        self.assertGreaterEqual(base['load_s'], 0)
+        self.assertEqual(len(report['clips']), 4)
+
+        prefix = os.path.join(self.tmp.name, 'out', 'bench')
+        write_results(report, prefix)
+        with open(prefix + '.csv', 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.read().strip().splitlines()), 3)
+        with open(prefix + '.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['models'][0]['model'], 'tiny')
+
+    def test_engines_are_compared_side_by_side(self):
+        clips = load_clips(self.write_cases(), root=self.tmp.name)
+
+        def loader(model_size, device, dtype):
+            # The int8 engine drops a word; the others are exact
+            return FakeModel("this is the vessel sea turtle we're taking water" if dtype == 'int8' else EXPECTED)
+        engines = [parse_engine('whisper'), parse_engine('faster-whisper:int8'),
+                   parse_engine('faster-whisper:int8_float32')]
+        self.assertEqual(engines[0], ('whisper', 'float32'))
+        report = run_benchmark(['base'], clips, isolate=False, loader=loader, engines=engines)
+        rows = {(m['backend'], m['compute_type']): m for m in report['models']}
+        self.assertEqual(rows[('faster-whisper', 'int8')]['wer'], 0.1)
+        self.assertEqual(rows[('faster-whisper', 'int8_float32')]['wer'], 0.0)
+        self.assertEqual({c['backend'] for c in report['clips']}, {'whisper', 'faster-whisper'})
+
+        rows[('whisper', 'float32')]['rtf'] = 0.3
+        rows[('faster-whisper', 'int8')]['rtf'] = 0.05
+        rows[('faster-whisper', 'int8_float32')]['rtf'] = 0.1
+        best = recommend(report, max_wer=0.05)
+        self.assertEqual((best['backend'], best['compute_type']), ('faster-whisper', 'int8_float32'))
+        self.assertEqual(recommend(report, max_wer=0.2)['compute_type'], 'int8')
+        with self.assertRaises(ValueError):
+            parse_engine('vosk')
+
+    def test_baseline_comparison_flags_regressions(self):
+        baseline = {'models': [{'model': 'base', 'rtf': 0.5, 'p95_rtf': 0.6, 'wer': 0.05, 'load_s': 1.0,
+                                'peak_rss_mb': 500}]}
+        report = {'models': [{'model': 'base', 'rtf': 0.7, 'p95_rtf': 0.62, 'wer': 0.06, 'load_s': 3.0,
+                              'peak_rss_mb': 900}, {'model': 'tiny', 'rtf': 0.1}]}
+        rows = {row['field']: row for row in compare_to_baseline(report, baseline)}
+        self.assertTrue(rows['rtf']['regression'])
+        self.assertFalse(rows['p95_rtf']['regression'])
+        self.assertFalse(rows['wer']['regression'])
+        self.assertFalse(rows['load_s']['regression'])
+        self.assertEqual(rows['load_s']['change'], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
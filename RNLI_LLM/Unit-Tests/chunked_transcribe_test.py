@@ -0,0 +1,91 @@
+
+import unittest
+import importlib.util
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from chunked_transcribe import (N_SAMPLES, assemble_clip_results, merge_window_texts, plan_clip_batches,
+                                split_windows)
+
+
+class TestChunkedTranscribe(unittest.TestCase):
+    def test_short_clip_is_one_unpadded_window(self):
+        audio = np.zeros(16000 * 5, dtype=np.float32)
+        windows = split_windows(audio)
+        self.assertEqual(len(windows), 1)
+        self.assertEqual(len(windows[0]), len(audio))
+
+    def test_long_audio_windows_overlap_and_cover_everything(self):
+        audio = np.arange(16000 * 75, dtype=np.float32)
+        windows = split_windows(audio, overlap_seconds=2.0)
+        self.assertEqual(len(windows), 3)
+        self.assertTrue(all(len(w) == N_SAMPLES for w in windows[:-1]))
+        # Each window starts 2 s before the previous one ends
+        self.assertEqual(windows[1][0], N_SAMPLES - 2 * 16000)
+        self.assertEqual(windows[-1][-1], audio[-1])
+
+    def test_seam_words_are_not_repeated(self):
+        texts = [
+            "Mayday, mayday, this is the vessel Lottie. We are taking on",
+            "We are taking on water, port side hull breach.",
+            "hull breach. Six souls on board.",
+        ]
+        self.assertEqual(merge_window_texts(texts),
+                         "Mayday, mayday, this is the vessel Lottie. We are taking on water, "
+                         "port side hull breach. Six souls on board.")
+
+    def test_unrelated_windows_are_concatenated(self):
+        self.assertEqual(merge_window_texts(["Over.", "Coastguard here."]), "Over. Coastguard here.")
+
+
+class TestClipBatches(unittest.TestCase):
+    def setUp(self):
+        seconds = [5, 10, 0, 40, 0.01]
+        self.clips = [np.zeros(int(16000 * s), dtype=np.float32) for s in seconds]
+
+    def test_windows_of_all_clips_are_batched_by_length(self):
+        batches = plan_clip_batches(self.clips, batch_size=2)
+        keys = [[(c, w) for c, w, _ in batch] for batch in batches]
+        # The 40 s call is two windows; the empty clip has none
+        self.assertEqual(keys, [[(3, 0), (3, 1)], [(1, 0), (0, 0)], [(4, 0)]])
+        self.assertEqual(len(batches[2][0][2]), 400)  # Padded to one STFT frame
+
+    def test_results_are_split_back_per_clip(self):
+        decoded = {(0, 0): ("Mayday, this is Lottie.", 'en'), (1, 0): ("Pan-pan.", 'en'),
+                   (3, 0): ("Taking on water, port side", 'en'), (3, 1): ("port side hull breach.", 'en'),
+                   (4, 0): ("", 'en')}
+        results = assemble_clip_results(self.clips, decoded, language='en')
+        self.assertEqual([r['text'] for r in results],
+                         ["Mayday, this is Lottie.", "Pan-pan.", "", "Taking on water, port side hull breach.", ""])
+        self.assertEqual(results[2], {'text': '', 'segments': [], 'language': 'en'})
+        self.assertEqual([(s['start'], s['end']) for s in results[3]['segments']], [(0.0, 30.0), (28.0, 40.0)])
+
+
+@unittest.skipUnless(importlib.util.find_spec('whisper') and importlib.util.find_spec('torch'),
+                     "whisper and torch are not installed")
+class TestBatchLogMel(unittest.TestCase):
+    def test_quiet_window_matches_whisper(self):
+        import whisper
+        from chunked_transcribe import batch_log_mel
+        # Peak well below -2, so the 8 dB floor sits under Whisper's -10 clamp
+        t = np.arange(16000 * 4, dtype=np.float32) / 16000
+        audio = (1e-4 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        expected = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio)).numpy()
+        batched = batch_log_mel([audio], 80)[0].numpy()
+        frames = len(audio) // 160
+        # Frames next to the end of the samples see reflect vs zero padding, so skip them
+        np.testing.assert_allclose(batched[:, :frames - 2], expected[:, :frames - 2], atol=1e-4)
+        np.testing.assert_allclose(batched[:, frames + 2:], expected[:, frames + 2:], atol=1e-4)
+
+    def test_clip_shorter_than_one_frame(self):
+        from chunked_transcribe import N_FRAMES, batch_log_mel, window_log_mel
+        audio = np.full(100, 0.1, dtype=np.float32)
+        self.assertEqual(tuple(batch_log_mel([audio], 80).shape), (1, 80, N_FRAMES))
+        mel = window_log_mel(audio, 80)
+        self.assertEqual(mel.shape, (1, 80, N_FRAMES))
+        self.assertTrue(np.isfinite(mel).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
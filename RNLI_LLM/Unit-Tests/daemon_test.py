@@ -0,0 +1,156 @@
+import unittest
+import os
+import sys
+import json
+import socket
+import tempfile
+import threading
+import wave
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from daemon import InferenceDaemon, make_server, request
+from LLM import MistralClient
+from model_registry import ModelRegistry
+from transcript_cache import TranscriptCache
+from fake_llm_server import FakeLLMServer
+
+TRANSCRIPT = "Mayday mayday, this is Sea Turtle, we are taking on water with three on board."
+
+
+class FakeModel:
+    def __init__(self, release=None):
+        self.calls = 0
+        self.release = release
+
+    def transcribe(self, audio, **options):
+        if self.release is not None:
+            self.release.wait()
+        self.calls += 1
+        return {'text': ' ' + TRANSCRIPT, 'segments': [], 'language': 'en'}
+
+
+def llm_answer(body):
+    return json.dumps({'position': {'value': 'off the Needles', 'confidence': 0.9}})
+
+
+class TestInferenceDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.audio = os.path.join(self.tmp.name, 'call.wav')
+        with wave.open(self.audio, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(np.zeros(16000, dtype='<i2').tobytes())
+        self.llm = FakeLLMServer(llm_answer)
+        self.llm.__enter__()
+        self.loads = []
+        self.model = FakeModel()
+
+    def tearDown(self):
+        self.llm.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def start(self, unix_socket=None, **kwargs):
+        def loader(model_size, device, dtype):
+            self.loads.append(model_size)
+            return self.model
+        daemon = InferenceDaemon(model_size='base', registry=ModelRegistry(loader=loader),
+                                 client=MistralClient(api_url=self.llm.url),
+                                 cache=TranscriptCache(os.path.join(self.tmp.name, 'cache')), **kwargs)
+        daemon.start()
+        server = make_server(daemon, port=0, unix_socket=unix_socket)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            daemon.stop()
+        self.addCleanup(stop)
+        if unix_socket:
+            return {'unix_socket': unix_socket}
+        return {'url': f'http://127.0.0.1:{server.server_port}'}
+
+    def submit(self, target, **options):
+        options.setdefault('audio_path', self.audio)
+        return request('POST', '/jobs', body=json.dumps(options).encode('utf-8'),
+                       headers={'Content-Type': 'application/json'}, **target)
+
+    def test_jobs_reuse_the_warm_model(self):
+        target = self.start()
+        self.assertEqual(self.loads, ['base'])  # Loaded at start, before any job
+        for _ in range(3):
+            status, body = self.submit(target, use_cache=False)
+            self.assertEqual(status, 200)
+        self.assertEqual(self.loads, ['base'])
+        self.assertEqual(self.model.calls, 3)
+        output = body['output']
+        self.assertEqual(set(output), {'transcript', 'triage', 'llm_result', 'timings'})
+        self.assertEqual(output['transcript'], TRANSCRIPT)
+        self.assertEqual(output['triage']['decision'], 'distress')
+        self.assertEqual(output['llm_result']['ship_name']['value'], 'Sea Turtle')
+        self.assertEqual(output['llm_result']['position']['value'], 'off the Needles')
+
+        status, health = request('GET', '/health', **target)
+        self.assertEqual(status, 200)
+        self.assertEqual((health['models'], health['completed'], health['queued']), (['base'], 3, 0))
+
+    def test_uploaded_bytes(self):
+        target = self.start()
+        with open(self.audio, 'rb') as f:
+            data = f.read()
+        status, body = request('POST', '/jobs?triage=0', body=data,
+                               headers={'Content-Type': 'application/octet-stream'}, **target)
+        self.assertEqual(status, 200)
+        self.assertIsNone(body['output']['triage'])
+        self.assertEqual(body['output']['transcript'], TRANSCRIPT)
+
+    def test_bad_requests(self):
+        target = self.start()
+        status, body = self.submit(target, audio_path=os.path.join(self.tmp.name, 'missing.wav'))
+        self.assertEqual(status, 400)
+        status, body = self.submit(target, beam_size=5)
+        self.assertEqual(status, 400)
+        self.assertIn('beam_size', body['error'])
+        for payload in (b'[1]', b'"audio.wav"', b'{not json'):
+            status, body = request('POST', '/jobs', body=payload, headers={'Content-Type': 'application/json'},
+                                   **target)
+            self.assertEqual(status, 400, payload)
+
+    def test_queue_limit_and_async_jobs(self):
+        release = threading.Event()
+        self.model = FakeModel(release)
+        target = self.start(workers=1, queue_size=1)
+        body = json.dumps({'audio_path': self.audio, 'use_cache': False}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        # One job running, one waiting, the third is refused
+        statuses = []
+        for i in range(3):
+            status, job = request('POST', '/jobs?wait=0', body=body, headers=headers, **target)
+            statuses.append(status)
+            if i == 0:
+                while request('GET', '/health', **target)[1]['running'] == 0:
+                    pass  # Wait until the worker has picked the first job up
+            if i == 1:
+                waiting = job['id']
+        self.assertEqual(statuses, [202, 202, 503])
+        self.assertEqual(request('GET', f'/jobs/{waiting}', **target)[1]['status'], 'queued')
+        release.set()
+        while request('GET', f'/jobs/{waiting}', **target)[1]['status'] in ('queued', 'running'):
+            pass
+        status, job = request('GET', f'/jobs/{waiting}', **target)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['output']['transcript'], TRANSCRIPT)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets not available")
+    def test_unix_socket(self):
+        target = self.start(unix_socket=os.path.join(self.tmp.name, 'daemon.sock'))
+        status, body = self.submit(target)
+        self.assertEqual(status, 200)
+        self.assertEqual(body['output']['transcript'], TRANSCRIPT)
+
+
+if __name__ == '__main__':
+    unittest.main()
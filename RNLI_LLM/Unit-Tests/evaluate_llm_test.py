@@ -0,0 +1,154 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fast_extract
+from evaluate_llm import case_key, field_matches, load_cases, normalize, run_evaluation, save_state, summarize
+from LLM import MistralClient
+from fake_llm_server import FakeLLMServer
+
+CASES = {
+    'sinking': {'transcript': "This is Sea Turtle, we are sinking.",
+                'expected': {'ship_name': 'Sea Turtle', 'number_of_people': 'Three'}},
+    'fire': {'transcript': "This is Blue Horizon, fire on board.",
+             'expected': {'ship_name': 'Blue Horizon', 'number_of_people': '2'}},
+    'mob': {'transcript': "This is Jenny Sue, man overboard.",
+            'expected': {'ship_name': 'Jenny Sue', 'number_of_people': 'unknown'}},
+}
+ANSWERS = {
+    'Sea Turtle': {'ship_name': 'Sea Turtle', 'number_of_people': '3 crew'},
+    'Blue Horizon': {'ship_name': 'Blue Horizon.', 'number_of_people': 'four'},
+    'Jenny Sue': {'ship_name': 'Jenny Sue', 'number_of_people': 'Unknown'},
+}
+
+
+class SlowAnswers:
+    """Answers by ship name after a short delay and tracks how many requests overlap."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, body):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        prompt = body['messages'][0]['content']
+        answer = next(a for name, a in ANSWERS.items() if name in prompt)
+        return json.dumps({field: {'value': value, 'confidence': 0.9} for field, value in answer.items()})
+
+
+class TestNormalization(unittest.TestCase):
+    def test_equivalent_values(self):
+        self.assertEqual(normalize("Three"), '3')
+        self.assertEqual(normalize("forty-one"), '41')
+        self.assertEqual(normalize("N/A"), '0')
+        self.assertEqual(normalize("Not stated."), '0')
+        self.assertEqual(normalize("UNKNOWN"), 'unknown')
+        self.assertEqual(normalize("Sea Turtle."), 'sea turtle')
+        self.assertTrue(field_matches('number_of_people', '3 crew', 'Three'))
+        self.assertTrue(field_matches('injuries', 'two injured', '2'))
+        # Positions are not reduced to the number they start with
+        self.assertFalse(field_matches('position', 'five miles west', 'five miles east'))
+
+    def test_list_cases_are_keyed_by_position(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'cases.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(list(CASES.values()), f)
+            self.assertEqual(list(load_cases(path)), ['1', '2', '3'])
+
+
+class TestEvaluationRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self.tmp.name, 'state.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cases_run_concurrently_and_are_scored(self):
+        answers = SlowAnswers()
+        with FakeLLMServer(answers) as server:
+            client = MistralClient(api_url=server.url)
+            records = run_evaluation(CASES, client=client, state_path=self.state, concurrency=3, fast_path=False)
+        self.assertEqual(answers.peak, 3)
+        self.assertTrue(records['sinking']['fields']['number_of_people']['ok'])
+        self.assertFalse(records['fire']['fields']['number_of_people']['ok'])
+        self.assertTrue(records['fire']['fields']['ship_name']['ok'])
+        summary = summarize(records)
+        self.assertEqual(summary['passed'], 2)
+        self.assertEqual(summary['field_accuracy'], {'ship_name': 1.0, 'number_of_people': 2 / 3})
+        self.assertGreaterEqual(summary['latency_s']['p50'], 0.2)
+        self.assertEqual(set(summary['latency_s']), {'p50', 'p95', 'p99'})
+
+    def test_unchanged_cases_are_skipped(self):
+        with FakeLLMServer(SlowAnswers(delay=0)) as server:
+            client = MistralClient(api_url=server.url)
+            run_evaluation(CASES, client=client, state_path=self.state, fast_path=False)
+            self.assertEqual(len(server.requests), 3)
+
+            skipped = []
+            records = run_evaluation(CASES, client=client, state_path=self.state, fast_path=False,
+                                     on_done=lambda name, record, was_skipped: skipped.append(was_skipped))
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(skipped, [True, True, True])
+            self.assertEqual(summarize(records)['passed'], 2)
+
+            # Editing one case's expectations re-runs only that case
+            changed = dict(CASES, fire=dict(CASES['fire'], expected={'ship_name': 'Blue Horizon',
+                                                                     'number_of_people': '4'}))
+            records = run_evaluation(changed, client=client, state_path=self.state, fast_path=False)
+            self.assertEqual(len(server.requests), 4)
+            self.assertEqual(summarize(records)['passed'], 3)
+
+            # So does a different prompt or model
+            client.model = 'another-model'
+            run_evaluation(changed, client=client, state_path=self.state, fast_path=False)
+            self.assertEqual(len(server.requests), 7)
+
+    def test_fast_path_key_follows_the_rules(self):
+        client = MistralClient(api_url='http://127.0.0.1:9/v1/chat/completions')
+        case = {'transcript': "Mayday, this is the vessel Sea Turtle, three crew on board, we are sinking.",
+                'expected': {'ship_name': 'Sea Turtle'}}
+        key = case_key(client, case, fast_path=True)
+        self.assertNotEqual(key, case_key(client, case, fast_path=False))
+        # Rules that fill different fields send a different request, so the case re-runs
+        extract_fields = fast_extract.extract_fields
+        fast_extract.extract_fields = lambda transcript: {}
+        try:
+            self.assertNotEqual(case_key(client, case, fast_path=True), key)
+        finally:
+            fast_extract.extract_fields = extract_fields
+        self.assertEqual(case_key(client, case, fast_path=True), key)
+
+    def test_failed_requests_are_retried_next_run(self):
+        with FakeLLMServer(lambda body: "not json") as server:
+            client = MistralClient(api_url=server.url)
+            records = run_evaluation(CASES, client=client, state_path=self.state, fast_path=False)
+            self.assertEqual(summarize(records)['errors'], 3)
+        with FakeLLMServer(SlowAnswers(delay=0)) as server:
+            client = MistralClient(api_url=server.url)
+            records = run_evaluation(CASES, client=client, state_path=self.state, fast_path=False)
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(summarize(records)['errors'], 0)
+
+    def test_failed_state_write_leaves_no_temp_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'state.json')
+            with self.assertRaises(TypeError):
+                save_state(path, {'case': object()})
+            self.assertEqual(os.listdir(tmpdir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# Minimal OpenAI-compatible chat completions server for the LLM unit tests.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer:
+    """
+    Serves /v1/chat/completions on a free local port. `responder(body)` receives
+    the parsed request body and returns the assistant message content.
+    Records every request body and the client ports that connected.
+    Requests with "stream": true get the content back as SSE chunks of
+    `stream_chunk` characters.
+    """
+
+    def __init__(self, responder, stream_chunk=7):
+        self.responder = responder
+        self.requests = []
+        self.client_ports = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length))
+                server.requests.append(body)
+                server.client_ports.add(self.client_address[1])
+                content = server.responder(body)
+                if body.get('stream'):
+                    self._stream(content, stream_chunk)
+                    return
+                payload = json.dumps({
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120},
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, content, size):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                events = [{'choices': [{'index': 0, 'delta': {'role': 'assistant'}}]}]
+                events += [{'choices': [{'index': 0, 'delta': {'content': content[i:i + size]}}]}
+                           for i in range(0, len(content), size)]
+                # Raw UTF-8 and no charset in the Content-Type, like llama.cpp's server
+                for event in [json.dumps(e, ensure_ascii=False) for e in events] + ['[DONE]']:
+                    data = f'data: {event}\n\n'.encode('utf-8')
+                    self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                    self.wfile.flush()
+                self.wfile.write(b'0\r\n\r\n')
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
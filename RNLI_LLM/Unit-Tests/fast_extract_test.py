@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import json
+import re
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fast_extract import FIELDS, WORD_NUMBERS, corpus_report, extract_fields, split_confident
+from LLM import MistralClient
+from fake_llm_server import FakeLLMServer
+
+CASES = os.path.join(os.path.dirname(__file__), 'llm_testcases', 'test1.json')
+
+
+def same_value(field, actual, expected):
+    def normalize(val):
+        val = re.sub(r'[^a-z0-9 ]', '', (val or '').strip().lower())
+        if val in {'', 'none', 'no', '0'}:
+            return '0'
+        return str(WORD_NUMBERS[val]) if val in WORD_NUMBERS else val
+    return normalize(actual) == normalize(expected)
+
+
+class TestFastExtract(unittest.TestCase):
+    def test_formulaic_call(self):
+        fields = extract_fields("Mayday mayday, this is fishing vessel Morning Star, position 50 degrees 43 "
+                                "minutes North, 1 degree 20 minutes West, 4 persons on board, engine failure.")
+        self.assertEqual(fields['ship_name']['value'], 'Morning Star')
+        self.assertEqual(fields['boat_name']['value'], 'Morning Star')
+        self.assertEqual(fields['position']['value'], '50 degrees 43 minutes North, 1 degree 20 minutes West')
+        self.assertEqual(fields['number_of_people']['value'], 'Four')
+        self.assertEqual(fields['distress_type']['value'], 'engine failure')
+        self.assertNotIn('injuries', fields)
+
+    def test_pronouns_stations_and_bare_names_are_not_confident(self):
+        self.assertNotIn('ship_name', extract_fields("Our boat I think is taking on water"))
+        self.assertNotIn('ship_name', extract_fields("Vessel calling, this is Holyhead Coastguard, say again"))
+        _, missing = split_confident(extract_fields("This is John, we need help"))
+        self.assertIn('ship_name', missing)
+        fields = extract_fields("Mayday, mayday, mayday, this is Pandora, Pandora, Pandora.")
+        self.assertEqual(fields['ship_name'], {'value': 'Pandora', 'confidence': 0.8})
+
+    def test_people_groups_are_added_up(self):
+        fields = extract_fields("This is Mayfly. Two adults, one child onboard.")
+        self.assertEqual(fields['number_of_people']['value'], 'Three')
+
+    def test_ambiguous_distress_is_left_to_the_llm(self):
+        _, missing = split_confident(extract_fields("We're adrift off Falmouth. Engine failure."))
+        self.assertIn('distress_type', missing)
+
+    def test_corpus_hit_rate_and_accuracy(self):
+        with open(CASES, 'r', encoding='utf-8') as f:
+            cases = json.load(f)
+        report = corpus_report(cases, compare=same_value)
+        # Every field the rules are confident about must be right
+        for field in FIELDS:
+            if report['accuracy'][field] is not None:
+                self.assertEqual(report['accuracy'][field], 1.0, field)
+        # Bare "this is X" names are confirmed by the LLM, so only a quarter of calls skip it
+        self.assertGreaterEqual(report['no_llm_rate'], 0.25)
+        self.assertLessEqual(report['fields_sent_to_llm'], 0.25)
+
+
+def answer_requested_fields(body):
+    prompt = body['messages'][0]['content']
+    fields = [line[2:].split()[0] for line in prompt.splitlines()
+              if line.startswith('- ') and line[2:].split()[0] in FIELDS]
+    return json.dumps({name: {'value': 'from llm', 'confidence': 0.5} for name in fields})
+
+
+class TestFastPathClient(unittest.TestCase):
+    def test_fully_formulaic_call_skips_the_llm(self):
+        transcript = ("Mayday, this is the vessel Sea Turtle. We are taking on water five miles west of "
+                      "Catalina Island. Three crew on board. No injuries.")
+        with FakeLLMServer(answer_requested_fields) as server:
+            client = MistralClient(api_url=server.url)
+            result = client.extract(transcript, fast_path=True)
+        self.assertEqual(server.requests, [])
+        self.assertEqual(list(result), list(FIELDS))
+        self.assertEqual(result['ship_name'], {'value': 'Sea Turtle', 'confidence': 0.9})
+
+    def test_only_missing_fields_are_requested(self):
+        transcript = "Mayday, mayday, this is Blue Horizon. Five on board. Engine failure."
+        with FakeLLMServer(answer_requested_fields) as server:
+            client = MistralClient(api_url=server.url)
+            result = client.extract(transcript, fast_path=True)
+            streamed = []
+            client.extract_stream(transcript, on_field=lambda name, field: streamed.append(name),
+                                  use_cache=False, fast_path=True)
+        prompt = server.requests[0]['messages'][0]['content']
+        self.assertIn('- position', prompt)
+        self.assertIn('- injuries', prompt)
+        self.assertNotIn('- ship_name', prompt)
+        self.assertEqual(result['ship_name']['value'], 'Blue Horizon')
+        self.assertEqual(result['position']['value'], 'from llm')
+        self.assertEqual(list(result), list(FIELDS))
+        # Rule fields are emitted first, each field exactly once
+        self.assertEqual(sorted(streamed), sorted(FIELDS))
+        self.assertEqual(streamed[0], 'ship_name')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import tempfile
+import wave
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from feature_store import FeatureStore
+from transcript_cache import hash_audio
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(os.path.join(self.tmp.name, 'features'))
+        self.audio = os.path.join(self.tmp.name, 'call.wav')
+        with wave.open(self.audio, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes((np.arange(16000) % 200).astype('<i2').tobytes())
+        self.decodes = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def decoder(self, path, sr):
+        self.decodes.append(path)
+        return np.full(sr, 0.25, dtype=np.float32)
+
+    def test_decoded_audio_is_stored_and_memory_mapped(self):
+        first = self.store.load_audio(self.audio, decoder=self.decoder)
+        second = self.store.load_audio(self.audio, decoder=self.decoder)
+        self.assertEqual(len(self.decodes), 1)
+        self.assertIsInstance(second, np.memmap)
+        self.assertEqual(second.mode, 'r')
+        np.testing.assert_array_equal(first, second)
+        # Another decoder resamples differently, so it gets its own entry
+        self.store.load_audio(self.audio, decoder=self.decoder, source='librosa')
+        self.assertEqual(len(self.decodes), 2)
+
+    def test_same_content_shares_an_entry(self):
+        copy = os.path.join(self.tmp.name, 'copy.wav')
+        with open(self.audio, 'rb') as src, open(copy, 'wb') as dst:
+            dst.write(src.read())
+        self.store.load_audio(self.audio, decoder=self.decoder)
+        self.store.load_audio(copy, decoder=self.decoder)
+        self.assertEqual(self.decodes, [self.audio])
+
+    def test_empty_audio_is_stored_too(self):
+        def silent(path, sr):
+            self.decodes.append(path)
+            return np.zeros(0, dtype=np.float32)
+        self.store.load_audio(self.audio, decoder=silent)
+        again = self.store.load_audio(self.audio, decoder=silent)
+        self.assertEqual(again.size, 0)
+        self.assertEqual(len(self.decodes), 1)
+
+    def test_stored_mel_skips_the_front_end(self):
+        mel = np.zeros((1, 128, 3000), dtype=np.float32)
+        self.store.put(hash_audio(self.audio), 'ffmpeg_mel128_overlap2', mel)
+        result = self.store.log_mel_windows(self.audio, 128, decoder=self.decoder)
+        self.assertEqual(result.shape, (1, 128, 3000))
+        self.assertEqual(self.decodes, [])
+
+    def test_least_recently_used_arrays_are_evicted(self):
+        store = FeatureStore(os.path.join(self.tmp.name, 'small'), max_mb=1)
+        for i, key in enumerate(['aa' * 32, 'bb' * 32, 'cc' * 32]):
+            store.put(key, 'pcm', np.zeros(100000, dtype=np.float32))  # 400 KB each
+            os.utime(store._path(key, 'pcm'), (i, i))
+        store.put('dd' * 32, 'pcm', np.zeros(100000, dtype=np.float32))
+        self.assertIsNone(store.get('aa' * 32, 'pcm'))
+        self.assertIsNotNone(store.get('dd' * 32, 'pcm'))
+        self.assertEqual(store.put('ee' * 32, 'pcm', np.zeros(0)).size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import sys
+import json
+import re
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from LLM import BATCH_PROMPT_PREFIX, FIELD_LINES, MistralClient, parse_batch_json, plan_batches
+from fake_llm_server import FakeLLMServer
+
+
+def fields(ship_name):
+    answer = {name: {'value': 'unknown', 'confidence': 0.0} for name in FIELD_LINES}
+    answer['ship_name'] = {'value': ship_name, 'confidence': 0.9}
+    return answer
+
+
+def transcripts_in(prompt):
+    if prompt.startswith(BATCH_PROMPT_PREFIX):
+        return dict((int(n), t) for n, t in re.findall(r"# \[(\d+)\] '(.*)'", prompt))
+    return {0: prompt.split("# '", 1)[1].split("'\n", 1)[0]}
+
+
+def echo_batch(body):
+    # Answer every transcript with its own text as the ship name, ids in reverse order
+    found = transcripts_in(body['messages'][0]['content'])
+    if 0 in found:
+        return json.dumps(fields(found[0]))
+    items = [dict(fields(t), id=n) for n, t in found.items()]
+    return "```json\n" + json.dumps(items[::-1]) + "\n```"
+
+
+class TestBatchPlanning(unittest.TestCase):
+    def test_short_transcripts_share_requests(self):
+        self.assertEqual(plan_batches(["Help. Boat sinking."] * 20, max_batch=8), [
+            list(range(0, 8)), list(range(8, 16)), list(range(16, 20))])
+
+    def test_long_transcripts_get_smaller_batches(self):
+        long_call = "word " * 2000  # ~2500 tokens each
+        batches = plan_batches([long_call] * 6, context_tokens=8192)
+        self.assertTrue(all(len(b) <= 2 for b in batches))
+        self.assertEqual(sum(batches, []), list(range(6)))
+
+    def test_parse_drops_bad_entries(self):
+        items = [dict(fields('B'), id=2), dict(fields('X'), id=9), "x", fields('Y'), dict(fields('A'), id="1")]
+        answers = parse_batch_json(json.dumps(items), 2)
+        self.assertEqual(answers, {2: fields('B'), 1: fields('A')})
+
+    def test_parse_drops_items_without_the_six_fields(self):
+        partial = fields('B')
+        del partial['injuries']
+        items = [{'id': 1}, dict(partial, id=2), dict(fields('C'), id=3, position='unknown')]
+        self.assertEqual(parse_batch_json(json.dumps(items), 3), {})
+
+    def test_parse_checks_only_the_fields_asked_for(self):
+        items = [{'id': 1, 'position': {'value': 'unknown', 'confidence': 0.0}}, {'id': 2}]
+        answers = parse_batch_json(json.dumps(items), 2, [['position'], None])
+        self.assertEqual(answers, {1: {'position': {'value': 'unknown', 'confidence': 0.0}}})
+
+
+class TestBatchExtraction(unittest.TestCase):
+    def test_results_are_split_back_in_order(self):
+        transcripts = [f"vessel {i}" for i in range(10)]
+        with FakeLLMServer(echo_batch) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(transcripts, max_batch=4)
+        self.assertEqual([r['ship_name']['value'] for r in results], transcripts)
+        # 4 + 4 + 2 transcripts, one request per batch
+        self.assertEqual(len(server.requests), 3)
+
+    def test_malformed_batch_falls_back_to_single_requests(self):
+        def broken_batch(body):
+            if body['messages'][0]['content'].startswith(BATCH_PROMPT_PREFIX):
+                return "Sorry, here are the first ones: [{\"id\": 1, "
+            return echo_batch(body)
+        transcripts = ["vessel a", "vessel b", "vessel c"]
+        with FakeLLMServer(broken_batch) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(transcripts)
+        self.assertEqual([r['ship_name']['value'] for r in results], transcripts)
+        self.assertEqual(len(server.requests), 4)
+
+    def test_missing_ids_are_retried_individually(self):
+        def drop_second(body):
+            content = echo_batch(body)
+            if body['messages'][0]['content'].startswith(BATCH_PROMPT_PREFIX):
+                items = json.loads(content.strip('`json\n'))
+                return json.dumps([item for item in items if item['id'] != 2])
+            return content
+        transcripts = ["vessel a", "vessel b", "vessel c"]
+        with FakeLLMServer(drop_second) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(transcripts)
+        self.assertEqual([r['ship_name']['value'] for r in results], transcripts)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_empty_items_are_retried_individually(self):
+        def ids_only(body):
+            if body['messages'][0]['content'].startswith(BATCH_PROMPT_PREFIX):
+                return json.dumps([{'id': 1}, {'id': 2}])
+            return echo_batch(body)
+        with FakeLLMServer(ids_only) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(["vessel a", "vessel b"])
+        self.assertEqual([r['ship_name']['value'] for r in results], ["vessel a", "vessel b"])
+        self.assertEqual(len(server.requests), 3)
+
+    def test_fast_path_asks_each_transcript_only_for_missing_fields(self):
+        transcripts = ["Mayday mayday, this is the fishing vessel Blue Horizon, we are sinking, four people on board",
+                       "vessel b"]
+        with FakeLLMServer(echo_batch) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(transcripts, fast_path=True)
+        self.assertEqual(len(server.requests), 1)
+        prompt = server.requests[0]['messages'][0]['content']
+        self.assertEqual(prompt.count("#     fields:"), 1)
+        self.assertIn("#     fields: position, injuries\n", prompt)
+        self.assertEqual(results[0]['ship_name']['value'], 'Blue Horizon')  # From the rules
+        self.assertEqual(results[1]['ship_name']['value'], "vessel b")
+
+    def test_fast_path_fallback_asks_only_for_missing_fields(self):
+        def broken_batch(body):
+            if body['messages'][0]['content'].startswith(BATCH_PROMPT_PREFIX):
+                return "no"
+            return echo_batch(body)
+        transcripts = ["Mayday mayday, this is the fishing vessel Blue Horizon, we are sinking, four people on board",
+                       "vessel b"]
+        with FakeLLMServer(broken_batch) as server:
+            client = MistralClient(api_url=server.url)
+            results = client.extract_batch(transcripts, fast_path=True)
+        self.assertEqual(len(server.requests), 3)
+        single = server.requests[1]['messages'][0]['content']
+        self.assertIn(FIELD_LINES['position'], single)
+        self.assertNotIn(FIELD_LINES['ship_name'], single)
+        self.assertEqual(results[0]['ship_name']['value'], 'Blue Horizon')
+        self.assertEqual(results[1]['ship_name']['value'], "vessel b")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from LLM import MistralClient
+from llm_cache import LLMCache
+from fake_llm_server import FakeLLMServer
+
+REPLY = json.dumps({'ship_name': {'value': 'Sea Turtle', 'confidence': 0.95}})
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        cache = LLMCache(self.tmpdir.name)
+        with FakeLLMServer(lambda body: REPLY) as server:
+            client = MistralClient(api_url=server.url, cache=cache)
+            first = client.extract("This is the vessel Sea Turtle.")
+            second = client.extract("This is the vessel Sea Turtle.")
+            self.assertEqual(first, second)
+            self.assertEqual(len(server.requests), 1)
+            # A different temperature is a different request
+            client.temperature = 0.7
+            client.extract("This is the vessel Sea Turtle.")
+            self.assertEqual(len(server.requests), 2)
+            # Bypass
+            client.temperature = 0.2
+            client.extract("This is the vessel Sea Turtle.", use_cache=False)
+            self.assertEqual(len(server.requests), 3)
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+    def test_disk_tier_survives_a_new_process(self):
+        LLMCache(self.tmpdir.name).put('k' * 64, 'cached output')
+        fresh = LLMCache(self.tmpdir.name)
+        self.assertEqual(fresh.get('k' * 64), 'cached output')
+        self.assertEqual(fresh.get('k' * 64), 'cached output')
+        stats = fresh.stats()
+        self.assertEqual((stats['disk_hits'], stats['memory_hits'], stats['misses']), (1, 1, 0))
+
+    def test_ttl_and_memory_lru(self):
+        cache = LLMCache(self.tmpdir.name, memory_entries=1, ttl_seconds=1)
+        cache.put('a' * 64, 'a')
+        cache.put('b' * 64, 'b')
+        self.assertEqual(list(cache._memory), ['b' * 64])
+        cache._memory.clear()
+        path = cache._path('a' * 64)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'created': 0, 'value': 'a'}, f)  # Written long ago
+        self.assertIsNone(cache.get('a' * 64))
+        self.assertFalse(os.path.exists(path))
+
+    def test_disk_tier_is_size_capped(self):
+        cache = LLMCache(self.tmpdir.name, max_mb=1)
+        for i, name in enumerate('abc'):
+            cache.put(name * 64, 'x' * 400 * 1024)
+            os.utime(cache._path(name * 64), (i, i))  # Older first
+        self.assertFalse(os.path.exists(cache._path('a' * 64)))
+        self.assertTrue(os.path.exists(cache._path('c' * 64)))
+
+    def test_failed_write_leaves_no_temp_file(self):
+        cache = LLMCache(self.tmpdir.name)
+        cache.put('d' * 64, {'ok': 1})
+        with self.assertRaises(TypeError):
+            cache.put('e' * 64, {'bad': object()})
+        leftovers = [n for _, _, names in os.walk(self.tmpdir.name) for n in names if n.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+
+import unittest
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from LLM import LLMConnectionError, LLMOutputError, MistralClient
+from fake_llm_server import FakeLLMServer
+
+
+def echo_ship_name(body):
+    # Reply with the transcript itself as the ship name so results can be matched to inputs
+    prompt = body['messages'][0]['content']
+    transcript = prompt.split("# '", 1)[1].split("'\n", 1)[0]
+    return "Here you go:\n" + json.dumps({'ship_name': {'value': transcript, 'confidence': 0.9}})
+
+
+class TestMistralClient(unittest.TestCase):
+    def test_extract_many_keeps_order_and_reuses_connections(self):
+        with FakeLLMServer(echo_ship_name) as server:
+            client = MistralClient(api_url=server.url, pool_size=2)
+            transcripts = [f"vessel {i}" for i in range(10)]
+            results = client.extract_many(transcripts, concurrency=2)
+            client.close()
+        self.assertEqual([r['ship_name']['value'] for r in results], transcripts)
+        # Ten requests over a pool of two keep-alive connections
+        self.assertLessEqual(len(server.client_ports), 2)
+
+    def test_malformed_output_raises_instead_of_exiting(self):
+        with FakeLLMServer(lambda body: "I could not find anything.") as server:
+            client = MistralClient(api_url=server.url)
+            with self.assertRaises(LLMOutputError) as ctx:
+                client.extract("Help. Boat sinking.")
+            self.assertIn("could not find", ctx.exception.content)
+            results = client.extract_many(["a", "b"], return_exceptions=True)
+            self.assertTrue(all(isinstance(r, LLMOutputError) for r in results))
+
+    def test_connection_error_is_typed(self):
+        client = MistralClient(api_url='http://127.0.0.1:9/v1/chat/completions', timeout=2)
+        with self.assertRaises(LLMConnectionError):
+            client.extract("Mayday")
+
+
+if __name__ == '__main__':
+    unittest.main()
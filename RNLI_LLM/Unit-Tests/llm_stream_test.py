@@ -0,0 +1,58 @@
+
+import unittest
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from LLM import MistralClient
+from json_stream import IncrementalFieldParser
+from fake_llm_server import FakeLLMServer
+
+EXPECTED = {
+    'ship_name': {'value': 'Sea "Turtle"', 'confidence': 0.95},
+    'position': {'value': 'five miles west of Catalina Island, {approx}', 'confidence': 0.8},
+    'number_of_people': {'value': '3', 'confidence': 0.99},
+}
+
+
+class TestIncrementalFieldParser(unittest.TestCase):
+    def test_fields_emitted_as_soon_as_complete(self):
+        text = "```json\n" + json.dumps(EXPECTED, indent=2) + "\n```"
+        emitted = []
+        parser = IncrementalFieldParser(lambda name, field: emitted.append((name, len(seen))))
+        seen = ''
+        for c in text:
+            seen += c
+            parser.feed(c)
+        self.assertEqual(parser.fields, EXPECTED)
+        self.assertTrue(parser.done)
+        # ship_name is available long before the whole response has arrived
+        self.assertEqual(emitted[0][0], 'ship_name')
+        self.assertLess(emitted[0][1], len(text) // 2)
+
+    def test_scalar_values(self):
+        parser = IncrementalFieldParser()
+        parser.feed('{"a": 1, "b": "x,y}", "c": null, "d": [1, {"e": 2}]}')
+        self.assertEqual(parser.fields, {'a': 1, 'b': 'x,y}', 'c': None, 'd': [1, {'e': 2}]})
+
+
+class TestStreamingExtraction(unittest.TestCase):
+    def test_extract_stream(self):
+        with FakeLLMServer(lambda body: json.dumps(EXPECTED, indent=2)) as server:
+            client = MistralClient(api_url=server.url)
+            fields = []
+            result = client.extract_stream("Mayday", on_field=lambda name, field: fields.append(name))
+        self.assertEqual(result, EXPECTED)
+        self.assertEqual(fields, list(EXPECTED))
+        self.assertTrue(server.requests[0]['stream'])
+
+    def test_stream_is_decoded_as_utf8(self):
+        # text/event-stream without a charset must not be read as ISO-8859-1
+        with FakeLLMServer(lambda body: 'Éire – Ballycotton', stream_chunk=1) as server:
+            client = MistralClient(api_url=server.url)
+            self.assertEqual(''.join(client.stream({'messages': []})), 'Éire – Ballycotton')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from LLM import (FIELD_LINES, MAX_TOKENS, VALUE_MAX_CHARS, LLMOutputError, MistralClient, parse_compact_json,
+                 schema_max_tokens)
+from fake_llm_server import FakeLLMServer
+
+ANSWER = {
+    'ship_name': ('Sea Turtle', 0.95),
+    'position': ('five miles west of Catalina Island', 0.9),
+    'number_of_people': ('3', 0.9),
+    'injuries': ('unknown', 0.5),
+    'distress_type': ('taking on water', 0.9),
+    'boat_name': ('Sea Turtle', 0.95),
+}
+
+
+def compact_answer(body):
+    # Answer exactly the fields the schema asks for, in the compact layout
+    fields = body['response_format']['json_schema']['schema']['required']
+    return json.dumps({name: {'v': ANSWER[name][0], 'c': ANSWER[name][1]} for name in fields},
+                      separators=(',', ':'))
+
+
+class TestStructuredOutput(unittest.TestCase):
+    def test_request_carries_schema_and_small_token_cap(self):
+        with FakeLLMServer(compact_answer) as server:
+            client = MistralClient(api_url=server.url, structured_output=True)
+            result = client.extract("This is the vessel Sea Turtle.")
+        body = server.requests[0]
+        schema = body['response_format']['json_schema']['schema']
+        self.assertEqual(schema['required'], list(FIELD_LINES))
+        self.assertEqual(body['max_tokens'], schema_max_tokens())
+        self.assertLess(body['max_tokens'], MAX_TOKENS)
+        self.assertEqual(result['ship_name'], {'value': 'Sea Turtle', 'confidence': 0.95})
+        self.assertEqual(list(result), list(FIELD_LINES))
+
+    def test_token_cap_fits_digit_by_digit_values(self):
+        # A longest-allowed coordinate value, one token per character, plus the field's own JSON
+        value = ('50 12.345 N 001 45.678 W ' * 5)[:VALUE_MAX_CHARS]
+        answer = json.dumps({'position': {'v': value, 'c': 0.95}}, separators=(',', ':'))
+        self.assertGreaterEqual(schema_max_tokens(['position']), len(answer))
+
+    def test_compact_output_is_much_shorter(self):
+        indented = json.dumps({name: {'value': v, 'confidence': c} for name, (v, c) in ANSWER.items()}, indent=4)
+        compact = compact_answer({'response_format': {'json_schema': {'schema': {'required': list(ANSWER)}}}})
+        self.assertLess(len(compact), len(indented) * 0.6)
+
+    def test_fast_path_requests_only_missing_fields(self):
+        with FakeLLMServer(compact_answer) as server:
+            client = MistralClient(api_url=server.url, structured_output=True)
+            result = client.extract("Mayday, this is Blue Horizon. Five on board. Engine failure.", fast_path=True)
+        schema = server.requests[0]['response_format']['json_schema']['schema']
+        self.assertNotIn('ship_name', schema['required'])
+        self.assertLess(server.requests[0]['max_tokens'], schema_max_tokens())
+        self.assertEqual(result['ship_name']['value'], 'Blue Horizon')
+        self.assertEqual(result['position']['value'], 'five miles west of Catalina Island')
+
+    def test_stream_emits_expanded_fields(self):
+        with FakeLLMServer(compact_answer) as server:
+            client = MistralClient(api_url=server.url, structured_output=True)
+            fields = {}
+            result = client.extract_stream("Mayday", on_field=fields.__setitem__)
+        self.assertEqual(fields, result)
+        self.assertEqual(fields['injuries'], {'value': 'unknown', 'confidence': 0.5})
+
+    def test_parser_is_strict(self):
+        with self.assertRaises(LLMOutputError):
+            parse_compact_json('Here you go: {"ship_name": {"v": "x", "c": 1}}', ['ship_name'])
+        with self.assertRaises(LLMOutputError):
+            parse_compact_json('{"ship_name": {"v": "x"}}', ['ship_name'])
+        with self.assertRaises(LLMOutputError):
+            parse_compact_json('{"ship_name": {"v": "x", "c": 1}}', ['ship_name', 'position'])
+        self.assertEqual(parse_compact_json(' {"ship_name":{"v":"x","c":1}}\n', ['ship_name']),
+                         {'ship_name': {'value': 'x', 'confidence': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+
+import unittest
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+class TestModelRegistry(unittest.TestCase):
+    def make_registry(self, budget_mb=0):
+        self.loads = []
+
+        def loader(model_size, device, dtype):
+            self.loads.append((model_size, device, dtype))
+            return FakeModel(model_size)
+
+        # Every fake model "uses" 1 MB
+        return ModelRegistry(loader=loader, memory_budget_mb=budget_mb,
+                             size_estimator=lambda model: 1024 * 1024)
+
+    def test_model_is_loaded_once_per_key(self):
+        registry = self.make_registry()
+        first = registry.get('base', device='cpu')
+        second = registry.get('base', device='cpu')
+        self.assertIs(first, second)
+        registry.get('base', device='cpu', dtype='float16')
+        self.assertEqual(self.loads, [('base', 'cpu', 'float32'), ('base', 'cpu', 'float16')])
+
+    def test_concurrent_get_loads_once(self):
+        registry = self.make_registry()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('tiny', device='cpu')))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.loads), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_lru_eviction_skips_models_in_use(self):
+        registry = self.make_registry(budget_mb=2)
+        with registry.use('tiny', device='cpu'):
+            registry.get('base', device='cpu')
+            registry.get('small', device='cpu')
+            loaded = [key[0] for key, _, _ in registry.loaded()]
+            # 'base' is the least recently used idle model, so it goes first
+            self.assertEqual(loaded, ['tiny', 'small'])
+
+    def test_warm_up_and_unload(self):
+        registry = self.make_registry()
+        registry.warm_up(['tiny', 'base'], device='cpu')
+        self.assertEqual(len(registry.loaded()), 2)
+        self.assertEqual(registry.unload('tiny', device='cpu'), 1)
+        self.assertEqual(registry.unload(), 1)
+        self.assertEqual(registry.loaded(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+
+import unittest
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from pipeline import Pipeline, Stage
+from main import output_names
+
+
+class TestPipeline(unittest.TestCase):
+    def test_stages_overlap(self):
+        def slow(name):
+            def fn(job):
+                time.sleep(0.05)
+                job.data.setdefault('trail', []).append(name)
+            return fn
+
+        pipe = Pipeline([Stage('transcribe', slow('transcribe')), Stage('extract', slow('extract'))])
+        start = time.perf_counter()
+        jobs = pipe.run(range(8))
+        elapsed = time.perf_counter() - start
+        self.assertEqual([job.item for job in jobs], list(range(8)))
+        self.assertTrue(all(job.data['trail'] == ['transcribe', 'extract'] for job in jobs))
+        # Sequential would take 16 x 0.05 s; overlapped it is ~9 x 0.05 s
+        self.assertLess(elapsed, 0.7)
+        self.assertGreater(pipe.busy['extract'], 0.35)
+
+    def test_backpressure_bounds_work_in_flight(self):
+        release = threading.Event()
+        started = []
+
+        def fast(job):
+            started.append(job.item)
+
+        def blocked(job):
+            release.wait()
+
+        pipe = Pipeline([Stage('decode', fast), Stage('llm', blocked)], queue_size=1)
+        runner = threading.Thread(target=pipe.run, args=(range(20),))
+        runner.start()
+        time.sleep(0.2)
+        # One job in the LLM stage, one queued for it, one held by decode: the rest wait upstream
+        self.assertLessEqual(len(started), 4)
+        release.set()
+        runner.join()
+        self.assertEqual(len(started), 20)
+
+    def test_errors_flow_to_the_writer(self):
+        written = []
+
+        def fail_odd(job):
+            if job.item % 2:
+                raise ValueError("bad audio")
+
+        pipe = Pipeline([Stage('decode', fail_odd, concurrency=3), Stage('extract', lambda job: None),
+                         Stage('write', lambda job: written.append((job.item, job.error)))],
+                        run_on_error={'write'})
+        jobs = pipe.run(range(6))
+        self.assertEqual(len(written), 6)
+        self.assertEqual([job.error is not None for job in jobs], [False, True] * 3)
+        self.assertIn('decode: ValueError: bad audio', jobs[1].error)
+        self.assertNotIn('extract', jobs[1].timings)
+
+    def test_output_names_do_not_collide(self):
+        names = output_names(['input/LOTTIE.m4a', 'input/LOTTIE.wav', 'other/LOTTIE.wav'])
+        self.assertEqual(names, {'input/LOTTIE.m4a': 'LOTTIE.m4a.json', 'input/LOTTIE.wav': 'LOTTIE.wav.json',
+                                 'other/LOTTIE.wav': 'LOTTIE.wav-2.json'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import pstats
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from profiling import profile_paths, profile_run, release_thread
+
+
+def busy_in_worker_thread():
+    return sum(i * i for i in range(50000))
+
+
+def run_in_thread():
+    worker = threading.Thread(target=busy_in_worker_thread)
+    worker.start()
+    worker.join()
+
+
+class TestProfileRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'call.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reports_written_next_to_output(self):
+        with profile_run(self.output):
+            run_in_thread()
+        paths = profile_paths(self.output)
+        self.assertEqual(paths['report'], os.path.join(self.tmp.name, 'call.profile.txt'))
+        with open(paths['report'], 'r', encoding='utf-8') as f:
+            report = f.read()
+        self.assertIn('Python functions by cumulative time', report)
+        self.assertIn('Peak RSS', report)
+        # Work done on other threads is merged into the report
+        self.assertIn('busy_in_worker_thread', report)
+        stats = pstats.Stats(paths['stats'])
+        self.assertTrue(any(func[2] == 'busy_in_worker_thread' for func in stats.stats))
+
+    def test_memory_report(self):
+        with profile_run(self.output, memory=True):
+            blocks = [bytearray(1024) for _ in range(1000)]
+        with open(profile_paths(self.output)['report'], 'r', encoding='utf-8') as f:
+            report = f.read()
+        self.assertIn('allocation sites', report)
+        self.assertIn('profiling_test.py', report)
+        del blocks
+
+    def test_reports_survive_exit(self):
+        with self.assertRaises(SystemExit):
+            with profile_run(self.output):
+                sys.exit(1)
+        self.assertTrue(os.path.exists(profile_paths(self.output)['report']))
+
+    def test_thread_outliving_the_run_stops_its_profiler(self):
+        next_job = threading.Event()
+        hooks = []
+
+        def long_lived_worker():
+            next_job.wait()
+            release_thread()
+            hooks.append(sys.getprofile())
+            busy_in_worker_thread()
+
+        with profile_run(self.output):
+            worker = threading.Thread(target=long_lived_worker)
+            worker.start()
+        next_job.set()
+        worker.join()
+        self.assertEqual(hooks, [None])
+
+    def test_disabled_is_a_no_op(self):
+        with profile_run(self.output, enabled=False) as paths:
+            run_in_thread()
+        self.assertIsNone(paths)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from startup_benchmark import ENTRY_POINTS, check, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | io
+import time:        50 |         50 |     encodings.aliases
+import time:       200 |        250 |   encodings
+import time:       900 |       1150 | argparse
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_parse_importtime(self):
+        total, modules = parse_importtime(IMPORTTIME)
+        self.assertEqual(total, 420 + 1150)  # Only top-level imports are summed
+        self.assertEqual(modules['encodings.aliases'], 50)
+
+    def test_entry_points_stay_light(self):
+        # Generous margin so a loaded test machine does not flake; heavy imports always fail
+        results = check(runs=2, budget_scale=2.0)
+        self.assertEqual(set(results), set(ENTRY_POINTS))
+        for name, result in results.items():
+            with self.subTest(name):
+                self.assertEqual(result['returncode'], 0)
+                self.assertEqual(result['heavy'], [])
+                self.assertLessEqual(result['import_ms'], result['budget_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
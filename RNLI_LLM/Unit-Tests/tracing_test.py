@@ -0,0 +1,146 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import tracing
+from tracing import Tracer
+from pipeline import Pipeline, Stage
+from LLM import MistralClient
+from fake_llm_server import FakeLLMServer
+
+
+def read_spans(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trace = os.path.join(self.tmp.name, 'trace.jsonl')
+        self.metrics = os.path.join(self.tmp.name, 'metrics.prom')
+
+    def tearDown(self):
+        tracing.configure(None, None)
+        self.tmp.cleanup()
+
+    def test_spans_nest_and_export_as_json_lines(self):
+        tracer = Tracer(self.trace, self.metrics)
+        with tracer.span('run', file='a.wav'):
+            with tracer.span('decode') as span:
+                span.set(method='ffmpeg')
+            tracer.add_time('whisper_encoder', 0.25)
+            tracer.add_time('whisper_encoder', 0.5)
+        tracer.flush()
+        spans = {s['name']: s for s in read_spans(self.trace)}
+        self.assertEqual(spans['decode']['parent_id'], spans['run']['span_id'])
+        self.assertEqual(spans['decode']['trace_id'], spans['run']['trace_id'])
+        self.assertEqual(spans['decode']['attrs'], {'method': 'ffmpeg'})
+        self.assertEqual(spans['run']['attrs']['whisper_encoder_s'], 0.75)
+        self.assertIsNone(spans['run']['parent_id'])
+
+    def test_threads_start_their_own_traces(self):
+        tracer = Tracer(self.trace)
+
+        def work():
+            with tracer.span('inner'):
+                pass
+        with tracer.span('outer'):
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+        tracer.flush()
+        spans = {s['name']: s for s in read_spans(self.trace)}
+        self.assertIsNone(spans['inner']['parent_id'])
+        self.assertNotEqual(spans['inner']['trace_id'], spans['outer']['trace_id'])
+
+    def test_parent_context_links_other_threads(self):
+        tracer = Tracer(self.trace)
+
+        def work(context):
+            with tracer.span('inner', parent=context):
+                with tracer.span('leaf'):
+                    pass
+        with tracer.span('outer'):
+            worker = threading.Thread(target=work, args=(tracer.context(),))
+            worker.start()
+            worker.join()
+        tracer.flush()
+        spans = {s['name']: s for s in read_spans(self.trace)}
+        self.assertEqual(spans['inner']['parent_id'], spans['outer']['span_id'])
+        self.assertEqual(spans['leaf']['parent_id'], spans['inner']['span_id'])
+        self.assertEqual(len({s['trace_id'] for s in spans.values()}), 1)
+
+    def test_pipeline_stages_share_one_trace(self):
+        tracing.configure(self.trace, None)
+        pipe = Pipeline([Stage('transcribe', lambda job: None, 2), Stage('extract', lambda job: None)])
+        pipe.run(range(2))
+        tracing.flush()
+        spans = read_spans(self.trace)
+        root = [s for s in spans if s['name'] == 'pipeline']
+        self.assertEqual(len(root), 1)
+        self.assertEqual(len(spans), 5)
+        self.assertEqual({s['trace_id'] for s in spans}, {root[0]['trace_id']})
+        self.assertTrue(all(s['parent_id'] == root[0]['span_id'] for s in spans if s['name'] != 'pipeline'))
+
+    def test_prometheus_text(self):
+        tracer = Tracer(metrics_path=self.metrics)
+        for _ in range(3):
+            with tracer.span('decode'):
+                pass
+        tracer.count('llm_tokens', 100, kind='prompt')
+        tracer.count('llm_tokens', 20, kind='completion')
+        tracer.count('llm_tokens', 50, kind='prompt')
+        tracer.flush()
+        with open(self.metrics, 'r', encoding='utf-8') as f:
+            text = f.read()
+        self.assertIn('# TYPE rnli_span_seconds summary', text)
+        self.assertIn('rnli_span_seconds_count{span="decode"} 3', text)
+        self.assertIn('# TYPE rnli_llm_tokens_total counter', text)
+        self.assertIn('rnli_llm_tokens_total{kind="prompt"} 150', text)
+        self.assertIn('rnli_llm_tokens_total{kind="completion"} 20', text)
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span('decode') as span:
+            span.set(x=1)
+        tracer.count('llm_tokens', 5)
+        tracer.flush()
+        self.assertEqual(tracer.prometheus_text(), '\n')
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_entry_point_flushes_on_exit(self):
+        tracing.configure(self.trace, None)
+
+        @tracing.traced('main')
+        def main():
+            with tracing.span('extract'):
+                sys.exit(1)
+        with self.assertRaises(SystemExit):
+            main()
+        spans = {s['name']: s for s in read_spans(self.trace)}
+        self.assertIn('SystemExit', spans['extract']['attrs']['error'])
+        self.assertIn('main', spans)
+
+    def test_llm_requests_record_http_parse_and_usage(self):
+        tracing.configure(self.trace, self.metrics)
+        with FakeLLMServer(lambda body: '{"ship_name": {"value": "x", "confidence": 1}}') as server:
+            client = MistralClient(api_url=server.url)
+            with tracing.span('extract'):
+                client.extract("Mayday")
+        tracing.flush()
+        spans = {s['name']: s for s in read_spans(self.trace)}
+        self.assertEqual(spans['llm_http']['parent_id'], spans['extract']['span_id'])
+        self.assertEqual(spans['llm_http']['attrs']['prompt_tokens'], 100)
+        self.assertEqual(spans['llm_http']['attrs']['completion_tokens'], 20)
+        self.assertIn('json_parse', spans)
+        with open(self.metrics, 'r', encoding='utf-8') as f:
+            self.assertIn('rnli_llm_tokens_total{kind="completion"} 20', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
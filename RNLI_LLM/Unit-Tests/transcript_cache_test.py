@@ -0,0 +1,63 @@
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from transcript_cache import TranscriptCache, cached_transcribe
+
+
+class TestTranscriptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = TranscriptCache(os.path.join(self.tmpdir.name, 'cache'))
+        self.audio = os.path.join(self.tmpdir.name, 'call.wav')
+        with open(self.audio, 'wb') as f:
+            f.write(b'RIFF fake audio bytes')
+        self.calls = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fake_whisper(self):
+        self.calls += 1
+        return {'text': ' Mayday.', 'segments': [{'start': 0.0, 'end': 1.0, 'text': ' Mayday.'}], 'language': 'en'}
+
+    def transcribe(self, **kwargs):
+        args = dict(model_size='base', language='en', options={'task': 'transcribe'})
+        args.update(kwargs)
+        return cached_transcribe(self.audio, args['model_size'], args['language'], args['options'],
+                                 self.fake_whisper, use_cache=args.get('use_cache', True), cache=self.cache)
+
+    def test_hit_skips_whisper(self):
+        first = self.transcribe()
+        second = self.transcribe()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first['text'], second['text'])
+        self.assertEqual(second['segments'][0]['end'], 1.0)
+        self.assertEqual(second['language'], 'en')
+
+    def test_key_includes_model_language_and_options(self):
+        self.transcribe()
+        self.transcribe(model_size='small')
+        self.transcribe(language=None)
+        self.transcribe(options={'task': 'translate'})
+        self.assertEqual(self.calls, 4)
+
+    def test_bypass_flag(self):
+        self.transcribe()
+        self.transcribe(use_cache=False)
+        self.assertEqual(self.calls, 2)
+
+    def test_lru_eviction(self):
+        self.cache.max_bytes = 1  # Only the entry just written survives
+        self.cache.put('a' * 64, {'text': 'old'})
+        time.sleep(0.01)
+        self.cache.put('b' * 64, {'text': 'new'})
+        self.assertIsNone(self.cache.get('a' * 64))
+        self.assertEqual(self.cache.get('b' * 64)['text'], 'new')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from triage import triage
+from LLM import LLMOutputError, MistralClient
+from fake_llm_server import FakeLLMServer
+
+INPUTS = os.path.join(os.path.dirname(__file__), 'inputs.json')
+
+CHATTER = [
+    "Radio check, radio check, this is Blue Horizon, how do you read, over.",
+    "Falmouth Coastguard, this is Sea Turtle, disregard my earlier mayday, no assistance required.",
+    "Morning Dave, see you at the pub tonight.",
+]
+
+# Mentions a position but nothing that says the vessel is in trouble
+AMBIGUOUS = "Coastguard, this is Jenny Sue, our position is two miles south of the Needles, over."
+
+
+class TestTriage(unittest.TestCase):
+    def test_recorded_calls(self):
+        with open(INPUTS, 'r', encoding='utf-8') as f:
+            cases = json.load(f)
+        for case in cases:
+            result = triage(case['expected_transcript'])
+            expected = 'chatter' if 'False_call' in case['audio_path'] else 'distress'
+            self.assertEqual(result['decision'], expected, case['audio_path'])
+            self.assertEqual(result['method'], 'lexicon')
+
+    def test_routine_traffic_skips_extraction(self):
+        for transcript in CHATTER:
+            result = triage(transcript)
+            self.assertEqual(result['decision'], 'chatter', transcript)
+            self.assertFalse(result['extract'])
+
+    def test_ambiguous_call_is_extracted_without_llm(self):
+        result = triage(AMBIGUOUS)
+        self.assertEqual((result['decision'], result['method']), ('distress', 'lexicon'))
+
+    def test_no_lexicon_hits_is_not_chatter(self):
+        # Plain-language distress with none of the lexicon's phrases must still be extracted
+        result = triage("We need someone out here, three of us and it's getting dark, near the Needles")
+        self.assertEqual((result['score'], result['decision']), (0.0, 'distress'))
+        for transcript in ["Coastguard, my son has fallen in and I cannot see him.",
+                           "We have water coming in fast, three of us, near the Needles",
+                           "Mayday, we were testing the pumps and they have failed, we are sinking"]:
+            self.assertTrue(triage(transcript)['extract'], transcript)
+        with FakeLLMServer(lambda body: "YES") as server:
+            client = MistralClient(api_url=server.url)
+            result = triage("Hello, anyone out there?", use_llm=True, client=client)
+        self.assertEqual((result['decision'], result['method']), ('distress', 'llm'))
+
+    def test_ambiguous_call_asks_one_token_question(self):
+        with FakeLLMServer(lambda body: "NO") as server:
+            client = MistralClient(api_url=server.url)
+            result = triage(AMBIGUOUS, use_llm=True, client=client)
+        self.assertEqual((result['decision'], result['method']), ('chatter', 'llm'))
+        self.assertEqual(server.requests[0]['max_tokens'], 1)
+        self.assertIn('YES or NO', server.requests[0]['messages'][0]['content'])
+
+        # Clear cases never reach the LLM
+        with FakeLLMServer(lambda body: "YES") as server:
+            client = MistralClient(api_url=server.url)
+            triage("Mayday mayday, we are sinking", use_llm=True, client=client)
+        self.assertEqual(server.requests, [])
+
+    def test_unexpected_answer_raises(self):
+        with FakeLLMServer(lambda body: "Maybe") as server:
+            client = MistralClient(api_url=server.url)
+            with self.assertRaises(LLMOutputError):
+                client.classify_distress(AMBIGUOUS)
+
+
+if __name__ == '__main__':
+    unittest.main()
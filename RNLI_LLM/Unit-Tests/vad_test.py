@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from vad import detect_speech, remap_segments, transcribe_speech_only, trim_silence
+
+SR = 16000
+
+
+def voice(seconds, freq=220.0, envelope=0.4):
+    """A harmonic tone with a slow envelope, loud and tonal like voiced speech."""
+    t = np.arange(int(seconds * SR)) / SR
+    tone = sum(np.sin(2 * np.pi * freq * k * t) / k for k in range(1, 6))
+    return (0.2 * tone * (1 - envelope + envelope * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+def hiss(seconds, level=0.002, seed=0):
+    return (level * np.random.default_rng(seed).standard_normal(int(seconds * SR))).astype(np.float32)
+
+
+class FakeModel:
+    def __init__(self):
+        self.seen = None
+
+    def transcribe(self, audio, language=None, **kwargs):
+        self.seen = audio
+        # One segment per second of (trimmed) audio
+        n = int(np.ceil(len(audio) / SR))
+        return {'text': ' word' * n, 'language': language or 'en',
+                'segments': [{'id': i, 'start': float(i), 'end': float(i + 1), 'text': 'word'} for i in range(n)]}
+
+
+class TestVad(unittest.TestCase):
+    def setUp(self):
+        # 4 s dead air, 2 s speech, 6 s dead air, 3 s speech, 5 s dead air
+        self.audio = np.concatenate([hiss(4, seed=1), voice(2), hiss(6, seed=2), voice(3, 180), hiss(5, seed=3)])
+
+    def test_detects_speech_frames_only(self):
+        speech = detect_speech(self.audio)
+        frame_seconds = 0.03
+        self.assertFalse(speech[:int(3.5 / frame_seconds)].any())
+        self.assertTrue(speech[int(4.5 / frame_seconds):int(5.5 / frame_seconds)].all())
+        self.assertFalse(speech[int(7 / frame_seconds):int(11.5 / frame_seconds)].any())
+        self.assertFalse(speech[int(15.5 / frame_seconds):].any())
+
+    def test_loud_white_noise_is_not_speech(self):
+        self.assertFalse(detect_speech(np.concatenate([hiss(3, 0.002), hiss(2, 0.2, seed=5)])).any())
+
+    def test_continuous_speech_is_kept(self):
+        # Steady level with no quiet frames, so the percentile noise floor is the speech itself
+        speech = detect_speech(voice(6, envelope=0.0))
+        self.assertTrue(speech.all())
+        model = FakeModel()
+        transcribe_speech_only(model, voice(6, envelope=0.0), language='en')
+        self.assertEqual(len(model.seen), 6 * SR)
+
+    def test_trim_keeps_speech_and_drops_silence(self):
+        trimmed = trim_silence(self.audio)
+        self.assertEqual(len(trimmed.regions), 2)
+        # Speech plus hangover and one inserted gap, far less than the 20 s recording
+        self.assertGreater(trimmed.kept_seconds, 5.0)
+        self.assertLess(trimmed.kept_seconds, 7.0)
+
+    def test_timestamps_map_back_to_original(self):
+        trimmed = trim_silence(self.audio)
+        first_start = trimmed.regions[0][1] / SR
+        second_trimmed, second_original, second_length = trimmed.regions[1]
+        self.assertAlmostEqual(trimmed.to_original(0.0), first_start)
+        self.assertAlmostEqual(trimmed.to_original(second_trimmed / SR + 1.0), second_original / SR + 1.0)
+        self.assertGreater(trimmed.to_original(second_trimmed / SR), 10.0)
+
+        segments = remap_segments([{'start': second_trimmed / SR, 'end': second_trimmed / SR + 2.0,
+                                    'words': [{'word': 'over', 'start': second_trimmed / SR, 'end': 1e9}]}], trimmed)
+        self.assertAlmostEqual(segments[0]['start'], round(second_original / SR, 2))
+        # Times past the end of the trimmed audio clamp to the end of the last speech region
+        self.assertAlmostEqual(segments[0]['words'][0]['end'], round((second_original + second_length) / SR, 2))
+
+    def test_transcribe_speech_only_feeds_less_audio(self):
+        model = FakeModel()
+        result = transcribe_speech_only(model, self.audio, language='en')
+        self.assertLess(len(model.seen), len(self.audio) / 2)
+        self.assertTrue(all(seg['start'] >= 3.0 for seg in result['segments']))
+        self.assertLessEqual(result['segments'][-1]['end'], 20.0)
+
+    def test_silence_is_not_transcribed(self):
+        model = FakeModel()
+        result = transcribe_speech_only(model, hiss(10), language='en')
+        self.assertIsNone(model.seen)
+        self.assertEqual(result['text'], '')
+        self.assertEqual(result['segments'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
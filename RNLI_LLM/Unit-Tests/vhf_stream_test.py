@@ -0,0 +1,79 @@
+
+import unittest
+import os
+import sys
+import io
+import tempfile
+import wave
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Main')))
+from vhf_stream import RawPCMSource, RingBuffer, SimulatedChannelSource, run_stream, summarize
+
+
+def tone(seconds, amplitude=0.3, freq=440):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wraps_and_reads_by_absolute_index(self):
+        ring = RingBuffer(10)
+        ring.write(np.arange(8, dtype=np.float32))
+        ring.write(np.arange(8, 14, dtype=np.float32))
+        self.assertEqual(ring.total, 14)
+        np.testing.assert_array_equal(ring.read(6, 14), np.arange(6, 14))
+        # Samples 0-3 have been overwritten
+        np.testing.assert_array_equal(ring.read(0, 6), np.arange(4, 6))
+
+
+class TestStreamIngest(unittest.TestCase):
+    def test_simulated_channel_is_cut_into_calls(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for i, seconds in enumerate([2.0, 1.5]):
+                path = os.path.join(tmpdir, f'call{i}.wav')
+                with wave.open(path, 'wb') as w:
+                    w.setnchannels(1)
+                    w.setsampwidth(2)
+                    w.setframerate(16000)
+                    w.writeframes((tone(seconds) * 32767).astype('<i2').tobytes())
+                paths.append(path)
+            source = SimulatedChannelSource(paths, gap_seconds=2.0, speed=0)
+            heard = []
+            reports = run_stream(source, lambda audio: heard.append(len(audio) / 16000) or f"call {len(heard)}")
+        self.assertEqual([r['transcript'] for r in reports], ['call 1', 'call 2'])
+        # Calls start after 2 s and 2 + 2 + 2 = 6 s of channel time
+        self.assertAlmostEqual(reports[0]['channel_start_s'], 2.0, delta=0.1)
+        self.assertAlmostEqual(reports[1]['channel_start_s'], 6.0, delta=0.1)
+        self.assertAlmostEqual(reports[0]['duration_s'], 2.0, delta=0.1)
+        self.assertGreaterEqual(heard[0], 2.0)  # Includes the pre-roll
+        self.assertEqual(summarize(reports)['utterances'], 2)
+
+    def test_long_speech_is_force_cut(self):
+        pcm = np.concatenate([np.zeros(8000, np.float32), tone(5.0)])
+        source = RawPCMSource(io.BytesIO((pcm * 32767).astype('<i2').tobytes()))
+        reports = run_stream(source, lambda audio: 'x', max_seconds=2.0)
+        self.assertEqual(len(reports), 3)
+        self.assertTrue(all(r['duration_s'] <= 2.05 for r in reports))
+
+    def test_failed_utterance_does_not_stall_ingest(self):
+        pcm = np.concatenate([np.zeros(8000, np.float32), tone(7.0)])
+        source = RawPCMSource(io.BytesIO((pcm * 32767).astype('<i2').tobytes()))
+        calls = []
+
+        def flaky(audio):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise RuntimeError("decoder crashed")
+            return 'x'
+
+        reports = run_stream(source, flaky, queue_size=1, max_seconds=2.0)
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(reports[0]['error'], "RuntimeError: decoder crashed")
+        self.assertEqual([r['transcript'] for r in reports[1:]], ['x', 'x', 'x'])
+        summary = summarize(reports)
+        self.assertEqual((summary['utterances'], summary['failed']), (3, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()